@@ -0,0 +1,278 @@
+# analytics/alerts.py
+"""
+Alert rules evaluated on the issuer summary panel (one row per issuer) after
+every pipeline run and every streaming round, rather than only while the
+dashboard is open.
+
+Rules (thresholds in the Alerts block of config.py; None or False turns a rule off):
+
+    absolute     |delta| >= ALERT_SCORE_CHANGE points
+    relative     |delta| / previous score >= ALERT_RELATIVE_CHANGE
+    zscore       |delta| / score_change_std >= ALERT_ZSCORE, the standard deviation
+                 of the issuer's ALERT_ZSCORE_WINDOW daily moves before this one
+    rating_band  the previous score and the score fall in different agency bands
+                 of RATING_MAP (AA >= 85 > A >= 75 > BBB >= 65 > BB >= 55 > below BB)
+
+The previous score is ``credit_score - delta``: the day before for the
+pipeline's summary, the last close for the stream. Each rule is one NumPy
+expression over every issuer; only the issuers that trip a rule get as far as
+Python.
+
+An alert is an (issuer, rule, direction) as of a date. It is dropped as a
+duplicate when the same alert was already raised for that date (a rerun of the
+pipeline, every streaming round while a move lasts) and held back by the
+debounce while the same issuer, rule and direction was raised less than
+ALERT_DEBOUNCE_MINUTES ago. Raised alerts are appended to ALERT_DIR/alerts.jsonl;
+ALERT_DIR/state.json keeps the last raise of each (issuer, rule, direction).
+"""
+import json
+import os
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+from config import (ISSUERS, ALERT_SCORE_CHANGE, ALERT_RELATIVE_CHANGE, ALERT_ZSCORE, ALERT_RATING_BANDS,
+                    ALERT_DEBOUNCE_MINUTES, ALERT_DIR)
+from modeling.summary import load_issuer_summary
+from utils.logging_utils import setup_logger
+from utils.metrics import count, event
+from utils.mock_data_generator import RATING_MAP
+
+logger = setup_logger("alerts")
+
+SINK_FILE = "alerts.jsonl"
+STATE_FILE = "state.json"
+RULES = ("absolute", "relative", "zscore", "rating_band")
+CARRIED = ("name", "model_version", "ts")       # panel columns copied onto each alert when present
+_LOGGED = 20                                    # alerts logged one by one per batch; a market-wide move is summarized
+
+_BANDS = sorted(RATING_MAP.items(), key=lambda kv: kv[1])
+BAND_EDGES = np.array([v for _, v in _BANDS], dtype=np.float64)
+BAND_NAMES = [f"below {_BANDS[0][0]}"] + [k for k, _ in _BANDS]
+
+
+def default_rules() -> dict:
+    return {"absolute": ALERT_SCORE_CHANGE, "relative": ALERT_RELATIVE_CHANGE, "zscore": ALERT_ZSCORE,
+            "rating_band": ALERT_RATING_BANDS}
+
+
+def rating_band(scores) -> np.ndarray:
+    """Position in BAND_NAMES of each score (-1 where it is NaN)."""
+    s = np.asarray(scores, dtype=np.float64)
+    return np.where(np.isnan(s), -1, np.searchsorted(BAND_EDGES, s, side="right"))
+
+
+def _column(panel, name: str, n: int = None) -> np.ndarray:
+    if name not in panel:
+        return np.full(n, np.nan)
+    col = panel[name]
+    if isinstance(col, pd.Series):
+        return pd.to_numeric(col, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+    return np.asarray(col, dtype=np.float64)
+
+
+def _take(col, pos: np.ndarray) -> np.ndarray:
+    """Rows ``pos`` of a column as an object array, missing values as None."""
+    if isinstance(col, (pd.Series, pd.Index)):
+        col = col.take(pos)
+        return col.astype(object).where(col.notna(), None).to_numpy(dtype=object)
+    vals = np.asarray(col, dtype=object)[pos]
+    return np.where(pd.isna(vals), None, vals)
+
+
+def _as_of(values: np.ndarray) -> np.ndarray:
+    if np.issubdtype(values.dtype, np.datetime64):
+        return pd.DatetimeIndex(values).strftime("%Y-%m-%d").to_numpy(dtype=object)
+    return np.array([str(v)[:10] for v in values], dtype=object)
+
+
+def format_alert(alert: dict) -> str:
+    rule, prev, score = alert["rule"], alert["previous"], alert["score"]
+    scores = f"{prev:.1f} -> {score:.1f}"
+    if rule == "absolute":
+        return f"{score - prev:+.2f} pts ({scores})"
+    if rule == "relative":
+        return f"{alert['value']:+.1%} ({scores})"
+    if rule == "zscore":
+        return f"{alert['value']:+.1f} sd move ({score - prev:+.2f} pts)"
+    bands = rating_band([prev, score])
+    return f"crossed {BAND_NAMES[bands[0]]} -> {BAND_NAMES[bands[1]]} ({scores})"
+
+
+class AlertEngine:
+    def __init__(self, rules: dict = None, debounce_minutes: float = ALERT_DEBOUNCE_MINUTES,
+                 root: Path = ALERT_DIR, on_alert=None):
+        self.rules = {**default_rules(), **(rules or {})}
+        unknown = set(self.rules) - set(RULES)
+        if unknown:
+            raise ValueError(f"Unknown alert rules {sorted(unknown)} (expected {list(RULES)})")
+        self.debounce = float(debounce_minutes) * 60
+        self.root = Path(root) if root else None
+        self.on_alert = on_alert
+        self.state = self._load_state()     # "ticker|rule|direction" -> [as-of date, raised at (epoch seconds)]
+        self.stats = {"evaluated": 0, "candidates": 0, "raised": 0, "duplicates": 0, "debounced": 0}
+
+    # --- State and sink ---------------------------------------------------------
+    def _load_state(self) -> dict:
+        path = self.root / STATE_FILE if self.root else None
+        if path is None or not path.exists():
+            return {}
+        try:
+            return json.loads(path.read_text())
+        except Exception as e:
+            logger.warning(f"Could not read alert state {path}: {e}")
+            return {}
+
+    def save(self) -> Path:
+        if self.root is None:
+            return None
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self.root / STATE_FILE
+        tmp = self.root / f".{STATE_FILE}.tmp"
+        tmp.write_text(json.dumps(self.state))
+        os.replace(tmp, path)
+        return path
+
+    def _write(self, alerts: list):
+        if self.root is None:
+            return
+        self.root.mkdir(parents=True, exist_ok=True)
+        with open(self.root / SINK_FILE, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(a) + "\n" for a in alerts))
+
+    # --- Rules ------------------------------------------------------------------
+    def evaluate(self, panel) -> pd.DataFrame:
+        """
+        Every rule tripped by a summary-style panel: one row per issuer, the ticker
+        as a column or the index, credit_score, delta, optionally date and
+        score_change_std (a DataFrame, or a dict of equal-length columns).
+        One row per (issuer, rule): ticker, date, rule, direction (+1 up / -1
+        down), value, threshold, score, previous.
+        """
+        return pd.DataFrame(self._evaluate(panel))
+
+    def _evaluate(self, panel) -> dict:
+        """``evaluate`` as column arrays (strings as object arrays, cheap to iterate)."""
+        score = _column(panel, "credit_score")
+        delta = _column(panel, "delta", len(score))
+        prev = score - delta
+        hits = []                            # (rule, positions, direction, value, threshold)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            if self.rules["absolute"]:
+                thr = float(self.rules["absolute"])
+                pos = np.flatnonzero(np.abs(delta) >= thr)
+                hits.append(("absolute", pos, np.sign(delta[pos]), delta[pos], np.full(len(pos), thr)))
+            if self.rules["relative"]:
+                thr = float(self.rules["relative"])
+                rel = np.where(prev > 0, delta / prev, np.nan)
+                pos = np.flatnonzero(np.abs(rel) >= thr)
+                hits.append(("relative", pos, np.sign(rel[pos]), rel[pos], np.full(len(pos), thr)))
+            if self.rules["zscore"]:
+                thr = float(self.rules["zscore"])
+                std = _column(panel, "score_change_std", len(score))
+                z = np.where(std > 0, delta / std, np.nan)
+                pos = np.flatnonzero(np.abs(z) >= thr)
+                hits.append(("zscore", pos, np.sign(z[pos]), z[pos], np.full(len(pos), thr)))
+            if self.rules["rating_band"]:
+                now, before = rating_band(score), rating_band(prev)
+                pos = np.flatnonzero((now != before) & (now >= 0) & (before >= 0))
+                # The band edge crossed (the lowest one, for a jump over several bands)
+                edge = BAND_EDGES[np.minimum(now[pos], before[pos])]
+                hits.append(("rating_band", pos, np.sign(now[pos] - before[pos]), score[pos], edge))
+        pos = np.concatenate([h[1] for h in hits]) if hits else np.array([], dtype=np.int64)
+        # Strings only for the issuers that tripped a rule
+        tickers = _take(panel["ticker"] if "ticker" in panel else panel.index, pos)
+        if "date" in panel:
+            dates = _as_of(np.asarray(panel["date"])[pos])
+        else:
+            dates = np.full(len(pos), datetime.now(timezone.utc).strftime("%Y-%m-%d"), dtype=object)
+        out = {
+            "ticker": tickers, "date": dates,
+            "rule": np.repeat(np.array([h[0] for h in hits], dtype=object), [len(h[1]) for h in hits]),
+            "direction": np.concatenate([h[2] for h in hits]).astype(np.int64) if hits else np.array([], np.int64),
+            "value": np.concatenate([h[3] for h in hits]) if hits else np.array([]),
+            "threshold": np.concatenate([h[4] for h in hits]) if hits else np.array([]),
+            "score": score[pos], "previous": prev[pos],
+        }
+        for c in CARRIED:
+            if c in panel:
+                out[c] = _take(panel[c], pos)
+        self.stats["evaluated"] += len(score)
+        self.stats["candidates"] += len(pos)
+        return out
+
+    # --- Raising ----------------------------------------------------------------
+    def process(self, panel, source: str = "pipeline", now: float = None) -> list:
+        """
+        Evaluate ``panel``, drop duplicates and debounced alerts, append the rest
+        to the sink and return them (dicts with a readable ``message``).
+        """
+        found = self._evaluate(panel)
+        if not len(found["ticker"]):
+            return []
+        now = time.time() if now is None else now
+        keep = []
+        for i, (t, rule, d, as_of) in enumerate(zip(*(found[c].tolist() for c in ("ticker", "rule", "direction",
+                                                                                    "date")))):
+            key = f"{t}|{rule}|{d:+d}"
+            last = self.state.get(key)
+            if last is not None and last[0] == as_of:
+                self.stats["duplicates"] += 1
+            elif last is not None and now - last[1] < self.debounce:
+                self.stats["debounced"] += 1
+            else:
+                self.state[key] = [as_of, now]
+                keep.append(i)
+        if not keep:
+            return []
+        raised_at = datetime.fromtimestamp(now, timezone.utc).isoformat(timespec="milliseconds")
+        alerts = [dict(zip(found, row)) for row in zip(*(v[keep].tolist() for v in found.values()))]
+        for a in alerts:
+            a.setdefault("name", ISSUERS.get(a["ticker"], a["ticker"]))
+            a.update(message=format_alert(a), source=source, raised_at=raised_at)
+        for a in alerts[:_LOGGED]:
+            logger.info(f"ALERT {a['ticker']} [{a['rule']}]: {a['message']}")
+        if len(alerts) > _LOGGED:
+            logger.info(f"... and {len(alerts) - _LOGGED} more alerts")
+        event("alerts", raised=len(alerts), source=source, tickers=len({a["ticker"] for a in alerts}))
+        self._write(alerts)
+        self.save()
+        self.stats["raised"] += len(alerts)
+        count("alerts", len(alerts), source=source)
+        if self.on_alert:
+            for a in alerts:
+                self.on_alert(a)
+        return alerts
+
+
+def read_alerts(root: Path = ALERT_DIR, limit: int = None) -> pd.DataFrame:
+    """Raised alerts from the sink, newest last (the last ``limit`` if given)."""
+    path = Path(root) / SINK_FILE
+    if not path.exists():
+        return pd.DataFrame()
+    with open(path, encoding="utf-8") as f:
+        lines = f.readlines()
+    rows = []
+    for line in lines[-limit:] if limit else lines:
+        try:
+            rows.append(json.loads(line))
+        except ValueError:
+            continue
+    return pd.DataFrame(rows)
+
+
+def evaluate_alerts(root: Path = ALERT_DIR) -> Path:
+    """Pipeline stage: raise the alerts of the latest issuer summary."""
+    engine = AlertEngine(root=root)
+    alerts = engine.process(load_issuer_summary(), source="pipeline")
+    path = engine.save()
+    s = engine.stats
+    logger.info(f"Alerts -> {engine.root / SINK_FILE}: {len(alerts)} raised over {s['evaluated']} issuers "
+                f"({s['duplicates']} duplicates, {s['debounced']} debounced)")
+    return path
+
+
+if __name__ == "__main__":
+    evaluate_alerts()
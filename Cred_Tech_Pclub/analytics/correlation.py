@@ -0,0 +1,358 @@
+# analytics/correlation.py
+"""
+Correlation of daily credit-score changes across the issuer universe, kept up
+to date incrementally: top-k most-correlated peers per issuer and hierarchical
+clusters for contagion views.
+
+The engine holds the panel of daily score changes (dates x issuers, float32,
+NaN where an issuer has no score that day) and four issuer x issuer moment
+matrices, weighted per date, over the dates both issuers of a pair have:
+
+    w  = sum(weight)          x  = sum(weight * x_i)
+    xx = sum(weight * x_i^2)  xy = sum(weight * x_i * x_j)
+
+so every pair's correlation uses exactly the dates the two share (as
+``DataFrame.corr`` does), and issuers listed at different times do not drag
+each other towards zero. Each block of new dates is folded in with four matrix
+products (float32 BLAS). With ``mode="ewma"`` older dates fade with a
+half-life; with ``mode="rolling"`` the dates leaving the window are
+subtracted, and the moments are recomputed from the panel once per window of
+updates so float32 rounding cannot build up. Correlations are computed
+from the moments in blocks of rows, only for the issuers asked for.
+
+``update_correlations`` (the pipeline stage) reads only the scores after the
+last date in the saved state, so a daily run costs one partition read per
+issuer and one rank-one update.
+"""
+import json
+import os
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+from config import (ISSUERS, CORR_DIR, CORR_MODE, CORR_HALFLIFE_DAYS, CORR_WINDOW_DAYS, CORR_MIN_PERIODS,
+                    CORR_BLOCK, CORR_TOP_K, CORR_CLUSTER_THRESHOLD)
+from utils.logging_utils import setup_logger
+from utils.metrics import count, timed
+from utils.storage import get_store
+
+logger = setup_logger("correlation")
+
+STATE_FILE = "state.npz"
+_MOMENTS = ("w", "x", "xx", "xy")
+
+
+def score_changes(scores: pd.DataFrame, last: pd.Series = None) -> tuple:
+    """
+    Daily changes of a (dates x issuers) score frame, each issuer against its own
+    previous score (so a holiday of one market is a gap, not a zero change).
+    ``last`` holds the scores before the frame's first date. Returns (changes,
+    last score of each issuer).
+    """
+    if last is not None:
+        head = pd.DataFrame([last.reindex(scores.columns).to_numpy()], columns=scores.columns,
+                            index=pd.DatetimeIndex([pd.NaT]))
+        scores = pd.concat([head, scores])
+    filled = scores.ffill()
+    changes = filled.diff().where(scores.notna())
+    if last is not None:
+        changes = changes.iloc[1:]
+    return changes, filled.iloc[-1] if len(filled) else last
+
+
+class CorrelationEngine:
+    def __init__(self, tickers: list, mode: str = CORR_MODE, halflife: float = CORR_HALFLIFE_DAYS,
+                 window: int = CORR_WINDOW_DAYS, min_periods: int = CORR_MIN_PERIODS, block: int = CORR_BLOCK):
+        if mode not in ("ewma", "rolling"):
+            raise ValueError(f"Unknown correlation mode {mode!r} (expected 'ewma' or 'rolling')")
+        self.tickers = list(tickers)
+        self.mode, self.halflife, self.window = mode, float(halflife), int(window)
+        self.min_periods, self.block = int(min_periods), int(block)
+        n = len(self.tickers)
+        self._pos = {t: i for i, t in enumerate(self.tickers)}
+        self.dates = pd.DatetimeIndex([])
+        self.changes = np.empty((0, n), dtype=np.float32)
+        self.last = pd.Series(np.nan, index=self.tickers)
+        self.moments = {k: np.zeros((n, n), dtype=np.float32) for k in _MOMENTS}
+        self.obs = np.zeros(n, dtype=np.int64)      # changes per issuer in the window (all of them for ewma)
+        self.since_full = 0                         # rolling: dates added since the moments were recomputed
+        self._rows = {}                             # issuer position -> correlation row (until the next update)
+        self._full = None
+        self._clusters = {}
+
+    # --- Settings and state -------------------------------------------------
+    @property
+    def params(self) -> dict:
+        return {"mode": self.mode, "halflife": self.halflife, "window": self.window,
+                "min_periods": self.min_periods}
+
+    @property
+    def last_date(self):
+        return self.dates[-1] if len(self.dates) else None
+
+    def describe(self) -> str:
+        if self.mode == "ewma":
+            return f"EWMA ({self.halflife:g}-day half-life)"
+        return f"{self.window}-day rolling"
+
+    def save(self, root: Path = CORR_DIR) -> Path:
+        root = Path(root)
+        root.mkdir(parents=True, exist_ok=True)
+        path = root / STATE_FILE
+        tmp = root / f".{STATE_FILE}.tmp"
+        with open(tmp, "wb") as f:
+            np.savez(f, tickers=np.array(self.tickers, dtype=str), dates=self.dates.as_unit("ns").asi8,
+                     changes=self.changes, last=self.last.to_numpy(dtype=np.float64), obs=self.obs,
+                     meta=np.array(json.dumps({**self.params, "since_full": self.since_full})),
+                     **{f"m_{k}": v for k, v in self.moments.items()})
+        os.replace(tmp, path)
+        return path
+
+    @classmethod
+    def load(cls, root: Path = CORR_DIR):
+        """The saved engine, or None if there is none (or it cannot be read)."""
+        path = Path(root) / STATE_FILE
+        if not path.exists():
+            return None
+        try:
+            with np.load(path) as z:
+                meta = json.loads(str(z["meta"]))
+                engine = cls(z["tickers"].tolist(), meta["mode"], meta["halflife"], meta["window"],
+                             meta["min_periods"])
+                engine.dates = pd.DatetimeIndex(z["dates"].astype("datetime64[ns]"))
+                engine.changes = z["changes"]
+                engine.last = pd.Series(z["last"], index=engine.tickers)
+                engine.obs = z["obs"]
+                engine.moments = {k: z[f"m_{k}"] for k in _MOMENTS}
+                engine.since_full = meta["since_full"]
+            return engine
+        except Exception as e:
+            logger.warning(f"Could not read correlation state {path}: {e}")
+            return None
+
+    # --- Updates -------------------------------------------------------------
+    def _accumulate(self, x: np.ndarray, weights: np.ndarray):
+        """Add ``weights[t]`` times date t of ``x`` (dates x issuers, NaN = missing) to the moments."""
+        m = self.moments
+        for lo in range(0, len(x), self.block):
+            xb = x[lo:lo + self.block]
+            mask = ~np.isnan(xb)
+            x0 = np.where(mask, xb, np.float32(0))
+            mf = mask.astype(np.float32)
+            w = weights[lo:lo + self.block, None].astype(np.float32)
+            xw = x0 * w
+            m["w"] += (mf * w).T @ mf
+            m["x"] += xw.T @ mf
+            m["xx"] += (xw * x0).T @ mf
+            m["xy"] += xw.T @ x0
+
+    def _recompute(self):
+        """Moments from the panel alone (the last ``window`` dates for rolling)."""
+        for v in self.moments.values():
+            v[:] = 0
+        x = self.changes if self.mode == "ewma" else self.changes[-self.window:]
+        if self.mode == "ewma":
+            lam = 0.5 ** (1.0 / self.halflife)
+            self._accumulate(x, lam ** np.arange(len(x) - 1, -1, -1, dtype=np.float64))
+        else:
+            self._accumulate(x, np.ones(len(x)))
+        self.obs = (~np.isnan(x)).sum(axis=0).astype(np.int64)
+        self.since_full = 0
+
+    def update(self, changes: pd.DataFrame) -> int:
+        """
+        Fold in daily changes for dates after ``last_date`` (earlier dates are
+        ignored); returns the number of dates added.
+        """
+        if self.last_date is not None:
+            changes = changes.loc[changes.index > self.last_date]
+        changes = changes.dropna(how="all")
+        if changes.empty:
+            return 0
+        x = changes.reindex(columns=self.tickers).to_numpy(dtype=np.float32)
+        t = len(x)
+        with timed("correlation.update", mode=self.mode, dates=t):
+            self.dates = self.dates.append(pd.DatetimeIndex(changes.index))
+            self.changes = np.concatenate([self.changes, x])
+            if self.mode == "ewma":
+                lam = 0.5 ** (1.0 / self.halflife)
+                decay = np.float32(lam ** t)
+                for v in self.moments.values():
+                    v *= decay
+                self._accumulate(x, lam ** np.arange(t - 1, -1, -1, dtype=np.float64))
+                self.obs += (~np.isnan(x)).sum(axis=0)
+            elif self.since_full + t >= self.window or len(self.changes) == t:
+                self._recompute()
+            else:
+                # Dates that fall out of the window leave with weight -1
+                total = len(self.changes)
+                gone = self.changes[max(total - t - self.window, 0):max(total - self.window, 0)]
+                self._accumulate(x, np.ones(t))
+                if len(gone):
+                    self._accumulate(gone, -np.ones(len(gone)))
+                self.obs += (~np.isnan(x)).sum(axis=0) - (~np.isnan(gone)).sum(axis=0)
+                self.since_full += t
+        self._rows, self._full, self._clusters = {}, None, {}
+        count("rows", t, stage="correlation")
+        return t
+
+    def update_scores(self, scores: pd.DataFrame) -> int:
+        """``update`` from scores (dates x issuers) rather than changes."""
+        if self.last_date is not None:
+            scores = scores.loc[scores.index > self.last_date]
+        last = self.last if self.last.notna().any() else None
+        changes, last = score_changes(scores.reindex(columns=self.tickers), last)
+        added = self.update(changes)
+        if last is not None:
+            self.last = last.reindex(self.tickers)
+        return added
+
+    # --- Correlations ----------------------------------------------------------
+    def _corr_rows(self, idx: np.ndarray) -> np.ndarray:
+        """Correlations of the issuers at positions ``idx`` with every issuer (len(idx) x n, float32)."""
+        m = self.moments
+        w = m["w"][idx]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean_i, mean_j = m["x"][idx] / w, m["x"][:, idx].T / w
+            var_i = m["xx"][idx] / w - mean_i * mean_i
+            var_j = m["xx"][:, idx].T / w - mean_j * mean_j
+            r = (m["xy"][idx] / w - mean_i * mean_j) / np.sqrt(var_i * var_j)
+        enough = np.minimum.outer(self.obs[idx], self.obs) >= self.min_periods
+        r[~(enough & (var_i > 0) & (var_j > 0))] = np.nan
+        np.clip(r, -1, 1, out=r)
+        rows = np.arange(len(idx))
+        r[rows, idx] = np.where(np.isnan(r[rows, idx]), np.nan, 1.0)
+        return r
+
+    def _positions(self, tickers) -> np.ndarray:
+        return np.array([self._pos[t] for t in tickers if t in self._pos], dtype=np.int64)
+
+    def corr(self) -> np.ndarray:
+        """Full correlation matrix (n x n, float32), computed in blocks of rows."""
+        if self._full is None:
+            n = len(self.tickers)
+            full = np.empty((n, n), dtype=np.float32)
+            for lo in range(0, n, self.block):
+                full[lo:lo + self.block] = self._corr_rows(np.arange(lo, min(lo + self.block, n)))
+            self._full = full
+        return self._full
+
+    def row(self, ticker: str) -> pd.Series:
+        """Correlations of ``ticker`` with every issuer."""
+        i = self._pos[ticker]
+        if i not in self._rows:
+            self._rows[i] = self.corr()[i] if self._full is not None else self._corr_rows(np.array([i]))[0]
+        return pd.Series(self._rows[i], index=self.tickers)
+
+    def matrix(self, tickers=None) -> pd.DataFrame:
+        """Correlation matrix of ``tickers`` (every issuer if None); unknown tickers are left out."""
+        if tickers is None:
+            return pd.DataFrame(self.corr(), index=self.tickers, columns=self.tickers)
+        idx = self._positions(tickers)
+        names = [self.tickers[i] for i in idx]
+        sub = self.corr()[np.ix_(idx, idx)] if self._full is not None else self._corr_rows(idx)[:, idx]
+        return pd.DataFrame(sub, index=names, columns=names)
+
+    def top_k(self, ticker: str, k: int = CORR_TOP_K, absolute: bool = False) -> pd.Series:
+        """The ``k`` issuers whose changes correlate most with ``ticker``'s, highest first."""
+        r = self.row(ticker).drop(ticker)
+        r = r.dropna()
+        key = r.abs() if absolute else r
+        return r.loc[key.nlargest(k).index]
+
+    def top_k_all(self, k: int = CORR_TOP_K, absolute: bool = False) -> pd.DataFrame:
+        """Top-k peers of every issuer: one row per (ticker, rank) with peer and correlation."""
+        c = self.corr()
+        n = len(self.tickers)
+        k = min(k, n - 1)
+        if k <= 0:
+            return pd.DataFrame(columns=["ticker", "rank", "peer", "correlation"])
+        key = np.abs(c) if absolute else c.copy()
+        key[np.isnan(key)] = -np.inf
+        np.fill_diagonal(key, -np.inf)
+        part = np.argpartition(-key, k - 1, axis=1)[:, :k]
+        order = np.argsort(-np.take_along_axis(key, part, axis=1), axis=1)
+        peers = np.take_along_axis(part, order, axis=1)
+        vals = np.take_along_axis(c, peers, axis=1)
+        out = pd.DataFrame({
+            "ticker": np.repeat(self.tickers, k), "rank": np.tile(np.arange(1, k + 1), n),
+            "peer": np.asarray(self.tickers)[peers.ravel()], "correlation": vals.ravel(),
+        })
+        return out[np.isfinite(np.take_along_axis(key, peers, axis=1).ravel())].reset_index(drop=True)
+
+    def clusters(self, threshold: float = CORR_CLUSTER_THRESHOLD, n_clusters: int = None,
+                 method: str = "average") -> pd.DataFrame:
+        """
+        Hierarchical clusters on the distance sqrt((1 - corr) / 2), cut at
+        ``threshold`` (or into ``n_clusters``). One row per issuer with its
+        cluster and its position in the dendrogram's leaf order (for ordering
+        heatmaps); pairs without a correlation count as uncorrelated.
+        """
+        key = (threshold, n_clusters, method)
+        if key not in self._clusters:
+            from scipy.cluster.hierarchy import linkage, fcluster, leaves_list
+            from scipy.spatial.distance import squareform
+            n = len(self.tickers)
+            if n < 2:
+                return pd.DataFrame({"cluster": np.ones(n, dtype=int), "order": np.arange(n)}, index=self.tickers)
+            with timed("correlation.clusters", issuers=n):
+                c = np.nan_to_num(self.corr().astype(np.float64), nan=0.0)
+                d = np.sqrt(np.clip((1.0 - (c + c.T) / 2) / 2, 0, 1))
+                np.fill_diagonal(d, 0)
+                z = linkage(squareform(d, checks=False), method=method)
+                labels = (fcluster(z, n_clusters, "maxclust") if n_clusters
+                          else fcluster(z, threshold, "distance"))
+                order = np.empty(n, dtype=int)
+                order[leaves_list(z)] = np.arange(n)
+            self._clusters[key] = pd.DataFrame({"cluster": labels, "order": order}, index=self.tickers)
+        return self._clusters[key]
+
+
+def _read_scores(tickers: list, store, start=None) -> pd.DataFrame:
+    """credit_score of every issuer from ``start`` on, as a (dates x issuers) frame."""
+    cols = {}
+    for t in tickers:
+        try:
+            df = store.read_series("features", t, columns=["credit_score"], start=start)
+            if not df.empty:
+                cols[t] = df["credit_score"]
+        except Exception as e:
+            logger.warning(f"Could not read scores for {t}: {e}")
+    if not cols:
+        return pd.DataFrame(columns=tickers, dtype=float)
+    return pd.concat(cols, axis=1).sort_index().reindex(columns=tickers)
+
+
+def update_correlations(issuers=None, rebuild: bool = False, root: Path = CORR_DIR) -> Path:
+    """
+    Bring the saved correlation state up to the newest feature dates. The state
+    is rebuilt from full histories when the universe or settings changed, or
+    when the scores stored for its last date no longer match (features rebuilt).
+    """
+    store = get_store()
+    tickers = list(issuers or ISSUERS)
+    fresh = CorrelationEngine(tickers)
+    engine = None if rebuild else CorrelationEngine.load(root)
+    if engine is not None and (engine.tickers != tickers or engine.params != fresh.params):
+        logger.info("Issuer universe or correlation settings changed; rebuilding correlations")
+        engine = None
+    if engine is not None and engine.last_date is not None:
+        scores = _read_scores(tickers, store, start=engine.last_date)
+        if engine.last_date in scores.index:
+            stored = scores.loc[engine.last_date]
+            both = stored.notna() & engine.last.notna()
+            if not np.allclose(stored[both], engine.last[both], atol=1e-6):
+                logger.info("Stored scores changed before the last correlation date; rebuilding correlations")
+                engine = None
+    if engine is None:
+        engine = fresh
+        scores = _read_scores(tickers, store)
+    added = engine.update_scores(scores)
+    path = engine.save(root)
+    logger.info(f"Correlations ({engine.describe()}) -> {path}: {added} new dates, "
+                f"{len(engine.dates)} in the panel, {len(tickers)} issuers")
+    return path
+
+
+if __name__ == "__main__":
+    update_correlations()
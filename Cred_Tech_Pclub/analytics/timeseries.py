@@ -0,0 +1,140 @@
+# analytics/timeseries.py
+"""
+Time-series queries for charts: a date window of a few columns of one issuer's
+series, downsampled to a point budget (about the chart's width in pixels).
+
+Only the requested columns and the partitions overlapping the window are read
+from storage. Each column is reduced on its own with LTTB (largest triangle
+three buckets: keeps the visual shape, including spikes) or min/max bucketing
+(keeps every bucket's extremes), so a 20-year daily line costs the browser
+about as much as a one-year one; overlays of many lines share a per-chart
+budget (``line_budget``). Results are cached per (ticker, columns, window,
+resolution) for the life of the process and dropped when the stored series
+changes. ``chart_xy`` hands Plotly typed arrays (epoch milliseconds, float32
+values), which it ships base64-encoded instead of as lists of date strings.
+"""
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+from config import CHART_MAX_POINTS, CHART_POINTS_PER_CHART, CHART_DOWNSAMPLE, CHART_CACHE_SIZE
+from utils.metrics import count
+from utils.storage import get_store
+
+_CACHE = OrderedDict()     # query key -> {column: downsampled series}
+_LOCK = threading.Lock()
+
+
+def line_budget(n_lines: int, max_points: int = CHART_MAX_POINTS, per_chart: int = CHART_POINTS_PER_CHART) -> int:
+    """Points per line when ``n_lines`` lines share one chart."""
+    return min(max_points, max(per_chart // max(n_lines, 1), 150))
+
+
+def chart_xy(s: pd.Series) -> tuple:
+    """(x, y) arrays for a Plotly trace on a date axis (set ``xaxis type="date"``)."""
+    return pd.DatetimeIndex(s.index).as_unit("ms").asi8.astype(np.float64), s.to_numpy(dtype=np.float32)
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Positions of the ``n_out`` points LTTB keeps (first and last always included)."""
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    # n_out - 2 buckets over the interior points; every bucket holds at least one point
+    edges = np.floor(np.linspace(1, n - 1, n_out - 1)).astype(np.int64)
+    edges = np.append(edges, n)
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nxt = slice(edges[i + 1], edges[i + 2])
+        avg_x, avg_y = x[nxt].mean(), y[nxt].mean()
+        # Twice the area of the triangle (previous kept point, candidate, next bucket's average)
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(area.argmax())
+        out[i + 1] = a
+    return out
+
+
+def minmax_indices(y: np.ndarray, n_out: int) -> np.ndarray:
+    """Positions of each bucket's minimum and maximum (about ``n_out`` points, first and last included)."""
+    n = len(y)
+    if n_out >= n:
+        return np.arange(n)
+    buckets = max(n_out // 2, 1)
+    width = -(-n // buckets)
+    pad = buckets * width - n
+    starts = np.arange(buckets) * width
+    lo = np.concatenate([y, np.full(pad, np.inf)]).reshape(buckets, width).argmin(axis=1) + starts
+    hi = np.concatenate([y, np.full(pad, -np.inf)]).reshape(buckets, width).argmax(axis=1) + starts
+    idx = np.unique(np.concatenate([lo, hi, [0, n - 1]]))
+    return idx[idx < n]
+
+
+def downsample(s: pd.Series, max_points: int = CHART_MAX_POINTS, method: str = CHART_DOWNSAMPLE) -> pd.Series:
+    """``s`` without missing values, reduced to about ``max_points`` points."""
+    s = s.dropna()
+    if len(s) <= max_points:
+        return s
+    y = s.to_numpy(dtype=np.float64)
+    if method == "minmax":
+        idx = minmax_indices(y, max_points)
+    else:
+        # Seconds since the first point: uneven spacing (weekends, holidays) counts, and the products stay small
+        if isinstance(s.index, pd.DatetimeIndex):
+            secs = s.index.as_unit("s").asi8
+            x = (secs - secs[0]).astype(np.float64)
+        else:
+            x = np.arange(len(y), dtype=np.float64)
+        idx = lttb_indices(x, y, max_points)
+    return s.iloc[idx]
+
+
+def _stamp(path: Path):
+    """Newest mtime under ``path`` (a file, or a partition directory), None if it does not exist."""
+    try:
+        if path.is_dir():
+            return max((e.stat().st_mtime_ns for e in os.scandir(path)), default=None)
+        return path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def query_series(ticker: str, columns: list, start=None, end=None, max_points: int = CHART_MAX_POINTS,
+                 method: str = CHART_DOWNSAMPLE, kind: str = "features", store=None) -> dict:
+    """
+    ``{column: downsampled series}`` for ``ticker`` over [start, end] (either may be None).
+    Missing columns are left out.
+    """
+    store = store or get_store()
+    columns = list(columns)
+    key = (kind, ticker, tuple(columns), str(start), str(end), max_points, method)
+    stamp = _stamp(store.series_path(kind, ticker))
+    with _LOCK:
+        cached = _CACHE.get(key)
+        if cached is not None and cached[0] == stamp:
+            _CACHE.move_to_end(key)
+            count("cache_hits", cache="timeseries")
+            return cached[1]
+    count("cache_misses", cache="timeseries")
+    try:
+        df = store.read_series(kind, ticker, columns=columns, start=start, end=end)
+    except (KeyError, ValueError):
+        # A column the stored schema does not have (pyarrow raises instead of skipping it)
+        df = store.read_series(kind, ticker, start=start, end=end)
+    out = {c: downsample(df[c], max_points, method) for c in columns if c in df.columns}
+    with _LOCK:
+        _CACHE[key] = (stamp, out)
+        _CACHE.move_to_end(key)
+        while len(_CACHE) > CHART_CACHE_SIZE:
+            _CACHE.popitem(last=False)
+    return out
+
+
+def clear_cache():
+    with _LOCK:
+        _CACHE.clear()
@@ -0,0 +1,88 @@
+"""
+Comparison-chart cost for many issuers over a long history: every daily point
+of the full feature frames (as the dashboard used to send them) vs the
+windowed, downsampled query layer. The payload is the Plotly figure JSON that
+Streamlit ships over its websocket; serialization time stands in for render
+time, which scales with the number of points. Also reports how far the LTTB
+line strays from the full one.
+
+Synthetic bars start in 2015, so the history is at most ten years.
+
+    python -m benchmarks.bench_chart_downsampling [n_issuers]
+"""
+import os
+import sys
+import tempfile
+
+os.environ.setdefault("CREDTECH_DATA_DIR", tempfile.mkdtemp(prefix="credtech_charts_"))
+os.environ.setdefault("CREDTECH_MODELS_DIR", tempfile.mkdtemp(prefix="credtech_charts_models_"))
+
+import time
+import numpy as np
+import plotly.graph_objects as go
+from config import ISSUERS, SECTOR_ETFS, MACRO_TICKERS, COMMODITY_TICKERS
+from feature_engineering.structured_features import process_structured_and_build_features
+from analytics.timeseries import query_series, clear_cache, line_budget, chart_xy
+from utils.storage import get_store
+from benchmarks.fakes import synthetic_bars
+
+
+def _figure(series: dict, typed: bool) -> go.Figure:
+    fig = go.Figure()
+    for t, s in series.items():
+        x, y = chart_xy(s) if typed else (s.index, s)
+        fig.add_trace(go.Scatter(x=x, y=y, mode="lines", name=t))
+    return fig.update_layout(xaxis_type="date")
+
+
+def _measure(load, typed: bool = True) -> tuple:
+    t0 = time.perf_counter()
+    series = load()
+    t1 = time.perf_counter()
+    payload = _figure(series, typed).to_json()
+    t2 = time.perf_counter()
+    return t1 - t0, t2 - t1, len(payload), sum(len(s) for s in series.values()), series
+
+
+def main(n_issuers: int = 20, start_year: int = 2015):
+    store = get_store()
+    ISSUERS.clear()
+    ISSUERS.update({f"SYN{i:04d}.NS": f"Synthetic {i}" for i in range(n_issuers)})
+    for t in list(ISSUERS) + list(SECTOR_ETFS) + list(MACRO_TICKERS) + list(COMMODITY_TICKERS):
+        store.write_series("prices", t, synthetic_bars(t, f"{start_year}-01-01", "2025-01-01"))
+    process_structured_and_build_features(mode="full")
+    tickers = list(ISSUERS)
+    max_points = line_budget(len(tickers))
+
+    rows = {
+        "full frames, every point": _measure(lambda: {t: store.read_series("features", t)["credit_score"]
+                                                      for t in tickers}, typed=False),
+    }
+    for method in ("lttb", "minmax"):
+        clear_cache()
+        rows[f"{method}, cold"] = _measure(lambda: {t: query_series(t, ["credit_score"], max_points=max_points,
+                                                                    method=method)["credit_score"] for t in tickers})
+        rows[f"{method}, cached"] = _measure(lambda: {t: query_series(t, ["credit_score"], max_points=max_points,
+                                                                      method=method)["credit_score"] for t in tickers})
+    clear_cache()
+    rows["lttb, last 3 years"] = _measure(lambda: {t: query_series(t, ["credit_score"], "2022-01-01",
+                                                                   max_points=max_points)["credit_score"]
+                                                   for t in tickers})
+
+    print(f"{n_issuers} issuers since {start_year}, {max_points} points per line (line_budget)")
+    print(f"  {'':26s} {'load':>9s} {'to_json':>9s} {'payload':>10s} {'points':>8s}")
+    for label, (load, ser, size, points, _) in rows.items():
+        print(f"  {label:26s} {load * 1000:7.1f}ms {ser * 1000:7.1f}ms {size / 1024:8.0f}KiB {points:8d}")
+
+    full, lttb = rows["full frames, every point"][4], rows["lttb, cached"][4]
+    err = []
+    for t in tickers:
+        # Linear interpolation of the kept points at every original date, relative to the series' range
+        f, d = full[t].dropna(), lttb[t]
+        approx = np.interp(f.index.as_unit("s").asi8, d.index.as_unit("s").asi8, d.to_numpy())
+        err.append(np.abs(approx - f.to_numpy()).mean() / (f.max() - f.min()))
+    print(f"  LTTB mean deviation from the full line: {np.mean(err):.2%} of the series' range")
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:4]))
@@ -0,0 +1,109 @@
+"""
+Correlation of daily score changes across a large universe: recomputing
+``DataFrame.corr`` over the whole panel (what the comparison tab did for its
+picks, at universe scale) vs the incremental engine: cold build, a one-day
+update, top-k lookups and clustering. Checks the engine against pandas.
+
+Then the pipeline stage on stored score histories: a cold build, a run with no
+new dates and a run after one new business day.
+
+Scores are random walks driven by a handful of sector factors, with staggered
+listings and scattered missing days.
+
+    python -m benchmarks.bench_correlation [n_issuers] [n_days] [n_stored]
+"""
+import os
+import sys
+import tempfile
+
+os.environ.setdefault("CREDTECH_DATA_DIR", tempfile.mkdtemp(prefix="credtech_corr_"))
+os.environ.setdefault("CREDTECH_MODELS_DIR", tempfile.mkdtemp(prefix="credtech_corr_models_"))
+
+import time
+import numpy as np
+import pandas as pd
+from config import ISSUERS
+from analytics.correlation import CorrelationEngine, score_changes, update_correlations
+from utils.storage import get_store
+
+
+def synthetic_scores(n_issuers: int, n_days: int, seed: int = 0, sectors: int = 12) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(end="2024-12-31", periods=n_days)
+    sector = rng.integers(0, sectors, n_issuers)
+    factors = rng.normal(size=(n_days, sectors + 1)).astype(np.float32)
+    loading = rng.uniform(0.5, 1.5, n_issuers).astype(np.float32)
+    moves = (factors[:, sector] * loading + 0.5 * factors[:, [-1]]
+             + rng.normal(size=(n_days, n_issuers)).astype(np.float32))
+    scores = 50 + np.cumsum(moves * 0.3, axis=0)
+    listed = rng.integers(0, n_days // 2, n_issuers) * (rng.random(n_issuers) < 0.2)
+    scores[np.arange(n_days)[:, None] < listed] = np.nan
+    scores[rng.random((n_days, n_issuers)) < 0.01] = np.nan
+    return pd.DataFrame(scores, index=dates, columns=[f"SYN{i:04d}.NS" for i in range(n_issuers)])
+
+
+def _time(fn):
+    t0 = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - t0
+
+
+def in_memory(n_issuers: int, n_days: int):
+    scores = synthetic_scores(n_issuers, n_days)
+    tickers = list(scores.columns)
+    print(f"{n_issuers} issuers x {n_days} days")
+
+    changes, _ = score_changes(scores)
+    ref, t_pandas = _time(lambda: changes.astype(np.float64).corr(min_periods=20))
+    print(f"  pandas DataFrame.corr over the panel      {t_pandas:8.2f} s   (every time a day is added)")
+
+    engine = CorrelationEngine(tickers, mode="rolling", window=n_days)
+    _, t_cold = _time(lambda: engine.update_scores(scores.iloc[:-1]))
+    _, t_day = _time(lambda: engine.update_scores(scores))
+    full, t_full = _time(engine.corr)
+    err = np.nanmax(np.abs(full - ref.to_numpy()))
+    print(f"  rolling, cold build                       {t_cold:8.2f} s")
+    print(f"  rolling, one new day                      {t_day * 1000:8.1f} ms")
+    print(f"  full matrix from the moments              {t_full * 1000:8.1f} ms   max |diff| vs pandas {err:.1e}")
+
+    ewma = CorrelationEngine(tickers)
+    _, t_cold = _time(lambda: ewma.update_scores(scores.iloc[:-1]))
+    _, t_day = _time(lambda: ewma.update_scores(scores))
+    _, t_row = _time(lambda: ewma.top_k(tickers[0]))
+    _, t_full = _time(ewma.corr)
+    _, t_all = _time(ewma.top_k_all)
+    clusters, t_clu = _time(ewma.clusters)
+    mem = sum(v.nbytes for v in ewma.moments.values()) + ewma.changes.nbytes
+    print(f"  ewma, cold build                          {t_cold:8.2f} s")
+    print(f"  ewma, one new day                         {t_day * 1000:8.1f} ms")
+    print(f"  top-k of one issuer (one row only)        {t_row * 1000:8.1f} ms")
+    print(f"  full matrix                               {t_full * 1000:8.1f} ms")
+    print(f"  top-k of every issuer                     {t_all * 1000:8.1f} ms")
+    print(f"  hierarchical clusters                     {t_clu * 1000:8.1f} ms   "
+          f"{clusters['cluster'].nunique()} clusters (12 sectors)")
+    print(f"  state in memory                           {mem / 2**20:8.1f} MiB (float32)")
+
+
+def stored(n_issuers: int, n_days: int):
+    store = get_store()
+    scores = synthetic_scores(n_issuers, n_days + 1, seed=1)
+    ISSUERS.clear()
+    ISSUERS.update({t: t for t in scores.columns})
+    for t in scores.columns:
+        store.write_series("features", t, scores[[t]].rename(columns={t: "credit_score"}).iloc[:-1])
+    print(f"pipeline stage, {n_issuers} stored issuers x {n_days} days")
+    _, t_cold = _time(update_correlations)
+    _, t_none = _time(update_correlations)
+    for t in scores.columns:
+        store.append_series("features", t, scores[[t]].rename(columns={t: "credit_score"}).iloc[-1:])
+    path, t_day = _time(update_correlations)
+    print(f"  cold build                                {t_cold:8.2f} s")
+    print(f"  no new dates                              {t_none:8.2f} s")
+    print(f"  one new day                               {t_day:8.2f} s   ({path.stat().st_size / 2**20:.1f} MiB state)")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:4]]
+    n_issuers, n_days, n_stored = args + [2000, 2500, 200][len(args):]
+    in_memory(n_issuers, n_days)
+    stored(n_stored, n_days)
@@ -0,0 +1,48 @@
+"""
+Wall time and peak RSS of process_structured_and_build_features on a synthetic
+universe (prices for issuers and context tickers plus daily sentiment).
+Peak RSS growth is measured against the high-water mark left by seeding.
+
+    python -m benchmarks.bench_feature_build [n_issuers]
+"""
+import os
+import resource
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("CREDTECH_DATA_DIR", tempfile.mkdtemp(prefix="credtech_features_"))
+
+import numpy as np
+import pandas as pd
+from config import SECTOR_ETFS, MACRO_TICKERS, COMMODITY_TICKERS
+from feature_engineering.structured_features import process_structured_and_build_features
+from utils.storage import get_store
+from benchmarks.fakes import synthetic_bars
+
+
+def seed(issuers: dict, start: str = "2020-01-01", end: str = "2025-01-01"):
+    store = get_store()
+    for t in list(issuers) + list(SECTOR_ETFS) + list(MACRO_TICKERS) + list(COMMODITY_TICKERS):
+        store.write_series("prices", t, synthetic_bars(t, start, end))
+    rng = np.random.default_rng(0)
+    days = pd.bdate_range(start, end).strftime("%Y-%m-%d")
+    sent = pd.DataFrame([{"ticker": t, "date": d, "avg_sentiment_score": float(rng.uniform(-1, 1))}
+                         for t in issuers for d in rng.choice(days, 60, replace=False)])
+    store.write_table("daily_sentiment", sent)
+
+
+def main(n_issuers: int = 200):
+    issuers = {f"SYN{i:04d}.NS": f"Synthetic {i}" for i in range(n_issuers)}
+    seed(issuers)
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    t0 = time.perf_counter()
+    process_structured_and_build_features(issuers)
+    wall = time.perf_counter() - t0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss     # KiB on Linux
+    print(f"{n_issuers} issuers: wall={wall:.2f}s peak_rss={peak / 1024:.0f} MiB "
+          f"(+{(peak - before) / 1024:.0f} MiB during build)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,35 @@
+"""
+Compare a full price download with an incremental refresh.
+
+    CREDTECH_DATA_DIR=/tmp/credtech_bench python -m benchmarks.bench_incremental_ingest
+"""
+import time
+from data_ingestion.yfinance_ingestor import fetch_yfinance_data
+from utils.storage import get_store
+from benchmarks.fakes import CountingDownloader
+
+TICKERS = [f"SYN{i:03d}.NS" for i in range(100)]
+STALE_DAYS = 5
+
+
+def _run(label: str, incremental: bool):
+    fake = CountingDownloader()
+    t0 = time.perf_counter()
+    fetch_yfinance_data(tickers=TICKERS, incremental=incremental, downloader=fake)
+    dt = time.perf_counter() - t0
+    print(f"{label:<24} calls={len(fake.calls):<4} rows_requested={fake.rows_requested:<8} wall={dt:.2f}s")
+
+
+def main():
+    _run("full", incremental=False)
+
+    # Drop the newest bars to simulate a store that is a few sessions behind
+    store = get_store()
+    for t in TICKERS:
+        store.write_series("prices", t, store.read_series("prices", t).iloc[:-STALE_DAYS])
+    _run(f"incremental ({STALE_DAYS}d behind)", incremental=True)
+    _run("incremental (current)", incremental=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+SHAP on a 5-year history: explaining every row (the old behaviour) vs the
+incremental mode after one new trading day, plus the cost of a model change.
+
+    python -m benchmarks.bench_incremental_shap [n_issuers]
+"""
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("CREDTECH_DATA_DIR", tempfile.mkdtemp(prefix="credtech_shap_"))
+os.environ.setdefault("CREDTECH_MODELS_DIR", tempfile.mkdtemp(prefix="credtech_shap_models_"))
+
+import numpy as np
+import shap
+from config import SECTOR_ETFS, MACRO_TICKERS, COMMODITY_TICKERS
+from feature_engineering.structured_features import process_structured_and_build_features
+from modeling.explain import generate_shap_values, model_inputs
+from modeling.registry import ModelRegistry
+from modeling.shap_store import ShapStore
+from modeling.train import train_models
+from utils.storage import get_store
+from benchmarks.fakes import synthetic_bars
+
+START, END, NEXT = "2020-01-01", "2025-01-01", "2025-01-02"
+
+
+def _old_full(issuers: dict) -> float:
+    """What explain.py used to do: a new explainer and an Explanation over every row."""
+    store, registry = get_store(), ModelRegistry()
+    t0 = time.perf_counter()
+    for t in issuers:
+        model = registry.load_model(t)
+        X = model_inputs(store.read_series("features", t), t, model)
+        shap.TreeExplainer(model)(X)
+    return time.perf_counter() - t0
+
+
+def main(n_issuers: int = 10):
+    store = get_store()
+    issuers = {f"SYN{i:04d}.NS": f"Synthetic {i}" for i in range(n_issuers)}
+    tickers = list(issuers) + list(SECTOR_ETFS) + list(MACRO_TICKERS) + list(COMMODITY_TICKERS)
+    for t in tickers:
+        store.write_series("prices", t, synthetic_bars(t, START, END))
+    process_structured_and_build_features(issuers, mode="full")
+    train_models(issuers, max_workers=1)
+    rows = len(store.read_series("features", next(iter(issuers))))
+    print(f"{n_issuers} issuers, {rows} feature rows each")
+
+    old = _old_full(issuers)
+    t0 = time.perf_counter()
+    full = generate_shap_values(issuers, mode="full")
+    full_s = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    generate_shap_values(issuers)
+    noop_s = time.perf_counter() - t0
+
+    # One new trading day with the model unchanged (as between retrains)
+    for t in tickers:
+        bars = synthetic_bars(t, START, NEXT)
+        store.append_series("prices", t, bars.iloc[len(bars) - 1:])
+    process_structured_and_build_features(issuers)
+    t0 = time.perf_counter()
+    inc = generate_shap_values(issuers)
+    inc_s = time.perf_counter() - t0
+
+    t = next(iter(issuers))
+    values, index, meta = ShapStore().read(t)
+    X = model_inputs(store.read_series("features", t), t, ModelRegistry().load_model(t))
+    ref = shap.TreeExplainer(ModelRegistry().load_model(t)).shap_values(X)
+    size = sum(p.stat().st_size for p in ShapStore().path(t).iterdir())
+
+    print(f"  old full explain (Explanation objects) {old:6.2f}s")
+    print(f"  full explain into the store            {full_s:6.2f}s ({sum(r['rows'] for r in full.values())} rows)")
+    print(f"  rerun, nothing new                     {noop_s:6.2f}s")
+    print(f"  one new day, incremental               {inc_s:6.2f}s ({sum(r['rows'] for r in inc.values())} rows, "
+          f"{full_s / inc_s:.0f}x faster than full)")
+    print(f"  {t}: {len(values)} rows stored, {size / 1024:.0f} KiB, last {index[-1].date()}, "
+          f"max |diff| vs a fresh full explain {np.abs(values - ref).max():.2e}")
+
+    # A retrain (new model version) recomputes the stored rows
+    train_models(issuers, max_workers=1, force=True)
+    t0 = time.perf_counter()
+    after = generate_shap_values(issuers)
+    print(f"  after a retrain: modes {sorted({r['mode'] for r in after.values()})} in {time.perf_counter() - t0:.2f}s")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10)
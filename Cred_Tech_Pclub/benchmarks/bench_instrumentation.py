@@ -0,0 +1,76 @@
+"""
+Cost of the instrumentation: a bare timed span and counter, a memory-sampled
+span, and a cold pipeline run (fake ingestion, see bench_pipeline_dag) without
+and with --profile. Prints the slowest spans from the JSON metrics log and the
+start of the Prometheus file.
+
+    python -m benchmarks.bench_instrumentation [n_issuers]
+"""
+import os
+import sys
+import tempfile
+
+os.environ.setdefault("CREDTECH_DATA_DIR", tempfile.mkdtemp(prefix="credtech_metrics_"))
+os.environ.setdefault("CREDTECH_MODELS_DIR", tempfile.mkdtemp(prefix="credtech_metrics_models_"))
+
+import json
+import time
+from config import ISSUERS, PIPELINE_STATE_PATH, METRICS_LOG_PATH, PROFILE_DIR, DATA_DIR
+from utils import metrics
+from utils.dag import DagRunner
+from benchmarks.bench_pipeline_dag import _stages, _reset
+
+
+def _per_call(fn, n: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - t0) / n
+
+
+def _span():
+    with metrics.timed("bench.span", stage="bench"):
+        pass
+
+
+def _sampled_span():
+    with metrics.timed("bench.sampled", memory=True, stage="bench"):
+        pass
+
+
+def main(n_issuers: int = 5):
+    ISSUERS.clear()
+    ISSUERS.update({f"SYN{i:04d}.NS": f"Synthetic {i}" for i in range(n_issuers)})
+
+    print(f"  timed span          {_per_call(_span, 20000) * 1e6:8.1f} us")
+    print(f"  count()             {_per_call(lambda: metrics.count('bench.rows', 10, stage='bench'), 100000) * 1e6:8.1f} us")
+    print(f"  memory-sampled span {_per_call(_sampled_span, 500) * 1e6:8.1f} us")
+
+    walls = {}
+    # The first run pays one-off import and warm-up costs and is not reported
+    for label, profile_dir in (("warm-up", None), ("plain", None), ("--profile", PROFILE_DIR)):
+        _reset()
+        metrics.reset()
+        started = time.time()
+        t0 = time.perf_counter()
+        DagRunner(_stages(0.0, 0), PIPELINE_STATE_PATH, max_workers=1, profile_dir=profile_dir).run()
+        walls[label] = time.perf_counter() - t0
+    print(f"{n_issuers} issuers, cold pipeline run (stages one at a time): plain {walls['plain']:.2f}s, "
+          f"--profile {walls['--profile']:.2f}s ({walls['--profile'] / walls['plain'] - 1:+.0%})")
+
+    spans = [json.loads(line) for line in open(METRICS_LOG_PATH)]
+    spans = [s for s in spans if s.get("event") == "span" and s["ts"] >= started]
+    print("slowest spans of the profiled run:")
+    for s in sorted(spans, key=lambda s: -s["seconds"])[:8]:
+        labels = {k: v for k, v in s.items() if k not in ("ts", "pid", "event", "name", "seconds", "ok")}
+        print(f"  {s['name']:22s} {s['seconds']:8.2f}s  {labels}")
+    print(f"profiles: {sorted(p.name for p in PROFILE_DIR.iterdir())}")
+
+    text = metrics.write_prometheus(DATA_DIR / "metrics.prom").read_text()
+    print(f"Prometheus file ({len(text.splitlines())} lines):")
+    print("  " + "\n  ".join(line for line in text.splitlines() if "stage" in line and "_sum" in line
+                              or line.startswith("credtech_cache") or line.startswith("credtech_rows"))[:2000])
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
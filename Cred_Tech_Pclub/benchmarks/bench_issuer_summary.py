@@ -0,0 +1,68 @@
+"""
+What the dashboard reads on a rerun to show the sidebar alerts, the headline
+metrics and the comparison snapshot: every issuer's full feature history (as
+before) vs the issuer summary table. Also times building the summary, and
+checks both give the same numbers.
+
+    python -m benchmarks.bench_issuer_summary [n_issuers] [start_year]
+"""
+import os
+import sys
+import tempfile
+
+os.environ.setdefault("CREDTECH_DATA_DIR", tempfile.mkdtemp(prefix="credtech_summary_"))
+os.environ.setdefault("CREDTECH_MODELS_DIR", tempfile.mkdtemp(prefix="credtech_summary_models_"))
+
+import time
+import numpy as np
+from config import ISSUERS, SECTOR_ETFS, MACRO_TICKERS, COMMODITY_TICKERS
+from feature_engineering.structured_features import process_structured_and_build_features
+from modeling.summary import build_issuer_summary, load_issuer_summary, summarize_issuer
+from utils.storage import get_store
+from benchmarks.fakes import synthetic_bars
+
+
+def _old_rerun(tickers: list) -> dict:
+    """The previous dashboard: full features of every issuer, then the last rows."""
+    out = {}
+    for t in tickers:
+        d = get_store().read_series("features", t)
+        out[t] = summarize_issuer(t, d)
+    return out
+
+
+def main(n_issuers: int = 200, start_year: int = 2015):
+    store = get_store()
+    ISSUERS.clear()
+    ISSUERS.update({f"SYN{i:04d}.NS": f"Synthetic {i}" for i in range(n_issuers)})
+    for t in list(ISSUERS) + list(SECTOR_ETFS) + list(MACRO_TICKERS) + list(COMMODITY_TICKERS):
+        store.write_series("prices", t, synthetic_bars(t, f"{start_year}-01-01", "2025-01-01"))
+    process_structured_and_build_features(mode="full")
+    tickers = list(ISSUERS)
+    feature_bytes = sum(p.stat().st_size for t in tickers for p in store.series_path("features", t).rglob("*"))
+
+    t0 = time.perf_counter()
+    old = _old_rerun(tickers)
+    t_old = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    path = build_issuer_summary()
+    t_build = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    summary = load_issuer_summary()
+    moves = summary["delta"]
+    alerts = moves[moves.abs() >= 3.0]
+    t_new = time.perf_counter() - t0
+
+    same = all(np.isclose(old[t][k], summary.loc[t, k]) for t in tickers
+               for k in ("credit_score", "delta", "volatility_30d", "avg_sentiment_score"))
+    print(f"{n_issuers} issuers, features since {start_year} ({feature_bytes / 2**20:.1f} MiB on disk)")
+    print(f"  dashboard rerun, all feature histories  {t_old * 1000:9.1f} ms")
+    print(f"  dashboard rerun, summary table          {t_new * 1000:9.1f} ms  ({path.stat().st_size / 1024:.1f} KiB)")
+    print(f"  building the summary (pipeline stage)   {t_build * 1000:9.1f} ms")
+    print(f"  same values: {same}; {len(alerts)} alerts")
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:3]))
@@ -0,0 +1,64 @@
+"""
+News ingestion against a local NewsAPI stand-in server with simulated latency.
+Reports wall time and how many TCP connections the client opened.
+
+    python -m benchmarks.bench_news_ingest
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from data_ingestion.news_ingestor import _from_newsapi
+
+ISSUERS = {f"SYN{i:03d}.NS": f"Synthetic Issuer {i}" for i in range(500)}
+ARTICLES_PER_ISSUER = 120     # > pageSize so pagination is exercised
+LATENCY = 0.03
+
+
+class _NewsHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"       # keep-alive, so pooled connections are reused
+    connections = set()
+    requests = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        qs = parse_qs(urlparse(self.path).query)
+        page, size = int(qs["page"][0]), int(qs["pageSize"][0])
+        name = qs["q"][0].strip('"')
+        with self.lock:
+            type(self).connections.add(self.client_address)
+            type(self).requests += 1
+        time.sleep(LATENCY)
+        lo, hi = (page - 1) * size, min(page * size, ARTICLES_PER_ISSUER)
+        articles = [{"publishedAt": "2025-01-02T10:00:00Z", "title": f"{name} headline {i}",
+                     "source": {"name": "Local"}} for i in range(lo, hi)]
+        body = json.dumps({"status": "ok", "totalResults": ARTICLES_PER_ISSUER, "articles": articles}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def main():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _NewsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/v2/everything"
+    try:
+        for workers in [1, 4, 16, 32]:
+            _NewsHandler.connections, _NewsHandler.requests = set(), 0
+            t0 = time.perf_counter()
+            df = _from_newsapi(ISSUERS, url=url, max_workers=workers)
+            dt = time.perf_counter() - t0
+            print(f"workers={workers:<3} rows={len(df):<6} requests={_NewsHandler.requests:<5} "
+                  f"connections={len(_NewsHandler.connections):<3} wall={dt:.2f}s")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Sequential vs process-pool training for synthetic issuers. Sequential uses one
+process with every core given to LightGBM (the old n_jobs=-1 loop); parallel
+splits the cores between worker processes. One issuer without features checks
+that a failure stays isolated.
+
+    python -m benchmarks.bench_parallel_train [n_issuers] [workers]
+"""
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("CREDTECH_DATA_DIR", tempfile.mkdtemp(prefix="credtech_train_"))
+os.environ.setdefault("CREDTECH_MODELS_DIR", tempfile.mkdtemp(prefix="credtech_train_models_"))
+
+from config import SECTOR_ETFS, MACRO_TICKERS, COMMODITY_TICKERS
+from feature_engineering.structured_features import process_structured_and_build_features
+from modeling.train import train_models, _available_cores
+from utils.storage import get_store
+from benchmarks.fakes import synthetic_bars
+
+START, END = "2018-01-01", "2025-01-01"
+
+
+def main(n_issuers: int = 50, workers: int = 0):
+    store = get_store()
+    issuers = {f"SYN{i:04d}.NS": f"Synthetic {i}" for i in range(n_issuers)}
+    for t in list(issuers) + list(SECTOR_ETFS) + list(MACRO_TICKERS) + list(COMMODITY_TICKERS):
+        store.write_series("prices", t, synthetic_bars(t, START, END))
+    process_structured_and_build_features(issuers, mode="full")
+    tickers = list(issuers) + ["MISSING.NS"]
+
+    t0 = time.perf_counter()
+    seq = train_models(tickers, max_workers=1)
+    before = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    par = train_models(tickers, max_workers=workers)
+    after = time.perf_counter() - t0
+
+    ok = [t for t in issuers if "error" not in par[t]]
+    drift = max(abs(seq[t]["rmse"] - par[t]["rmse"]) for t in ok)
+    print(f"{n_issuers} issuers on {_available_cores()} core(s)")
+    print(f"  sequential: {before:.1f}s   parallel: {after:.1f}s   speedup={before / after:.2f}x")
+    print(f"  trained {len(ok)}/{n_issuers}; MISSING.NS -> {par['MISSING.NS'].get('error', 'no error?')[:60]}")
+    print(f"  max |RMSE seq - RMSE par| = {drift:.2e}")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(int(args[0]) if args else 50, int(args[1]) if len(args) > 1 else 0)
@@ -0,0 +1,97 @@
+"""
+The old linear main.run_pipeline (every stage, one after another, every time)
+vs the DAG runner: a cold run, a rerun with nothing new, and a rerun after one
+new daily bar. Ingestion goes to local fakes; ``latency`` is paid per download
+request and once for the news fetch, standing in for the network time that
+prices and news/sentiment now overlap.
+
+    python -m benchmarks.bench_pipeline_dag [n_issuers] [latency_seconds]
+"""
+import os
+import sys
+import tempfile
+
+os.environ.setdefault("CREDTECH_DATA_DIR", tempfile.mkdtemp(prefix="credtech_dag_"))
+os.environ.setdefault("CREDTECH_MODELS_DIR", tempfile.mkdtemp(prefix="credtech_dag_models_"))
+
+import shutil
+import time
+from functools import partial
+import pandas as pd
+from config import ISSUERS, TODAY, DATA_DIR, MODELS_DIR, RAW_DATA_DIR, PROCESSED_DATA_DIR, PIPELINE_STATE_PATH
+from data_ingestion.yfinance_ingestor import fetch_yfinance_data
+from utils.dag import DagRunner, format_summary
+from utils.storage import get_store
+from benchmarks.fakes import CountingDownloader, synthetic_headlines
+
+
+def _fake_news(latency: float):
+    time.sleep(latency)
+    rows = []
+    for i, t in enumerate(ISSUERS):
+        for j, title in enumerate(synthetic_headlines(20, seed=i)):
+            rows.append({"ticker": t, "date": str(pd.Timestamp("2024-06-01") + pd.Timedelta(days=j))[:10],
+                         "title": title, "source": "synthetic"})
+    get_store().write_table("news", pd.DataFrame(rows))
+
+
+def _downloader(latency: float, lag_days: int):
+    """The fake source, ``lag_days`` business days behind today."""
+    fake = CountingDownloader(latency=latency)
+    cutoff = (pd.Timestamp(TODAY) - pd.offsets.BDay(lag_days)).strftime("%Y-%m-%d")
+    return lambda tickers, start=None, end=None, **kw: fake(tickers, start, min(end or cutoff, cutoff), **kw)
+
+
+def _stages(latency: float, lag_days: int) -> list:
+    from main import pipeline_stages
+    stages = pipeline_stages()
+    fakes = {"prices": partial(fetch_yfinance_data, downloader=_downloader(latency, lag_days)),
+             "news": partial(_fake_news, latency)}
+    for s in stages:
+        s.fn = fakes.get(s.name, s.fn)
+    return stages
+
+
+def _reset():
+    for d in (RAW_DATA_DIR, PROCESSED_DATA_DIR, MODELS_DIR):
+        shutil.rmtree(d, ignore_errors=True)
+        d.mkdir(parents=True)
+    PIPELINE_STATE_PATH.unlink(missing_ok=True)
+
+
+def main(n_issuers: int = 10, latency: float = 0.5):
+    # Every stage reads the universe from config.ISSUERS
+    ISSUERS.clear()
+    ISSUERS.update({f"SYN{i:04d}.NS": f"Synthetic {i}" for i in range(n_issuers)})
+    rows = {}
+
+    # The third run sees one more business day than the first two
+    runs = (("cold", 1), ("nothing new", 1), ("one new bar", 0))
+    _reset()
+    for label, lag in runs:
+        t0 = time.perf_counter()
+        for s in _stages(latency, lag):
+            try:
+                s.fn()
+            except Exception as e:
+                print(f"  linear {label}: {s.name} failed: {e}")
+        rows.setdefault(label, {})["linear"] = time.perf_counter() - t0
+
+    _reset()
+    for label, lag in runs:
+        t0 = time.perf_counter()
+        results = DagRunner(_stages(latency, lag), PIPELINE_STATE_PATH).run()
+        rows[label]["dag"] = time.perf_counter() - t0
+        rows[label]["summary"] = format_summary(results)
+
+    print(f"{n_issuers} issuers, {latency:.1f}s simulated latency per download / news fetch, {os.cpu_count()} core(s)")
+    print(f"  {'run':14s} {'linear':>9s} {'dag':>9s}")
+    for label, r in rows.items():
+        print(f"  {label:14s} {r['linear']:8.2f}s {r['dag']:8.2f}s")
+    for label, r in rows.items():
+        print(f"\n[{label}]\n{r['summary']}")
+    print(f"\n(data in {DATA_DIR})")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10, float(sys.argv[2]) if len(sys.argv) > 2 else 0.5)
@@ -0,0 +1,91 @@
+"""
+Per-issuer models vs one pooled model: training time, peak memory (each mode
+trains in a fresh process), artifact size and per-issuer test RMSE.
+
+    python -m benchmarks.bench_pooled_model [n_issuers]
+"""
+import os
+import sys
+import tempfile
+import multiprocessing as mp
+
+os.environ.setdefault("CREDTECH_DATA_DIR", tempfile.mkdtemp(prefix="credtech_pooled_"))
+os.environ.setdefault("CREDTECH_MODELS_DIR", tempfile.mkdtemp(prefix="credtech_pooled_models_"))
+
+import resource
+import time
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+START, END = "2018-01-01", "2025-01-01"
+
+
+def _issuers(n: int) -> dict:
+    return {f"SYN{i:04d}.NS": f"Synthetic {i}" for i in range(n)}
+
+
+def _train(mode: str, n: int, out):
+    from modeling.train import train_models
+    t0 = time.perf_counter()
+    res = train_models(_issuers(n), max_workers=1, force=True, mode=mode)
+    took = time.perf_counter() - t0
+    out.put({"seconds": took, "rss_mib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+             "results": res})
+
+
+def _run(mode: str, n: int) -> dict:
+    ctx = mp.get_context("spawn")
+    q = ctx.Queue()
+    p = ctx.Process(target=_train, args=(mode, n, q))
+    p.start()
+    out = q.get()
+    p.join()
+    return out
+
+
+def main(n: int = 50):
+    from config import SECTOR_ETFS, MACRO_TICKERS, COMMODITY_TICKERS
+    from feature_engineering.structured_features import process_structured_and_build_features
+    from modeling.pooled import predict_pooled
+    from modeling.registry import ModelRegistry, POOLED_KEY
+    from utils.storage import get_store
+    from benchmarks.fakes import synthetic_bars
+
+    store = get_store()
+    issuers = _issuers(n)
+    for t in list(issuers) + list(SECTOR_ETFS) + list(MACRO_TICKERS) + list(COMMODITY_TICKERS):
+        store.write_series("prices", t, synthetic_bars(t, START, END))
+    process_structured_and_build_features(issuers, mode="full")
+
+    per = _run("per_issuer", n)
+    pooled = _run("pooled", n)
+    per_rmse = pd.Series({t: r["rmse"] for t, r in per["results"].items()})
+    pooled_rmse = pd.Series(pooled["results"][POOLED_KEY]["issuer_rmse"])
+    sizes = {"per_issuer": sum(Path(r["path"]).stat().st_size for r in per["results"].values()),
+             "pooled": Path(pooled["results"][POOLED_KEY]["path"]).stat().st_size}
+
+    print(f"{n} issuers            per-issuer      pooled")
+    print(f"  training time     {per['seconds']:9.1f}s  {pooled['seconds']:9.1f}s")
+    print(f"  peak RSS          {per['rss_mib']:8.0f}MiB {pooled['rss_mib']:8.0f}MiB")
+    print(f"  artifacts         {sizes['per_issuer'] / 2**20:8.1f}MiB {sizes['pooled'] / 2**20:8.1f}MiB  "
+          f"({n} files vs 1)")
+    print(f"  RMSE mean         {per_rmse.mean():10.4f}  {pooled_rmse.mean():10.4f}")
+    print(f"  RMSE median       {per_rmse.median():10.4f}  {pooled_rmse.median():10.4f}")
+    diff = (pooled_rmse - per_rmse).dropna()
+    print(f"  pooled better on {(diff < 0).sum()}/{len(diff)} issuers; worst pooled gap {diff.max():+.4f}")
+
+    # Serving: any issuer, including one the pooled model never saw
+    model = ModelRegistry().load_model(POOLED_KEY)
+    t = next(iter(issuers))
+    pred = predict_pooled(t, store.read_series("features", t), model)
+    new = synthetic_bars("NEWCO.NS", START, END)
+    store.write_series("prices", "NEWCO.NS", new)
+    process_structured_and_build_features({"NEWCO.NS": "New issuer"}, mode="full")
+    unseen = predict_pooled("NEWCO.NS", store.read_series("features", "NEWCO.NS"), model)
+    print(f"  served {len(pred)} rows for {t} and {len(unseen)} rows for unseen NEWCO.NS "
+          f"(finite: {np.isfinite(unseen).all()})")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
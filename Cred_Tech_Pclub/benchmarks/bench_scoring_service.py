@@ -0,0 +1,134 @@
+"""
+Load test of the scoring service: p50/p99 latency and throughput over HTTP with
+concurrent keep-alive clients, for per-issuer and pooled models and with and
+without the micro-batch wait. "latest" requests are served from the result
+cache once warm; "what-if" requests carry a random sentiment override, so
+every one of them is scored. The cold path (load the model, read the features
+and build an explainer per request, as a one-off script would) is the baseline.
+
+    python -m benchmarks.bench_scoring_service [n_issuers] [clients] [requests]
+"""
+import os
+import sys
+import tempfile
+
+os.environ.setdefault("CREDTECH_DATA_DIR", tempfile.mkdtemp(prefix="credtech_serve_"))
+os.environ.setdefault("CREDTECH_MODELS_DIR", tempfile.mkdtemp(prefix="credtech_serve_models_"))
+
+import http.client
+import json
+import random
+import threading
+import time
+import numpy as np
+import shap
+from config import SECTOR_ETFS, MACRO_TICKERS, COMMODITY_TICKERS
+from feature_engineering.structured_features import process_structured_and_build_features
+from modeling.explain import model_inputs
+from modeling.registry import ModelRegistry
+from modeling.scorer import Scorer
+from modeling.train import train_models
+from serve import make_server
+from utils.storage import get_store
+from benchmarks.fakes import synthetic_bars
+
+START, END = "2020-01-01", "2025-01-01"
+
+
+def _cold(tickers: list) -> list:
+    lat = []
+    for t in tickers:
+        t0 = time.perf_counter()
+        model = ModelRegistry().load_model(t, mode="per_issuer")
+        X = model_inputs(get_store().read_series("features", t).iloc[[-1]], t, model, pooled=False)
+        model.predict(X)
+        shap.TreeExplainer(model).shap_values(X)
+        lat.append(time.perf_counter() - t0)
+    return lat
+
+
+def _load(port: int, tickers: list, clients: int, n_requests: int, what_if: bool = False) -> tuple:
+    lat, errors = [], []
+    per_client = n_requests // clients
+
+    def client(seed: int):
+        rng = random.Random(seed)
+        conn = http.client.HTTPConnection("127.0.0.1", port)
+        for _ in range(per_client):
+            t0 = time.perf_counter()
+            if what_if:
+                body = json.dumps({"ticker": rng.choice(tickers),
+                                   "features": {"avg_sentiment_score": rng.uniform(-1, 1)}})
+                conn.request("POST", "/score", body, {"Content-Type": "application/json"})
+            else:
+                conn.request("GET", f"/score?ticker={rng.choice(tickers)}")
+            resp = conn.getresponse()
+            body = json.loads(resp.read())
+            lat.append(time.perf_counter() - t0)
+            if resp.status != 200:
+                errors.append(body)
+        conn.close()
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    t0 = time.perf_counter()
+    for th in threads:
+        th.start()
+    for th in threads:
+        th.join()
+    return lat, errors, time.perf_counter() - t0
+
+
+def _report(name: str, lat: list, took: float = None, extra: str = ""):
+    ms = np.array(lat) * 1000
+    rate = f", {len(lat) / took:6.0f} req/s" if took else ""
+    print(f"  {name:34s} p50 {np.percentile(ms, 50):7.2f} ms  p99 {np.percentile(ms, 99):7.2f} ms{rate}{extra}")
+
+
+def main(n_issuers: int = 20, clients: int = 8, n_requests: int = 4000):
+    store = get_store()
+    issuers = {f"SYN{i:04d}.NS": f"Synthetic {i}" for i in range(n_issuers)}
+    for t in list(issuers) + list(SECTOR_ETFS) + list(MACRO_TICKERS) + list(COMMODITY_TICKERS):
+        store.write_series("prices", t, synthetic_bars(t, START, END))
+    process_structured_and_build_features(issuers, mode="full")
+    train_models(issuers, max_workers=1, mode="per_issuer")
+    train_models(issuers, mode="pooled")
+    tickers = list(issuers)
+    print(f"{n_issuers} issuers, {clients} clients, {n_requests} requests each run")
+
+    _report("cold path (per request)", _cold(tickers[:20]))
+    for mode in ("per_issuer", "pooled"):
+        for what_if, window in ((False, 2.0), (True, 0.0), (True, 2.0)):
+            scorer = Scorer(batch_window_ms=window, mode=mode)
+            server = make_server(port=0, scorer=scorer)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            port = server.server_address[1]
+            _load(port, tickers, clients, 4 * len(tickers))   # warm the caches
+            scorer.stats.update(requests=0, batches=0)
+            lat, errors, took = _load(port, tickers, clients, n_requests, what_if)
+            server.shutdown()
+            scorer.close()
+            _report(f"{mode}, {'what-if' if what_if else 'latest'}, wait {window:.0f} ms", lat, took,
+                    f", {scorer.stats['requests'] / max(scorer.stats['batches'], 1):.1f} req/batch"
+                    f"{f', {len(errors)} errors' if errors else ''}")
+
+    t = tickers[0]
+    features = store.read_series("features", t)
+    for mode in ("per_issuer", "pooled"):
+        scorer = Scorer(mode=mode)
+        base = scorer.score(t)
+        top = next(iter(base["contributions"]))
+        col = top if top in features.columns else f"{t.replace('.', '_')}_{top}"
+        shocked = scorer.score(t, {col: features[col].min()})
+        print(f"  {mode}: {t} on {base['date']}: score {base['score']:.2f}; with {col} at its historical min "
+              f"{shocked['score']:.2f}")
+    print("   " + "\n   ".join(base["drivers"]))
+    base = Scorer(mode="per_issuer").score(t)
+    model = ModelRegistry().load_model(t, mode="per_issuer")
+    X = model_inputs(features.iloc[[-1]], t, model, pooled=False)
+    ref = dict(zip(X.columns, shap.TreeExplainer(model).shap_values(X)[0]))
+    print(f"  matches model.predict: {abs(base['score'] - model.predict(X)[0]) < 1e-6}, max |SHAP diff| vs "
+          f"TreeExplainer {max(abs(v - ref[k]) for k, v in base['contributions'].items()):.1e}")
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:4]))
@@ -0,0 +1,65 @@
+"""
+Headline scoring with and without the persistent sentiment cache: a cold run
+over the full news history, then a daily run where only a small share of the
+headlines is new. The scorer stands in for FinBERT at a fixed cost per headline.
+
+    python -m benchmarks.bench_sentiment_cache [n_headlines] [new_share] [ms_per_headline]
+"""
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+os.environ.setdefault("CREDTECH_DATA_DIR", tempfile.mkdtemp(prefix="credtech_sentcache_"))
+
+from feature_engineering.sentiment_cache import SentimentCache
+from benchmarks.fakes import synthetic_headlines, CountingScorer
+
+
+def main(n: int = 20000, new_share: float = 0.05, ms: float = 0.5):
+    path = Path(tempfile.mkdtemp(prefix="credtech_sentcache_")) / "cache.sqlite"
+    history = synthetic_headlines(n, seed=1)
+    n_new = int(n * new_share)
+    # Next day: the oldest headlines roll off, fresh ones arrive; some repeat across issuers
+    today = history[n_new:] + synthetic_headlines(n_new, seed=2)
+    today += today[:n // 10]
+    model = "stub-finbert@test"
+
+    scorer = CountingScorer(ms / 1000)
+    t0 = time.perf_counter()
+    uncached = scorer(today)
+    base = time.perf_counter() - t0
+    print(f"no cache   : {len(today)} headlines, {len(scorer.scored)} scored, {base:.2f}s")
+
+    cache = SentimentCache(path, max_entries=2 * n)
+    warm = CountingScorer(ms / 1000)
+    t0 = time.perf_counter()
+    cache.score(history, warm, model)
+    print(f"cold cache : {len(history)} headlines, {len(warm.scored)} scored, {time.perf_counter() - t0:.2f}s")
+
+    daily = CountingScorer(ms / 1000)
+    t0 = time.perf_counter()
+    cached = cache.score(today, daily, model)
+    took = time.perf_counter() - t0
+    print(f"daily delta: {len(today)} headlines, {len(daily.scored)} scored, {took:.2f}s "
+          f"({base / took:.1f}x vs no cache)")
+    assert len(daily.scored) == n_new
+    assert cached == uncached, "cached scores differ from fresh scores"
+
+    # Same text under another model id is a miss; a tight limit evicts the least recently used
+    other = CountingScorer()
+    cache.score(today[:100], other, "stub-finbert@other")
+    assert len(other.scored) == 100
+    small = SentimentCache(path.with_name("small.sqlite"), max_entries=1000)
+    small.score(history[:1500], CountingScorer(), model)
+    assert len(small) == 1000
+    print(f"cache file : {path.stat().st_size / 2**20:.1f} MiB for {len(cache)} entries")
+    cache.close()
+    small.close()
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(int(args[0]) if args else 20000, float(args[1]) if len(args) > 1 else 0.05,
+         float(args[2]) if len(args) > 2 else 0.5)
@@ -0,0 +1,67 @@
+"""
+Sentiment inference: load-per-call and input-order batches (what the old
+pipeline call did) vs the long-lived SentimentEngine with length-sorted dynamic
+batches. A stub backend models load time and per-token forward cost, so this
+runs without torch; pass --real to time the configured FinBERT instead.
+
+    python -m benchmarks.bench_sentiment_engine [n_headlines] [runs] [--real]
+"""
+import sys
+import time
+from functools import partial
+
+import numpy as np
+
+from config import FINBERT_MODEL_NAME, SENTIMENT_BATCH_SIZE
+from feature_engineering.sentiment_engine import SentimentEngine, TransformersBackend, LABEL_VALUES
+from benchmarks.fakes import synthetic_headlines, StubSentimentBackend
+
+
+def _headlines(n: int) -> list:
+    # Realistic spread of lengths: short tickers-and-verbs up to long wire headlines
+    rng = np.random.default_rng(7)
+    base = synthetic_headlines(n, seed=3)
+    return [" ".join([h] * int(k)) for h, k in zip(base, rng.integers(1, 8, n))]
+
+
+def _naive(factory, model_name: str, texts: list) -> list:
+    backend = factory(model_name)
+    ids = backend.tokenize(texts)
+    scores = []
+    for i in range(0, len(ids), SENTIMENT_BATCH_SIZE):
+        for label, prob in backend.predict(ids[i:i + SENTIMENT_BATCH_SIZE]):
+            scores.append(LABEL_VALUES.get(label, 0.0) * prob)
+    return scores, backend
+
+
+def main(n: int = 5000, runs: int = 3, real: bool = False):
+    texts = _headlines(n)
+    if real:
+        factory = TransformersBackend
+    else:
+        factory = partial(StubSentimentBackend, load_seconds=0.5, call_seconds=0.002, token_seconds=2e-6)
+
+    t0 = time.perf_counter()
+    for _ in range(runs):
+        naive, backend = _naive(factory, FINBERT_MODEL_NAME, texts)
+    before = time.perf_counter() - t0
+    naive_tokens = getattr(backend, "padded_tokens", None)
+
+    engine = SentimentEngine(FINBERT_MODEL_NAME, backend_factory=factory)
+    t0 = time.perf_counter()
+    for _ in range(runs):
+        scores = engine.score(texts)
+    after = time.perf_counter() - t0
+
+    print(f"{runs} runs x {n} headlines")
+    print(f"  load per call, input order: {before:.2f}s ({runs * n / before:.0f} headlines/s)")
+    print(f"  engine, length-sorted     : {after:.2f}s ({runs * n / after:.0f} headlines/s, "
+          f"{engine.last_stats['batches']} batches/run)  speedup={before / after:.1f}x")
+    if naive_tokens is not None:
+        print(f"  padded tokens per run     : {naive_tokens} -> {engine.backend.padded_tokens // runs}")
+    assert np.allclose(scores, naive), "batching changed the scores"
+
+
+if __name__ == "__main__":
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    main(int(args[0]) if args else 5000, int(args[1]) if len(args) > 1 else 3, "--real" in sys.argv)
@@ -0,0 +1,55 @@
+"""
+FinBERT + BERT + VADER ensemble: every model on every headline, one after
+another, vs EnsembleScorer (VADER streamed on a thread, confident headlines
+skipping the transformers, shared tokenization). Stub models stand in for the
+transformers and VADER so the numbers reflect the scheduling, not the hardware.
+
+    python -m benchmarks.bench_sentiment_ensemble [n_headlines] [skip_threshold]
+"""
+import sys
+import time
+from functools import partial
+
+from config import NLP_WEIGHTS
+from feature_engineering.sentiment_engine import SentimentEngine
+from feature_engineering.sentiment_ensemble import EnsembleScorer
+from benchmarks.fakes import synthetic_headlines, CountingScorer, StubSentimentBackend
+
+
+def main(n: int = 5000, threshold: float = 0.6):
+    texts = synthetic_headlines(n, seed=5)
+    backend = partial(StubSentimentBackend, call_seconds=0.002, token_seconds=2e-6)
+    engines = {"finbert": SentimentEngine("stub-finbert", backend), "bert": SentimentEngine("stub-bert", backend)}
+    for e in engines.values():
+        e.backend  # load outside the timed runs
+    vader = CountingScorer(latency=5e-5)
+
+    t0 = time.perf_counter()
+    v = vader(texts)
+    fin, bert = engines["finbert"].score(texts), engines["bert"].score(texts)
+    w = NLP_WEIGHTS
+    naive = [(w["vader"] * a + w["finbert"] * b + w["bert"] * c) / sum(w.values()) for a, b, c in zip(v, fin, bert)]
+    before = time.perf_counter() - t0
+
+    full = EnsembleScorer(engines, vader, skip_threshold=None)
+    t0 = time.perf_counter()
+    same = full(texts)
+    pipelined = time.perf_counter() - t0
+    assert max(abs(a - b) for a, b in zip(same, naive)) < 1e-12, "ensemble math differs"
+
+    skipping = EnsembleScorer(engines, vader, skip_threshold=threshold)
+    t0 = time.perf_counter()
+    skipping(texts)
+    after = time.perf_counter() - t0
+
+    lat = ", ".join(f"{k}={s:.2f}s" for k, s in skipping.last_stats["latency"].items())
+    print(f"{n} headlines")
+    print(f"  sequential, all models      : {before:.2f}s")
+    print(f"  streamed, no skipping       : {pipelined:.2f}s")
+    print(f"  streamed, skip |vader|>={threshold}: {after:.2f}s  speedup={before / after:.1f}x")
+    print(f"  skipped {skipping.last_stats['skipped']:.0%} of headlines; per-model time {lat}")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(int(args[0]) if args else 5000, float(args[1]) if len(args) > 1 else 0.6)
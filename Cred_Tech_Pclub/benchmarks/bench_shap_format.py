@@ -0,0 +1,137 @@
+"""
+SHAP artifact formats as the dashboard uses them (open an issuer, show one
+day's waterfall): the pickled Explanation bundle explain.py used to write vs
+the memory-mapped float32 store. Each load runs in a fresh process so peak RSS
+is comparable.
+
+    python -m benchmarks.bench_shap_format [start_year]
+"""
+import os
+import sys
+import tempfile
+import multiprocessing as mp
+
+os.environ.setdefault("CREDTECH_DATA_DIR", tempfile.mkdtemp(prefix="credtech_shapfmt_"))
+os.environ.setdefault("CREDTECH_MODELS_DIR", tempfile.mkdtemp(prefix="credtech_shapfmt_models_"))
+
+import time
+
+TICKER = "SYN0000.NS"
+
+
+def _rss_mib() -> float:
+    """Current resident set (peak RSS would be dominated by loading the model and features)."""
+    with open("/proc/self/status") as f:
+        return next(int(line.split()[1]) for line in f if line.startswith("VmRSS")) / 1024
+
+
+def _load_large(fmt: str, root: str, out):
+    import joblib
+    import numpy as np
+    from modeling.shap_store import ShapStore
+    base = _rss_mib()
+    t0 = time.perf_counter()
+    if fmt == "joblib":
+        row = np.asarray(joblib.load(f"{root}/large.joblib")["values"][-1].values)
+    else:
+        values, _, _ = ShapStore(root).read("LARGE")
+        row = np.asarray(values[-1])
+    out.put({"load": time.perf_counter() - t0, "row": 0.0, "rss_mib": _rss_mib() - base, "top": float(abs(row).max())})
+
+
+def _load(fmt: str, out):
+    import joblib
+    import shap  # noqa: F401  (imported before the baseline, as in the dashboard)
+    from config import MODELS_DIR
+    from modeling.explain import model_inputs
+    from modeling.registry import ModelRegistry
+    from modeling.shap_store import ShapStore, explanation
+    from utils.storage import get_store
+    model = ModelRegistry().load_model(TICKER)
+    features = get_store().read_series("features", TICKER)
+    base = _rss_mib()
+    t0 = time.perf_counter()
+    if fmt == "joblib":
+        bundle = joblib.load(MODELS_DIR / "shap_legacy.joblib")
+        t1 = time.perf_counter()
+        row = bundle["values"][len(bundle["index"]) - 1]
+    else:
+        values, index, meta = ShapStore().read(TICKER)
+        t1 = time.perf_counter()
+        row = explanation(values[len(index) - 1], meta, model_inputs(features.iloc[[-1]], TICKER, model))
+    t2 = time.perf_counter()
+    out.put({"load": t1 - t0, "row": t2 - t1, "rss_mib": _rss_mib() - base, "top": float(abs(row.values).max())})
+
+
+def _run(fmt: str, target=_load, *args) -> dict:
+    ctx = mp.get_context("spawn")
+    q = ctx.Queue()
+    p = ctx.Process(target=target, args=(fmt, *args, q))
+    p.start()
+    res = q.get()
+    p.join()
+    return res
+
+
+def main(start_year: int = 2005):
+    import joblib
+    import shap
+    from config import SECTOR_ETFS, MACRO_TICKERS, COMMODITY_TICKERS, MODELS_DIR
+    from feature_engineering.structured_features import process_structured_and_build_features
+    from modeling.explain import generate_shap_values, model_inputs
+    from modeling.registry import ModelRegistry
+    from modeling.shap_store import ShapStore
+    from modeling.train import train_models
+    from utils.storage import get_store
+    from benchmarks.fakes import synthetic_bars
+
+    store = get_store()
+    issuers = {TICKER: "Synthetic 0"}
+    for t in list(issuers) + list(SECTOR_ETFS) + list(MACRO_TICKERS) + list(COMMODITY_TICKERS):
+        store.write_series("prices", t, synthetic_bars(t, f"{start_year}-01-01", "2025-01-01"))
+    process_structured_and_build_features(issuers, mode="full")
+    train_models(issuers, max_workers=1)
+    generate_shap_values(issuers, mode="full")
+
+    # The previous format, written the way explain.py used to
+    model = ModelRegistry().load_model(TICKER)
+    X = model_inputs(store.read_series("features", TICKER), TICKER, model)
+    joblib.dump({"columns": X.columns.tolist(), "index": X.index, "values": shap.TreeExplainer(model)(X)},
+                MODELS_DIR / "shap_legacy.joblib")
+
+    sizes = {"joblib": (MODELS_DIR / "shap_legacy.joblib").stat().st_size,
+             "npy": sum(p.stat().st_size for p in ShapStore().path(TICKER).iterdir())}
+    old, new = _run("joblib"), _run("npy")
+    print(f"{len(X)} rows x {X.shape[1]} features")
+    print(f"                     joblib Explanation   memory-mapped npy")
+    print(f"  size on disk       {sizes['joblib'] / 1024:12.0f} KiB {sizes['npy'] / 1024:14.0f} KiB")
+    print(f"  load               {old['load'] * 1000:12.2f} ms  {new['load'] * 1000:14.2f} ms")
+    print(f"  one-row Explanation{old['row'] * 1000:12.2f} ms  {new['row'] * 1000:14.2f} ms")
+    print(f"  RSS added          {old['rss_mib']:12.2f} MiB {new['rss_mib']:14.2f} MiB")
+    print(f"  same row: {abs(old['top'] - new['top']) < 1e-4}")
+
+    # A larger matrix (e.g. the pooled panel of a big universe) shows how the two scale
+    import numpy as np
+    import pandas as pd
+    rows, cols = 200_000, 100
+    root = tempfile.mkdtemp(prefix="credtech_shapfmt_large_")
+    rng = np.random.default_rng(0)
+    vals = rng.standard_normal((rows, cols))
+    index = pd.bdate_range("1990-01-01", periods=rows)
+    names = [f"f{i}" for i in range(cols)]
+    joblib.dump({"columns": names, "index": index,
+                 "values": shap.Explanation(vals, base_values=np.zeros(rows), data=rng.standard_normal((rows, cols)),
+                                            feature_names=names)}, f"{root}/large.joblib")
+    ShapStore(root).write("LARGE", vals, index, {"columns": names, "base_value": 0.0})
+    del vals
+    sizes = {"joblib": os.path.getsize(f"{root}/large.joblib"),
+             "npy": sum(p.stat().st_size for p in ShapStore(root).path("LARGE").iterdir())}
+    old, new = _run("joblib", _load_large, root), _run("npy", _load_large, root)
+    print(f"{rows} rows x {cols} features (synthetic)")
+    print(f"  size on disk       {sizes['joblib'] / 2**20:12.1f} MiB {sizes['npy'] / 2**20:14.1f} MiB")
+    print(f"  load + one row     {old['load'] * 1000:12.1f} ms  {new['load'] * 1000:14.1f} ms")
+    print(f"  RSS added          {old['rss_mib']:12.1f} MiB {new['rss_mib']:14.1f} MiB")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2005)
@@ -0,0 +1,51 @@
+"""
+Load time and on-disk size of the CSV and Parquet stores for a large price universe.
+
+    python -m benchmarks.bench_storage [n_tickers]      # default 1000 tickers x 10 years
+"""
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from utils.storage import CsvStore, ParquetStore
+from benchmarks.fakes import synthetic_bars
+
+
+def _dir_size(path: Path) -> int:
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+
+
+def main(n_tickers: int = 1000):
+    tickers = [f"SYN{i:04d}.NS" for i in range(n_tickers)]
+    frames = {t: synthetic_bars(t, "2015-01-01", "2025-01-01") for t in tickers}
+    rows = sum(len(f) for f in frames.values())
+    print(f"{n_tickers} tickers, {rows} rows")
+
+    root = Path(tempfile.mkdtemp(prefix="credtech_storage_"))
+    try:
+        for store in [CsvStore(root / "csv", root / "csv"), ParquetStore(root / "parquet", root / "parquet", export_csv=False)]:
+            t0 = time.perf_counter()
+            for t, df in frames.items():
+                store.write_series("prices", t, df)
+            write = time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            for t in tickers:
+                store.read_series("prices", t)
+            read = time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            for t in tickers:
+                store.read_series("prices", t, columns=["Adj Close"], start="2024-01-01")
+            window = time.perf_counter() - t0
+
+            size = _dir_size(root / store.name)
+            print(f"{store.name:<8} write={write:6.2f}s  full read={read:6.2f}s  "
+                  f"1y/1col read={window:6.2f}s  size={size / 2**20:7.1f} MiB")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
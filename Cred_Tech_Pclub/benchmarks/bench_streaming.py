@@ -0,0 +1,146 @@
+"""
+Streaming intraday scoring: replay two days of synthetic intraday bars and
+headlines (issuers plus the sector, macro and commodity series) through the
+stream scorer.
+
+- Rescoring on every event (a round per event) as the baseline.
+- A paced replay at 10,000 events/s, in-process and over a local socket.
+- An unpaced replay.
+
+For each it reports throughput, rescorings, alerts and event-to-score latency.
+Two issuers take a 12% intraday drop on the second day, so alerts fire. It
+also checks that the close the stream applied for day one is the row the
+batch update computes from that day's last bar and headlines, with a headline
+for the checked issuer right before the day boundary (in the same rescoring
+round as the next day's first bars), and that a headline arriving ahead of an
+issuer's first bar of the next day closes the day once and counts for the new day.
+
+    python -m benchmarks.bench_streaming [n_issuers] [events_per_second] [seconds]
+"""
+import os
+import sys
+import tempfile
+
+os.environ.setdefault("CREDTECH_DATA_DIR", tempfile.mkdtemp(prefix="credtech_stream_"))
+os.environ.setdefault("CREDTECH_MODELS_DIR", tempfile.mkdtemp(prefix="credtech_stream_models_"))
+
+import time
+import numpy as np
+import pandas as pd
+from config import SECTOR_ETFS, MACRO_TICKERS, COMMODITY_TICKERS
+from data_ingestion.event_stream import paced, serve_replay, socket_events
+from feature_engineering.rolling_state import load_state, apply_new_bars
+from feature_engineering.structured_features import process_structured_and_build_features
+from analytics.alerts import AlertEngine
+from modeling.streaming import StreamScorer
+from modeling.train import train_models
+from utils.storage import get_store
+from benchmarks.fakes import synthetic_bars, synthetic_headlines, CountingScorer
+
+START, END = "2020-01-01", "2025-01-01"
+DAYS = ("2025-01-01", "2025-01-02")
+
+
+def intraday_events(issuers: list, n_events: int, seed: int = 0) -> list:
+    """Rounds of day-so-far bars for every ticker, with a headline for about 1% of issuer bars."""
+    rng = np.random.default_rng(seed)
+    tickers = issuers + list(SECTOR_ETFS) + list(MACRO_TICKERS) + list(COMMODITY_TICKERS)
+    last = {t: float(synthetic_bars(t, START, END)["Close"].iloc[-1]) for t in tickers}
+    rounds = max(n_events // (len(DAYS) * len(tickers)), 1)
+    headlines = iter(synthetic_headlines(n_events // 50 + 10, seed))
+    events = []
+    for d, day in enumerate(DAYS):
+        bars = {t: {"Open": p, "High": p, "Low": p, "Close": p, "Volume": 0} for t, p in last.items()}
+        for r in range(rounds):
+            ts = (pd.Timestamp(day) + pd.Timedelta(hours=9, minutes=15) + r * pd.Timedelta(hours=6) / rounds)
+            ts = f"{ts:%Y-%m-%dT%H:%M:%S.%f}"
+            for t in tickers:
+                if d == 1 and r == 0 and t == issuers[1]:
+                    # News of the new day ahead of the issuer's first bar of it
+                    events.append({"type": "news", "ts": ts, "ticker": t, "title": next(headlines), "source": "Bench"})
+                b = bars[t]
+                p = b["Close"] * np.exp(rng.normal(0, 0.0005))
+                if d == 1 and r == rounds // 2 and t in issuers[:2]:
+                    p *= 0.88
+                b.update(Close=p, High=max(b["High"], p), Low=min(b["Low"], p), Volume=b["Volume"] + 1000)
+                events.append({"type": "bar", "ts": ts, "ticker": t, **b, "Adj Close": p})
+                if t in issuers and (rng.random() < 0.01 or (d == 0 and r == rounds - 1 and t == issuers[0])):
+                    events.append({"type": "news", "ts": ts, "ticker": t, "title": next(headlines), "source": "Bench"})
+        last = {t: b["Close"] for t, b in bars.items()}
+    return events
+
+
+def _run(issuers: list, events, batch_ms: float, sentiment) -> tuple:
+    # A fresh in-memory alert engine, so one run's alerts do not deduplicate the next run's
+    streamer = StreamScorer(issuers, score_texts=sentiment, batch_ms=batch_ms, alerts=AlertEngine(root=None))
+    summary = streamer.run(events)
+    return streamer, summary
+
+
+def _report(label: str, s: dict):
+    print(f"  {label:34s} {s['events_per_second']:8.0f} ev/s  {s['rounds']:6d} rounds  {s['scores']:6d} scores  "
+          f"{s['alerts']:3d} alerts  latency p50 {s['latency_p50_ms']:6.1f} ms  p99 {s['latency_p99_ms']:6.1f} ms  "
+          f"max {s['latency_max_ms']:6.1f} ms")
+
+
+def _check_close(streamer: StreamScorer, events: list, sentiment: CountingScorer, t: str) -> float:
+    """Largest difference between the stream's close of day one and the batch update from its last bar."""
+    day = DAYS[0]
+    final = {}
+    for ev in events:
+        if ev["ts"].startswith(day) and ev["type"] == "bar":
+            final[ev["ticker"]] = ev
+    state = load_state(t)
+    cols = dict(streamer.bar_cols[t])
+    bars = pd.DataFrame([{c: final[t][f] for f, c in cols.items()}], index=pd.DatetimeIndex([day]))
+    ctx = {c: final[ct][f] for ct, pairs in streamer.ctx_cols.items() if ct in final for f, c in pairs}
+    titles = [ev["title"] for ev in events if ev["type"] == "news" and ev["ticker"] == t and ev["ts"].startswith(day)]
+    sent = pd.Series([np.mean(sentiment(titles)) if titles else 0.0], index=pd.DatetimeIndex([day]))
+    row = apply_new_bars(state, bars, pd.DataFrame([ctx], index=pd.DatetimeIndex([day])), sent).iloc[-1]
+    stream_row = streamer.states[t].last_row
+    return max(abs(float(row[c]) - stream_row[c]) for c in row.index if not pd.isna(row[c]))
+
+
+def _check_roll(streamer: StreamScorer, events: list, t: str) -> str:
+    """Days closed against the expected one per issuer, and issuer ``t``'s day-two headlines kept."""
+    day = DAYS[1]
+    titles = sum(ev["type"] == "news" and ev["ticker"] == t and ev["ts"].startswith(day) for ev in events)
+    return (f"{streamer.stats['days_closed']} days closed (expected {len(streamer.states)}), "
+            f"{streamer.sentiment[t][1]} of {titles} day-two headlines kept for {t}")
+
+
+def main(n_issuers: int = 20, rate: int = 10000, seconds: int = 10):
+    store = get_store()
+    issuers = {f"SYN{i:04d}.NS": f"Synthetic {i}" for i in range(n_issuers)}
+    for t in list(issuers) + list(SECTOR_ETFS) + list(MACRO_TICKERS) + list(COMMODITY_TICKERS):
+        store.write_series("prices", t, synthetic_bars(t, START, END))
+    process_structured_and_build_features(issuers, mode="full")
+    train_models(issuers, max_workers=1, mode="per_issuer")
+    tickers = list(issuers)
+    events = intraday_events(tickers, rate * seconds)
+    news = sum(ev["type"] == "news" for ev in events)
+    print(f"{n_issuers} issuers, {len(events)} events ({news} headlines) over {len(DAYS)} days")
+
+    sentiment = CountingScorer()
+    sample = events[:5000]
+    _, s = _run(tickers, sample, 0.0, sentiment)
+    _report(f"rescore per event ({len(sample)} events)", s)
+
+    streamer, s = _run(tickers, paced(events, rate), 50, sentiment)
+    _report(f"in-process replay at {rate}/s", s)
+    print(f"    day-one close vs batch update: max |diff| {_check_close(streamer, events, sentiment, tickers[0]):.1e}")
+    print(f"    news before the first bar of day two: {_check_roll(streamer, events, tickers[1])}")
+
+    thread, port = serve_replay(events, port=0, rate=rate)
+    _, s = _run(tickers, socket_events("127.0.0.1", port), 50, sentiment)
+    thread.join()
+    _report(f"socket replay at {rate}/s", s)
+
+    streamer, s = _run(tickers, events, 50, sentiment)
+    _report("in-process, unpaced", s)
+    print(f"    day-one close vs batch update: max |diff| {_check_close(streamer, events, sentiment, tickers[0]):.1e}")
+    print(f"    news before the first bar of day two: {_check_roll(streamer, events, tickers[1])}")
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:4]))
@@ -0,0 +1,71 @@
+"""
+Hyperparameter search: successive halving vs training every trial to the full
+number of rounds, the effect of the time budget, and train_models picking up
+the persisted params.
+
+    python -m benchmarks.bench_tuning [n_issuers] [n_trials]
+"""
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("CREDTECH_DATA_DIR", tempfile.mkdtemp(prefix="credtech_tune_"))
+os.environ.setdefault("CREDTECH_MODELS_DIR", tempfile.mkdtemp(prefix="credtech_tune_models_"))
+
+from config import SECTOR_ETFS, MACRO_TICKERS, COMMODITY_TICKERS, LGBM_PARAMS, TUNING_ETA
+from feature_engineering.structured_features import process_structured_and_build_features
+from modeling.registry import ModelRegistry, params_for
+from modeling.train import train_models, _available_cores
+from modeling.tune import tune, issuer_data, sample_configs, successive_halving
+from utils.storage import get_store
+from benchmarks.fakes import synthetic_bars
+
+START, END = "2018-01-01", "2025-01-01"
+
+
+def main(n_issuers: int = 3, n_trials: int = 27):
+    store = get_store()
+    issuers = {f"SYN{i:04d}.NS": f"Synthetic {i}" for i in range(n_issuers)}
+    for t in list(issuers) + list(SECTOR_ETFS) + list(MACRO_TICKERS) + list(COMMODITY_TICKERS):
+        store.write_series("prices", t, synthetic_bars(t, START, END))
+    process_structured_and_build_features(issuers, mode="full")
+    configs = sample_configs(n_trials)
+    full = LGBM_PARAMS["n_estimators"]
+    print(f"{len(configs)} trials, eta {TUNING_ETA}, up to {full} rounds, {_available_cores()} core(s)")
+
+    for t in issuers:
+        data = issuer_data(t, store)
+        halving = successive_halving(data, configs, time_budget=0)
+        exhaustive = successive_halving(data, configs, time_budget=0, min_rounds=full, max_rounds=full)
+        print(f"  {t}: halving {halving['seconds']:5.1f}s / {halving['boosting_rounds']:5d} rounds, "
+              f"RMSE {halving['rmse']:.4f} | exhaustive {exhaustive['seconds']:5.1f}s / "
+              f"{exhaustive['boosting_rounds']:5d} rounds, RMSE {exhaustive['rmse']:.4f} | "
+              f"LGBM_PARAMS {exhaustive['baseline_rmse']:.4f} ({exhaustive['seconds'] / halving['seconds']:.1f}x)")
+
+    t = next(iter(issuers))
+    budget = 0.3 * halving["seconds"]
+    t0 = time.perf_counter()
+    capped = successive_halving(issuer_data(t, store), configs, time_budget=budget)
+    print(f"  time budget {budget:.1f}s: stopped after {time.perf_counter() - t0:.1f}s, {capped['rungs']} rung(s), "
+          f"RMSE {capped['rmse']:.4f}, timed out: {capped['timed_out']}")
+
+    train_models(issuers, max_workers=1)
+    before = {k: v["fingerprint"]["params"] for k, v in ModelRegistry().entries.items()}
+    tuned = tune(issuers, mode="per_issuer", time_budget=0, n_trials=n_trials)
+    res = train_models(issuers, max_workers=1)
+    print(f"  after tune(): train_models modes {[r['mode'] for r in res.values()]}, params changed for "
+          f"{sum(before[k] != e['fingerprint']['params'] for k, e in ModelRegistry().entries.items())}"
+          f"/{len(tuned)} issuers")
+    picked = {k: params_for(t)[k] for k in tuned[t]["params"]}
+    print(f"  {t} now trains with {picked}")
+
+    t0 = time.perf_counter()
+    pooled = tune(issuers, mode="pooled", time_budget=0, n_trials=n_trials)
+    r = next(iter(pooled.values()))
+    print(f"  pooled search: {time.perf_counter() - t0:.1f}s, RMSE {r['rmse']:.4f} at {r['params']['n_estimators']} "
+          f"rounds vs LGBM_PARAMS {r['baseline_rmse']:.4f} (pruned at {r['baseline_rounds']} rounds)")
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:3]))
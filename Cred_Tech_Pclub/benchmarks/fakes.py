@@ -0,0 +1,125 @@
+"""
+Local stand-ins for network data sources used by the benchmarks.
+They return deterministic synthetic data and record what each call asked for,
+so ingestion code can be exercised without touching Yahoo Finance.
+"""
+import threading
+import time
+import zlib
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+
+
+@lru_cache(maxsize=8)
+def _calendar(end: str) -> pd.DatetimeIndex:
+    return pd.DatetimeIndex(pd.bdate_range("2015-01-01", end, inclusive="left"), name="Date")
+
+
+def synthetic_bars(ticker: str, start: str, end: str) -> pd.DataFrame:
+    """Business-day OHLCV bars in [start, end) following a per-ticker random walk."""
+    full = _calendar(end)
+    rng = np.random.default_rng(zlib.crc32(ticker.encode()))
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.015, len(full))))
+    df = pd.DataFrame({
+        "Open": close * 0.998, "High": close * 1.01, "Low": close * 0.99,
+        "Close": close, "Adj Close": close, "Volume": rng.integers(1e5, 1e7, len(full)),
+    }, index=full)
+    return df.loc[df.index >= pd.Timestamp(start)]
+
+
+class CountingDownloader:
+    """
+    Drop-in for ``yf.download`` that counts the rows returned per call.
+    ``latency`` is paid once per request and ``per_symbol_latency`` for every
+    symbol in it; tickers in ``fail`` are silently left out of responses,
+    the way Yahoo drops delisted symbols from a batch.
+    """
+
+    def __init__(self, latency: float = 0.0, per_symbol_latency: float = 0.0, fail=()):
+        self.latency = latency
+        self.per_symbol_latency = per_symbol_latency
+        self.fail = set(fail)
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def __call__(self, tickers, start=None, end=None, **kwargs):
+        symbols = tickers.split() if isinstance(tickers, str) else list(tickers)
+        delay = self.latency + self.per_symbol_latency * len(symbols)
+        if delay:
+            time.sleep(delay)
+        frames = {t: synthetic_bars(t, start, end) for t in symbols if t not in self.fail}
+        with self._lock:
+            self.calls.append({"tickers": symbols, "start": start, "end": end,
+                               "rows": sum(len(f) for f in frames.values())})
+        if not frames:
+            return pd.DataFrame()
+        if len(symbols) == 1:
+            return frames[symbols[0]]
+        return pd.concat(frames, axis=1)
+
+    @property
+    def rows_requested(self) -> int:
+        return sum(c["rows"] for c in self.calls)
+
+
+_WORDS = ("profit", "loss", "guidance", "upgrade", "downgrade", "order", "deal", "probe", "record",
+          "quarter", "margin", "debt", "rating", "outlook", "strike", "merger", "buyback", "default")
+
+
+def synthetic_headlines(n: int, seed: int = 0) -> list:
+    """Distinct, deterministic headline-like strings."""
+    rng = np.random.default_rng(seed)
+    words = rng.choice(_WORDS, size=(n, 6))
+    return [f"{' '.join(w).capitalize()} #{seed}-{i}" for i, w in enumerate(words)]
+
+
+class CountingScorer:
+    """
+    Stand-in for a sentiment model: ``latency`` per headline, a deterministic
+    score in [-1, 1] derived from the text, and a record of every text scored.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.scored = []
+
+    def __call__(self, texts):
+        texts = list(texts)
+        if self.latency:
+            time.sleep(self.latency * len(texts))
+        self.scored.extend(texts)
+        return [zlib.crc32(t.encode()) / 2**31 - 1 for t in texts]
+
+
+class StubSentimentBackend:
+    """
+    Pure-Python stand-in for TransformersBackend. Construction costs ``load_seconds``;
+    a forward pass costs ``call_seconds`` plus ``token_seconds`` per padded token
+    (rows x longest row), which is how a CPU transformer scales with batch shape.
+    Labels depend only on the text, never on the batch it ran in.
+    """
+    loads = 0
+    vocab_key = "stub"              # all stub models share a tokenizer, like FinBERT and uncased BERT
+
+    def __init__(self, model_name: str, load_seconds: float = 0.0, call_seconds: float = 0.0,
+                 token_seconds: float = 0.0):
+        time.sleep(load_seconds)
+        StubSentimentBackend.loads += 1
+        self.model_name = model_name
+        self.call_seconds = call_seconds
+        self.token_seconds = token_seconds
+        self.padded_tokens = 0
+
+    def tokenize(self, texts):
+        return [[zlib.crc32(w.encode()) for w in str(t).split()][:512] for t in texts]
+
+    def predict(self, ids):
+        padded = len(ids) * max(len(x) for x in ids)
+        self.padded_tokens += padded
+        time.sleep(self.call_seconds + self.token_seconds * padded)
+        out = []
+        for x in ids:
+            h = zlib.crc32(bytes(str(x), "utf-8"))
+            out.append((("negative", "neutral", "positive")[h % 3], 0.5 + (h % 1000) / 2000))
+        return out
@@ -8,10 +8,14 @@ from datetime import datetime
 
 # --- Directories ---
 BASE_DIR = Path(__file__).resolve().parent
-DATA_DIR = BASE_DIR / "data"
+DATA_DIR = Path(os.getenv("CREDTECH_DATA_DIR", BASE_DIR / "data"))
 RAW_DATA_DIR = DATA_DIR / "raw"
 PROCESSED_DATA_DIR = DATA_DIR / "processed"
-MODELS_DIR = BASE_DIR / "models"
+MODELS_DIR = Path(os.getenv("CREDTECH_MODELS_DIR", BASE_DIR / "models"))
+
+# --- Storage ---
+STORAGE_BACKEND = os.getenv("CREDTECH_STORAGE", "parquet")   # "parquet" (typed, partitioned) or "csv"
+EXPORT_CSV = False                        # also mirror parquet writes to the legacy CSV files
 
 RAW_DATA_DIR.mkdir(parents=True, exist_ok=True)
 PROCESSED_DATA_DIR.mkdir(parents=True, exist_ok=True)
@@ -35,6 +39,13 @@ MACRO_TICKERS = {
     "^NSEI": "NIFTY 50"
 }
 
+# Issuer sector, a categorical feature of the pooled model (unlisted issuers get "unknown")
+ISSUER_SECTORS = {
+    "INFY.NS": "IT",
+    "TCS.NS": "IT",
+    "RELIANCE.NS": "Energy"
+}
+
 # Commodity (use yfinance symbols to avoid paid APIs by default)
 COMMODITY_TICKERS = {
     "CL=F": "WTI Crude Oil Futures"
@@ -44,12 +55,38 @@ COMMODITY_TICKERS = {
 DATA_START_DATE = "2022-01-01"
 TODAY = datetime.utcnow().strftime("%Y-%m-%d")
 
+# --- Ingestion ---
+INCREMENTAL_INGEST = True                 # append only bars newer than the last stored date
+INGEST_BATCH_SIZE = 25                    # symbols per multi-ticker yf.download call
+INGEST_MAX_WORKERS = 8                    # concurrent download requests
+INGEST_MAX_RETRIES = 3                    # single-ticker retries for symbols missing from a batch
+INGEST_BACKOFF_SECONDS = 1.0              # doubles after every failed retry
+INGEST_RATE_LIMIT_PER_SEC = 5.0           # global request budget across workers (0 = unlimited)
+INGEST_TIMEOUT_SECONDS = 20
+
+NEWSAPI_URL = os.getenv("NEWSAPI_URL", "https://newsapi.org/v2/everything")
+NEWS_PAGE_SIZE = 50
+NEWS_MAX_PAGES = 5                        # per issuer; NewsAPI paginates with ?page=
+NEWS_MAX_WORKERS = 16                     # in-flight news requests (also the HTTP pool size)
+NEWS_TIMEOUT_SECONDS = 15
+
+# --- Features ---
+FEATURE_ENGINE = "panel"                  # "panel" (all issuers vectorized) or "per_issuer"
+FEATURE_UPDATE_MODE = "incremental"       # "incremental" (apply new bars to saved rolling state) or "full"
+
 # --- NLP ---
 USE_LIGHT_NLP = False                     # False => use transformers
 FINBERT_MODEL_NAME = "ProsusAI/finbert"   # finance-tuned
 BERT_MODEL_NAME   = "distilbert-base-uncased-finetuned-sst-2-english"  # general sentiment
 ENABLE_NLP_ENSEMBLE = True               # use FinBERT + general BERT (+ VADER as tie-breaker)
 NLP_WEIGHTS = {"finbert": 0.6, "bert": 0.3, "vader": 0.1}
+NLP_VADER_SKIP_THRESHOLD = 0.6            # |VADER compound| >= this skips FinBERT/BERT for that headline (None = never)
+SENTIMENT_BATCH_SIZE = 32                 # max headlines per forward pass
+SENTIMENT_MAX_BATCH_TOKENS = 4096         # max padded tokens (rows x longest row) per forward pass
+SENTIMENT_NUM_THREADS = int(os.getenv("CREDTECH_NLP_THREADS", os.cpu_count() or 1))  # torch intra-op threads
+SENTIMENT_CACHE_ENABLED = True            # reuse scores of headlines seen in earlier runs
+SENTIMENT_CACHE_PATH = PROCESSED_DATA_DIR / "sentiment_cache.sqlite"
+SENTIMENT_CACHE_MAX_ENTRIES = 500_000     # least recently used scores are evicted beyond this
 
 
 # --- Targets/Model ---
@@ -72,6 +109,86 @@ LGBM_PARAMS = {
     "num_leaves": 31,
     "random_state": RANDOM_STATE
 }
+TRAINING_MODE = "per_issuer"              # "per_issuer" (one model per ticker) or "pooled" (one model, ticker/sector categoricals)
+TRAIN_MAX_WORKERS = int(os.getenv("CREDTECH_TRAIN_WORKERS", 0))  # issuer-level worker processes (0 = one per core)
+MODEL_MAX_INCREMENTS = 5                  # warm-started updates before a model is retrained from scratch
+WARM_START_ROUNDS = 100                   # extra boosting rounds when only new rows were appended
+
+# --- Hyperparameter tuning ---
+USE_TUNED_PARAMS = True                   # train_models overlays models/tuned_params.json on LGBM_PARAMS
+TUNING_TRIALS = 27                        # sampled configurations per search (LGBM_PARAMS itself is always one)
+TUNING_ETA = 3                            # successive halving: keep 1/eta of the trials per rung, eta x the rounds
+TUNING_MIN_ROUNDS = 25                    # boosting rounds at the first rung
+TUNING_TIME_BUDGET_SECONDS = 120          # wall clock per search; the best result so far is kept when it runs out
+TUNING_SEARCH_SPACE = {                   # values sampled per trial; other LGBM_PARAMS keys stay fixed
+    "learning_rate": [0.02, 0.05, 0.1],
+    "num_leaves": [15, 31, 63],
+    "max_depth": [5, 7, -1],
+    "min_child_samples": [10, 20, 50],
+    "feature_fraction": [0.6, 0.8, 0.9, 1.0],
+    "bagging_fraction": [0.7, 0.9, 1.0],
+    "reg_lambda": [0.0, 1.0, 5.0],
+}
+
+# --- Backtesting ---
+BACKTEST_WINDOW = "expanding"             # "expanding" (all history so far) or "rolling" (last BACKTEST_TRAIN_ROWS)
+BACKTEST_TRAIN_ROWS = 504                 # rows in the first (expanding) / every (rolling) training window
+BACKTEST_RETRAIN_EVERY = 63               # retrain cadence in rows; each fold tests the rows until the next retrain
+BACKTEST_POLICY = "retrain"               # "retrain" (every fold from scratch) or "incremental" (warm starts as train_models does)
+BACKTEST_MAX_WORKERS = 0                  # concurrent folds (0 = one per core)
+BACKTEST_LGBM_OVERRIDES = {"n_estimators": 300}   # per-fold models skip early stopping, so cap the rounds
+
+# --- Explanations ---
+SHAP_UPDATE_MODE = "incremental"          # "incremental" (explain only rows not yet explained by the current model) or "full"
+
+# --- Scoring service ---
+SCORER_CACHE_SIZE = 64                    # models (and their explainers) kept warm, LRU by (model, version)
+SCORER_TOP_K = 5                          # SHAP drivers returned with each score
+SCORER_BATCH_WINDOW_MS = 0.0              # extra wait for a batch to fill (0 = batch whatever is already queued)
+SCORER_MAX_BATCH = 64                     # requests scored together at most
+SCORER_FEATURE_TTL_SECONDS = 60           # latest stored feature row is re-read after this long
+SCORER_HOST = "127.0.0.1"
+SCORER_PORT = int(os.getenv("CREDTECH_SCORER_PORT", 8765))
+
+# --- Alerts ---
+ALERT_SCORE_CHANGE = 3.0                  # absolute rule: score move (points) that raises an alert
+ALERT_RELATIVE_CHANGE = 0.05              # relative rule: move as a fraction of the previous score
+ALERT_ZSCORE = 3.0                        # z-score rule: move in standard deviations of the issuer's recent daily moves
+ALERT_ZSCORE_WINDOW = 30                  # daily score changes behind that standard deviation (summary's score_change_std)
+ALERT_RATING_BANDS = True                 # rating rule: score crosses an agency band of RATING_MAP (AA/A/BBB/BB)
+ALERT_DEBOUNCE_MINUTES = 60               # an issuer's alert of one rule and direction is not raised again within this long
+ALERT_DIR = DATA_DIR / "alerts"           # alerts.jsonl (one JSON line per alert) and state.json (what was raised when)
+
+# --- Streaming ---
+STREAM_BATCH_MS = 50                      # events are coalesced this long, then the issuers they touched are rescored
+STREAM_HOST = "127.0.0.1"                 # event replay socket (python -m data_ingestion.event_stream serve ...)
+STREAM_PORT = int(os.getenv("CREDTECH_STREAM_PORT", 8766))
+
+# --- Dashboard charts ---
+CHART_MAX_POINTS = 1000                   # points per plotted line, about a chart's width in pixels
+CHART_POINTS_PER_CHART = 6000             # overlays of many lines share this budget (at least 150 points a line)
+CHART_DOWNSAMPLE = "lttb"                 # "lttb" (keeps the line's shape) or "minmax" (keeps each bucket's extremes)
+CHART_CACHE_SIZE = 256                    # cached (ticker, columns, window, resolution) chart queries
+
+# --- Correlation analytics ---
+CORR_DIR = PROCESSED_DATA_DIR / "correlation"   # panel of daily score changes and the correlation state
+CORR_MODE = "ewma"                        # "ewma" (older days fade) or "rolling" (fixed window of days)
+CORR_HALFLIFE_DAYS = 63                   # ewma: weight of a day halves every this many trading days
+CORR_WINDOW_DAYS = 252                    # rolling: trading days in the window
+CORR_MIN_PERIODS = 20                     # issuers with fewer daily changes get no correlations
+CORR_BLOCK = 256                          # dates per matrix product / issuers per block of correlation rows
+CORR_TOP_K = 5                            # most-correlated peers listed per issuer
+CORR_CLUSTER_THRESHOLD = 0.6              # dendrogram cut on sqrt((1 - corr) / 2): average corr above about 0.3 within a cluster
+
+# --- Pipeline ---
+PIPELINE_STATE_PATH = DATA_DIR / "pipeline_state.json"   # input fingerprints of the last successful stage runs
+PIPELINE_MAX_WORKERS = 4                  # stages run concurrently once their inputs are ready
+
+# --- Instrumentation ---
+METRICS_LOG_PATH = DATA_DIR / "logs" / "metrics.jsonl"   # one JSON line per timed span / event (None disables)
+METRICS_PROMETHEUS_PATH = os.getenv("CREDTECH_METRICS_PROM")  # optional Prometheus text file, written after each pipeline run
+METRICS_MEMORY_INTERVAL = 0.05            # seconds between RSS samples in memory-sampled spans
+PROFILE_DIR = DATA_DIR / "profiles"       # cProfile stats per stage with `python main.py --profile`
 
 # --- Mock Agency Ratings ---
 MOCK_AGENCY_RATINGS_PATH = DATA_DIR / "mock_agency_ratings.csv"
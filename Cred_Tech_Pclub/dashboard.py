@@ -1,42 +1,74 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
-import joblib
 import plotly.graph_objects as go
 from pathlib import Path
 import shap
 from streamlit_shap import st_shap
 
-from config import MODELS_DIR, PROCESSED_DATA_DIR, ISSUERS, MOCK_AGENCY_RATINGS_PATH
+from config import ISSUERS, MOCK_AGENCY_RATINGS_PATH, CORR_DIR, CORR_TOP_K
+from utils.storage import get_store
+from utils.metrics import timed, count
+from modeling.registry import ModelRegistry
+from modeling.shap_store import ShapStore, explanation
+from modeling.explain import model_inputs, plain_language_from_shap
+from modeling.summary import SUMMARY_TABLE, issuer_summary, load_issuer_summary
+from analytics.timeseries import query_series, line_budget, chart_xy
+from analytics.correlation import CorrelationEngine, STATE_FILE
+from analytics.alerts import AlertEngine, format_alert, read_alerts
 
 st.set_page_config(layout="wide", page_title="CredTech — Explainable Credit Intelligence")
 
+# Loaders are timed inside the Streamlit caches, so the metrics log shows cache misses only
 @st.cache_data
+@timed("dashboard.load", loader="features")
 def load_features(ticker: str):
-    safe = ticker.replace(".", "_").replace("^","")
-    path = PROCESSED_DATA_DIR / f"features_{safe}.csv"
-    if not path.exists():
+    df = get_store().read_series("features", ticker)
+    count("rows", len(df), stage="dashboard", loader="features")
+    if df.empty:
         return None
-    df = pd.read_csv(path, parse_dates=["Date"]).set_index("Date")
     return df
 
+@st.cache_data
+@timed("dashboard.load", loader="scores")
+def load_scores(ticker: str, as_of=None):
+    # Only the score column; as_of (the issuer's latest date in the summary) is part of the cache key
+    df = get_store().read_series("features", ticker, columns=["credit_score"])
+    if df.empty:
+        return None
+    return df["credit_score"]
+
+@st.cache_data
+@timed("dashboard.load", loader="summary")
+def load_summary(mtime=None):
+    # mtime of the stored table is part of the cache key, so a pipeline rerun replaces the cached copy
+    summary = load_issuer_summary()
+    if summary.empty:
+        # Pipelines that predate the summary stage only wrote the feature histories
+        summary = issuer_summary().set_index("ticker")
+    return summary
+
 @st.cache_resource
-def load_model_and_shap(ticker: str):
-    safe = ticker.replace(".", "_").replace("^","")
-    model_path = MODELS_DIR / f"model_{safe}.joblib"
-    shap_path = MODELS_DIR / f"shap_{safe}.joblib"
-    if not (model_path.exists() and shap_path.exists()):
+@timed("dashboard.load", loader="correlations")
+def load_correlations(mtime=None):
+    # mtime of the saved state is part of the cache key; correlations and clusters are computed once per state
+    return CorrelationEngine.load(CORR_DIR)
+
+@st.cache_resource
+@timed("dashboard.load", loader="model_and_shap")
+def load_model_and_shap(ticker: str, version=None, shap_rows=None):
+    # version and shap_rows are part of the cache key, so a new model or newly explained rows replace the cached one
+    model = ModelRegistry().load_model(ticker)
+    # (values, index, meta) with the values memory-mapped: only the rows a view touches are read
+    shap_bundle = ShapStore().read(ticker)
+    if model is None or shap_bundle is None:
         return None, None
-    model = joblib.load(model_path)
-    shap_bundle = joblib.load(shap_path)
     return model, shap_bundle
 
 @st.cache_data
+@timed("dashboard.load", loader="news")
 def load_news():
-    p = PROCESSED_DATA_DIR / "news_with_sentiment.csv"
-    if p.exists():
-        df = pd.read_csv(p, encoding="utf-8")
-
+    df = get_store().read_table("news_with_sentiment")
+    if not df.empty:
         # Normalize column names (lowercase, strip)
         df = df.rename(columns={c: c.strip().lower() for c in df.columns})
 
@@ -59,36 +91,31 @@ def load_news():
     return pd.DataFrame(columns=["ticker","publishedAt","title","source","sentiment_score"])
 
 @st.cache_data
+@timed("dashboard.load", loader="agency_ratings")
 def load_agency_ratings():
     if MOCK_AGENCY_RATINGS_PATH.exists():
         return pd.read_csv(MOCK_AGENCY_RATINGS_PATH, parse_dates=["Date"]).set_index("Date")
     return pd.DataFrame()
 
-def plain_language_from_shap(shap_row: shap._explanation.Explanation, feature_names: list, k: int = 5):
-    vals = np.abs(shap_row.values)
-    order = np.argsort(vals)[::-1][:k]
-    bullets = []
-    for idx in order:
-        fname = feature_names[idx]
-        contrib = shap_row.values[idx]
-        direction = "increased" if contrib > 0 else "decreased"
-        reason = fname
-        if "volatility_30d" in fname: reason = "higher 30-day volatility"
-        elif "momentum_20d" in fname: reason = "20-day momentum"
-        elif "momentum_5d" in fname: reason = "5-day momentum"
-        elif "sector_" in fname: reason = "sector trend"
-        elif "macro_" in fname: reason = "macro market trend"
-        elif "comm_" in fname: reason = "commodity trend (e.g., crude)"
-        elif "avg_sentiment_score" in fname: reason = "recent news sentiment"
-        bullets.append(f"• {reason} {direction} the score by ~{abs(contrib):.2f} points")
-    return bullets
-
 # Sidebar
 st.sidebar.header("Analyst Controls")
 ticker = st.sidebar.selectbox("Select Issuer", options=list(ISSUERS.keys()), format_func=lambda x: f"{x} — {ISSUERS[x]}")
 
+summary_path = get_store().table_path(SUMMARY_TABLE)
+summary = load_summary(summary_path.stat().st_mtime_ns if summary_path.exists() else None)
+
+# Charts read only this window and are downsampled to about CHART_MAX_POINTS points per line
+WINDOWS = {"1Y": 1, "3Y": 3, "5Y": 5, "10Y": 10, "All": None}
+window = st.sidebar.selectbox("History window", options=list(WINDOWS), index=len(WINDOWS) - 1)
+window_end = summary["date"].max() if len(summary) else None
+window_start = None
+if WINDOWS[window] and window_end is not None and not pd.isna(window_end):
+    window_start = window_end - pd.DateOffset(years=WINDOWS[window])
+
+# Full history only for the selected issuer
 df = load_features(ticker)
-model, shap_bundle = load_model_and_shap(ticker)
+model, shap_bundle = load_model_and_shap(ticker, ModelRegistry().version(ticker),
+                                         (ShapStore().meta(ticker) or {}).get("rows"))
 news_df = load_news()
 agency = load_agency_ratings()
 
@@ -99,21 +126,20 @@ if df is None or model is None or shap_bundle is None:
     st.error("Artifacts missing. Please run the pipeline first: python main.py then reload this app.")
     st.stop()
 
-# Alerts (bonus)
-st.sidebar.subheader("⚠ Sudden Score Change Alerts")
-alerts = []
-for t in ISSUERS.keys():
-    d = load_features(t)
-    if d is None or len(d) < 2: 
-        continue
-    change = d["credit_score"].iloc[-1] - d["credit_score"].iloc[-2]
-    if abs(change) >= 3.0:
-        alerts.append((t, change))
-if alerts:
-    for (t, ch) in sorted(alerts, key=lambda x: -abs(x[1])):
-        st.sidebar.write(f"{t}: {ch:+.2f} pts")
+# Alerts: the rules of analytics/alerts.py on the latest summary; the pipeline and the stream raise them to the sink
+st.sidebar.subheader("⚠ Score Alerts")
+alerts = AlertEngine(root=None).evaluate(summary.loc[summary.index.isin(list(ISSUERS))])
+if len(alerts):
+    alerts = alerts.assign(size=(alerts["score"] - alerts["previous"]).abs()).sort_values("size", ascending=False)
+    for a in alerts.to_dict("records"):
+        st.sidebar.write(f"{a['ticker']} [{a['rule']}]: {format_alert(a)}")
 else:
-    st.sidebar.write("No large changes in last update.")
+    st.sidebar.write("No alerts in last update.")
+raised = read_alerts(limit=20)
+if len(raised):
+    with st.sidebar.expander("Recently raised (pipeline and stream)"):
+        for a in raised.iloc[::-1].to_dict("records"):
+            st.write(f"{a['raised_at'][:16]} {a['ticker']} [{a['rule']}]: {a['message']}")
 
 # Tabs
 # Tabs
@@ -122,25 +148,28 @@ tab1, tab2, tab3, tab4 = st.tabs(["Overview", "Score Deconstruction", "Issuer Co
 with tab1:
     st.subheader(f"Overview — {ISSUERS[ticker]} ({ticker})")
 
-    latest = float(df["credit_score"].iloc[-1])
-    delta = float(df["credit_score"].iloc[-1] - df["credit_score"].iloc[-2]) if len(df) >= 2 else 0.0
+    if ticker in summary.index:
+        info = summary.loc[ticker]
+    else:
+        info = pd.Series(issuer_summary([ticker]).iloc[0])
+    latest, delta = float(info["credit_score"]), float(info["delta"])
+    vol_val, sent_val = float(info["volatility_30d"]), float(info["avg_sentiment_score"])
 
     c1, c2, c3 = st.columns(3)
-    vol_col = [c for c in df.columns if c.endswith("volatility_30d")]
-    vol_val = float(df[vol_col[0]].iloc[-1]) if vol_col else 0.0
-    sent_val = float(df["avg_sentiment_score"].iloc[-1]) if "avg_sentiment_score" in df.columns else 0.0
 
     c1.metric("Latest Credit Score", f"{latest:.2f}", f"{delta:+.2f}")
     c2.metric("30D Volatility", f"{vol_val:.2%}")
     c3.metric("Recent News Sentiment", f"{sent_val:+.2f}")
 
     fig = go.Figure()
-    fig.add_trace(go.Scatter(x=df.index, y=df["credit_score"], mode="lines", name="Dynamic Credit Score"))
+    x, y = chart_xy(query_series(ticker, ["credit_score"], window_start).get("credit_score", df["credit_score"]))
+    fig.add_trace(go.Scatter(x=x, y=y, mode="lines", name="Dynamic Credit Score"))
     if not agency.empty and ticker in agency.columns:
         fig.add_trace(go.Scatter(
             x=agency.index, y=agency[ticker], mode="lines", name="Agency Rating (Mock)",
             line=dict(dash="dash"), connectgaps=True))
-    fig.update_layout(height=420, xaxis_title="Date", yaxis_title="Score (0-100)", legend=dict(orientation="h"))
+    fig.update_layout(height=420, xaxis_title="Date", xaxis_type="date", yaxis_title="Score (0-100)",
+                      legend=dict(orientation="h"))
     st.plotly_chart(fig, use_container_width=True)
 
     st.markdown("#### Recent News & Events")
@@ -160,59 +189,96 @@ with tab2:
     sel = st.selectbox("Choose date", options=dates, index=len(dates)-1)
     idx = dates.index(sel)
 
-    shap_values = shap_bundle["values"]
-    feature_names = shap_bundle["columns"]
+    shap_values, shap_index, shap_meta = shap_bundle
+    feature_names = shap_meta["columns"]
+    row = shap_index.get_indexer([df.index[idx]])[0]
+
+    if row < 0:
+        st.info("No explanation stored for this date yet; rerun the pipeline.")
+    else:
+        shap_row = explanation(shap_values[row], shap_meta, model_inputs(df.iloc[[idx]], ticker, model))
 
-    st.markdown("*Waterfall plot (local explanation)*")
-    st_shap(shap.plots.waterfall(shap_values[idx]), height=370)
+        st.markdown("*Waterfall plot (local explanation)*")
+        st_shap(shap.plots.waterfall(shap_row), height=370)
 
-    st.markdown("*Top drivers (plain language)*")
-    bullets = plain_language_from_shap(shap_values[idx], feature_names, k=5)
-    st.write("\n".join(bullets))
+        st.markdown("*Top drivers (plain language)*")
+        bullets = plain_language_from_shap(shap_row, feature_names, k=5)
+        st.write("\n".join(bullets))
 
     st.markdown("*Global importance (beeswarm)*")
-    st_shap(shap.plots.beeswarm(shap_values), height=380)
+    st_shap(shap.plots.beeswarm(explanation(shap_values, shap_meta,
+                                            model_inputs(df.reindex(shap_index), ticker, model))), height=380)
 
 with tab3:  # Issuer Comparison
     st.subheader("Issuer Comparison")
     picks = st.multiselect("Select issuers", options=list(ISSUERS.keys()),
-                           default=list(ISSUERS.keys()))
+                           default=list(ISSUERS.keys())[:5])
 
-    # Load features for each selected issuer
-    series = {}
-    for t in picks:
-        d = load_features(t)
-        if d is not None and "credit_score" in d.columns:
-            series[t] = d["credit_score"]
+    corr_path = CORR_DIR / STATE_FILE
+    engine = load_correlations(corr_path.stat().st_mtime_ns if corr_path.exists() else None)
 
-    if not series:
+    if not picks or summary.index.intersection(picks).empty:
         st.info("Run the pipeline first to compare issuers.")
     else:
         # Overlay chart
         fig = go.Figure()
-        for t, s in series.items():
-            fig.add_trace(go.Scatter(x=s.index, y=s, mode="lines", name=f"{t}"))
-        fig.update_layout(height=420, xaxis_title="Date", yaxis_title="Score", legend=dict(orientation="h"))
+        budget = line_budget(len(picks))
+        for t in picks:
+            s = query_series(t, ["credit_score"], window_start, max_points=budget).get("credit_score")
+            if s is not None:
+                x, y = chart_xy(s)
+                fig.add_trace(go.Scatter(x=x, y=y, mode="lines", name=f"{t}"))
+        fig.update_layout(height=420, xaxis_title="Date", xaxis_type="date", yaxis_title="Score",
+                          legend=dict(orientation="h"))
         st.plotly_chart(fig, use_container_width=True)
 
-        # Correlation of daily changes
-        df_cmp = pd.DataFrame(series)
-        dchg = df_cmp.diff().dropna()
-        if not dchg.empty:
+        # Correlation of daily changes, from the pipeline's correlation state
+        if engine is None:
+            # Pipelines that predate the correlation stage: the selected issuers only, computed here
+            series = {}
+            for t in picks:
+                as_of = summary["date"].get(t) if "date" in summary.columns else None
+                s = load_scores(t, None if pd.isna(as_of) else str(as_of))
+                if s is not None:
+                    series[t] = s
+            engine = CorrelationEngine(list(series))
+            engine.update_scores(pd.DataFrame(series))
+        corr = engine.matrix(picks)
+        if not corr.empty:
             import plotly.express as px
-            corr = dchg.corr()
-            heat = px.imshow(corr, text_auto=True, aspect="auto", title="Correlation of daily score changes")
+            # Issuers of the same cluster side by side
+            order = engine.clusters()["order"].reindex(corr.index).sort_values().index
+            corr = corr.loc[order, order]
+            heat = px.imshow(corr, text_auto=".2f", aspect="auto", zmin=-1, zmax=1,
+                             title=f"{engine.describe()} correlation of daily score changes")
             st.plotly_chart(heat, use_container_width=True)
 
+        if ticker in engine.tickers:
+            peers = engine.top_k(ticker, CORR_TOP_K)
+            st.markdown(f"*Most correlated with {ticker}*")
+            st.write(peers.rename("Correlation").to_frame().assign(
+                Name=[ISSUERS.get(t, t) for t in peers.index]))
+            clusters = engine.clusters()
+            mates = clusters.index[clusters["cluster"] == clusters.loc[ticker, "cluster"]].drop(ticker)
+            st.caption(f"Contagion cluster of {ticker}: " + (", ".join(mates) if len(mates) else "no other issuer"))
+
         # Latest snapshot
-        latest = {t: float(s.dropna().iloc[-1]) for t, s in series.items() if len(s.dropna())}
-        st.write(pd.DataFrame.from_dict(latest, orient="index", columns=["Latest score"]).sort_values("Latest score", ascending=False))
+        snap = summary.loc[summary.index.isin(picks), ["credit_score", "delta", "volatility_30d",
+                                                      "avg_sentiment_score", "model_version", "updated_at"]]
+        st.write(snap.rename(columns={"credit_score": "Latest score", "delta": "Change", "volatility_30d": "30D vol",
+                                      "avg_sentiment_score": "Sentiment", "model_version": "Model",
+                                      "updated_at": "Updated"}).sort_values("Latest score", ascending=False))
 
 with tab4:
     st.subheader("Data Explorer")
     cols = [c for c in df.columns if c != "credit_score"]
     pick = st.multiselect("Select features to plot", options=cols, default=[cols[0]] if cols else [])
     if pick:
-        st.line_chart(df[pick])
+        fig = go.Figure()
+        for col, s in query_series(ticker, pick, window_start, max_points=line_budget(len(pick))).items():
+            x, y = chart_xy(s)
+            fig.add_trace(go.Scatter(x=x, y=y, mode="lines", name=col))
+        fig.update_layout(height=420, xaxis_title="Date", xaxis_type="date", legend=dict(orientation="h"))
+        st.plotly_chart(fig, use_container_width=True)
     else:
         st.info("Select one or more features to visualize.")
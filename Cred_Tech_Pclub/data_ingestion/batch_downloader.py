@@ -0,0 +1,174 @@
+"""
+Batched multi-ticker price download engine.
+Tickers that share a start date are grouped into multi-symbol yf.download calls
+and run on a bounded thread pool behind a global rate limiter. Symbols missing
+from a batch response (or whose batch failed) are retried one by one with
+exponential backoff, and anything still failing ends up in the BatchReport
+instead of aborting the run.
+"""
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass, field
+import pandas as pd
+import yfinance as yf
+
+from config import (INGEST_BATCH_SIZE, INGEST_MAX_WORKERS, INGEST_MAX_RETRIES,
+                    INGEST_BACKOFF_SECONDS, INGEST_RATE_LIMIT_PER_SEC, INGEST_TIMEOUT_SECONDS)
+from utils.logging_utils import setup_logger
+
+logger = setup_logger("batch_downloader")
+
+
+class RateLimiter:
+    """Token bucket shared by all workers; ``acquire`` blocks until a request may be sent."""
+
+    def __init__(self, rate_per_sec: float, burst: int = 1):
+        self.rate = rate_per_sec
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if not self.rate or self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+@dataclass
+class BatchReport:
+    succeeded: list = field(default_factory=list)
+    failed: dict = field(default_factory=dict)      # ticker -> last error
+    empty: list = field(default_factory=list)       # optional tickers with no new bars
+    retried: dict = field(default_factory=dict)     # ticker -> attempts used by single-ticker retries
+    requests: int = 0
+    elapsed: float = 0.0
+
+    def summary(self) -> str:
+        return (f"{len(self.succeeded)} ok, {len(self.empty)} empty, {len(self.failed)} failed, "
+                f"{len(self.retried)} retried, {self.requests} requests in {self.elapsed:.2f}s")
+
+
+def _normalize(df: pd.DataFrame) -> pd.DataFrame:
+    if isinstance(df.columns, pd.MultiIndex):
+        df = df.copy()
+        df.columns = df.columns.get_level_values(0)
+    df = df.dropna(how="all")
+    df.index.name = "Date"
+    return df
+
+
+def _split_batch(df: pd.DataFrame, batch: list) -> dict:
+    """Split a group_by='ticker' response into one frame per symbol."""
+    if df is None or df.empty:
+        return {}
+    if not isinstance(df.columns, pd.MultiIndex):
+        return {batch[0]: _normalize(df)} if len(batch) == 1 else {}
+    level = 0 if set(batch) & set(df.columns.get_level_values(0)) else 1
+    out = {}
+    for t in batch:
+        if t not in df.columns.get_level_values(level):
+            continue
+        sub = _normalize(df.xs(t, axis=1, level=level))
+        if not sub.empty:
+            out[t] = sub
+    return out
+
+
+def download_batches(starts: dict, end: str, downloader=None,
+                     batch_size: int = INGEST_BATCH_SIZE,
+                     max_workers: int = INGEST_MAX_WORKERS,
+                     max_retries: int = INGEST_MAX_RETRIES,
+                     backoff: float = INGEST_BACKOFF_SECONDS,
+                     rate_limit: float = INGEST_RATE_LIMIT_PER_SEC,
+                     optional=()):
+    """
+    Download ``{ticker: start}`` up to ``end`` (exclusive).
+    Tickers in ``optional`` may legitimately have no new bars: if their batch
+    succeeded but returned nothing for them, they are not retried.
+    Returns ``(frames, report)`` where frames maps ticker -> Date-indexed OHLCV.
+    """
+    optional = set(optional)
+    downloader = downloader or yf.download
+    limiter = RateLimiter(rate_limit, burst=max_workers)
+    report = BatchReport()
+    report_lock = threading.Lock()
+    frames = {}
+
+    def _call(symbols: list, start: str) -> pd.DataFrame:
+        limiter.acquire()
+        with report_lock:
+            report.requests += 1
+        return downloader(" ".join(symbols), start=start, end=end, group_by="ticker",
+                          auto_adjust=False, progress=False, threads=False,
+                          timeout=INGEST_TIMEOUT_SECONDS)
+
+    def _run_batch(batch: list, start: str):
+        try:
+            got = _split_batch(_call(batch, start), batch)
+        except Exception as e:
+            logger.warning(f"Batch of {len(batch)} starting {batch[0]} failed: {e}")
+            return {}, list(batch), []
+        missing = [t for t in batch if t not in got]
+        return got, [t for t in missing if t not in optional], [t for t in missing if t in optional]
+
+    def _run_single(ticker: str, start: str):
+        err = None
+        for attempt in range(1, max_retries + 1):
+            try:
+                got = _split_batch(_call([ticker], start), [ticker])
+                if ticker in got:
+                    return ticker, got[ticker], attempt, None
+                err = ValueError(f"No data for ticker {ticker}")
+            except Exception as e:
+                err = e
+            if attempt < max_retries:
+                time.sleep(backoff * 2 ** (attempt - 1))
+        return ticker, None, max_retries, err
+
+    by_start = defaultdict(list)
+    for t, s in starts.items():
+        by_start[s].append(t)
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        pending = {}
+        for start, tickers in by_start.items():
+            for i in range(0, len(tickers), batch_size):
+                pending[pool.submit(_run_batch, tickers[i:i + batch_size], start)] = ("batch", start)
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                kind, start = pending.pop(fut)
+                if kind == "batch":
+                    got, missing, empty = fut.result()
+                    frames.update(got)
+                    report.succeeded.extend(got)
+                    report.empty.extend(empty)
+                    for t in missing:
+                        pending[pool.submit(_run_single, t, start)] = ("single", start)
+                else:
+                    t, df, attempts, err = fut.result()
+                    report.retried[t] = attempts
+                    if df is not None:
+                        frames[t] = df
+                        report.succeeded.append(t)
+                    else:
+                        report.failed[t] = str(err)
+    report.elapsed = time.perf_counter() - t0
+
+    logger.info(f"Batched download: {report.summary()}")
+    for t, err in report.failed.items():
+        logger.warning(f"Failed to fetch {t}: {err}")
+    return frames, report
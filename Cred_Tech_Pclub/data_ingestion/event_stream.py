@@ -0,0 +1,166 @@
+# data_ingestion/event_stream.py
+"""
+Event streams for intraday scoring: price bars and headlines as JSON lines.
+
+    {"type": "bar", "ts": "2025-01-02T10:15:00", "ticker": "INFY.NS",
+     "Open": 1890.0, "High": 1902.5, "Low": 1885.1, "Close": 1899.3, "Adj Close": 1899.3, "Volume": 812000}
+    {"type": "news", "ts": "2025-01-02T10:16:03", "ticker": "INFY.NS", "title": "...", "source": "..."}
+
+A bar is the day's bar so far (the day's open, high and low, the last price as
+Close, volume to date), as intraday quote feeds send it; the last bar of a day
+is that day's daily bar. Bars of sector, macro and commodity tickers update the
+context of every issuer.
+
+A file, or a socket replaying one, stands in for a live feed:
+
+    python -m data_ingestion.event_stream record events.jsonl --start 2024-12-02
+    python -m data_ingestion.event_stream serve events.jsonl --rate 10000
+"""
+import argparse
+import json
+import socket
+import threading
+import time
+from pathlib import Path
+import pandas as pd
+
+from config import ISSUERS, SECTOR_ETFS, MACRO_TICKERS, COMMODITY_TICKERS, STREAM_HOST, STREAM_PORT
+from utils.logging_utils import setup_logger
+from utils.storage import get_store
+
+logger = setup_logger("event_stream")
+
+BAR_FIELDS = ("Open", "High", "Low", "Close", "Adj Close", "Volume")
+
+
+def read_events(path):
+    """Events of a JSON-lines file, in file order; malformed lines are logged and skipped."""
+    with open(path, encoding="utf-8") as f:
+        for n, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError as e:
+                logger.warning(f"{path}:{n}: bad event skipped ({e})")
+
+
+def write_events(path, events) -> Path:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        for ev in events:
+            f.write(json.dumps(ev) + "\n")
+    return path
+
+
+def paced(events, rate: float = None):
+    """``events`` at no more than ``rate`` per second (as fast as possible if None)."""
+    if not rate:
+        yield from events
+        return
+    t0 = time.perf_counter()
+    for i, ev in enumerate(events):
+        ahead = t0 + i / rate - time.perf_counter()
+        # Sleeping per event is too coarse at thousands per second; catch up in steps of a millisecond or more
+        if ahead > 0.001:
+            time.sleep(ahead)
+        yield ev
+
+
+def socket_events(host: str = STREAM_HOST, port: int = STREAM_PORT):
+    """Events read as JSON lines from a TCP connection, until the other side closes it."""
+    with socket.create_connection((host, port)) as sock, sock.makefile("rb") as f:
+        for line in f:
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except ValueError as e:
+                    logger.warning(f"Bad event from {host}:{port} skipped ({e})")
+
+
+def serve_replay(events, host: str = STREAM_HOST, port: int = STREAM_PORT, rate: float = None) -> tuple:
+    """
+    Replay ``events`` as JSON lines to the first client that connects, at
+    ``rate`` events per second. Returns (thread, bound port); port 0 picks a
+    free one.
+    """
+    server = socket.create_server((host, port))
+    port = server.getsockname()[1]
+
+    def run():
+        with server:
+            conn, _ = server.accept()
+            with conn:
+                conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                buf, last = [], time.perf_counter()
+                for ev in paced(events, rate):
+                    buf.append(json.dumps(ev))
+                    # Flush every few milliseconds rather than per event, like a feed handler's batching
+                    now = time.perf_counter()
+                    if now - last >= 0.002 or len(buf) >= 512:
+                        conn.sendall(("\n".join(buf) + "\n").encode())
+                        buf, last = [], now
+                if buf:
+                    conn.sendall(("\n".join(buf) + "\n").encode())
+
+    thread = threading.Thread(target=run, name="event-replay", daemon=True)
+    thread.start()
+    return thread, port
+
+
+def events_from_store(tickers=None, start=None, end=None, store=None) -> list:
+    """
+    Stored daily bars (as end-of-day bars) and headlines of ``tickers`` (the
+    issuers plus every context series if None) as one time-ordered event list.
+    """
+    store = store or get_store()
+    if tickers is None:
+        tickers = list(ISSUERS) + list(SECTOR_ETFS) + list(MACRO_TICKERS) + list(COMMODITY_TICKERS)
+    events = []
+    for t in tickers:
+        df = store.read_series("prices", t, start=start, end=end)
+        for date, bar in zip(df.index, df.to_dict("records")):
+            ev = {"type": "bar", "ts": f"{date:%Y-%m-%d}T16:00:00", "ticker": t}
+            ev.update({k: float(bar[k]) for k in BAR_FIELDS if k in bar and not pd.isna(bar[k])})
+            events.append(ev)
+    news = store.read_table("news")
+    if not news.empty:
+        news["date"] = pd.to_datetime(news["date"], errors="coerce")
+        news = news.dropna(subset=["date"])
+        news = news[news["ticker"].isin(tickers)]
+        if start is not None:
+            news = news[news["date"] >= pd.Timestamp(start)]
+        if end is not None:
+            news = news[news["date"] <= pd.Timestamp(end)]
+        for r in news.itertuples(index=False):
+            events.append({"type": "news", "ts": f"{r.date:%Y-%m-%dT%H:%M:%S}", "ticker": r.ticker,
+                           "title": str(r.title), "source": str(getattr(r, "source", ""))})
+    events.sort(key=lambda e: e["ts"])
+    return events
+
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Record or replay an intraday event stream.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    rec = sub.add_parser("record", help="write stored bars and headlines as an event file")
+    rec.add_argument("path")
+    rec.add_argument("--start")
+    rec.add_argument("--end")
+    srv = sub.add_parser("serve", help="replay an event file to one socket client")
+    srv.add_argument("path")
+    srv.add_argument("--host", default=STREAM_HOST)
+    srv.add_argument("--port", type=int, default=STREAM_PORT)
+    srv.add_argument("--rate", type=float, help="events per second (default: as fast as possible)")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = _parse_args()
+    if args.command == "record":
+        events = events_from_store(start=args.start, end=args.end)
+        logger.info(f"Wrote {len(events)} events -> {write_events(args.path, events)}")
+    else:
+        thread, port = serve_replay(read_events(args.path), args.host, args.port, args.rate)
+        logger.info(f"Replaying {args.path} on {args.host}:{port}")
+        thread.join()
@@ -5,93 +5,135 @@ News ingestion with graceful fallbacks:
 1) If NEWS_API_KEY is set, uses NewsAPI.org.
 2) Else, tries yfinance's .news for each ticker.
 3) Else, loads sample news from data/raw/sample_news.csv (bundled).
-Produces data/raw/news.csv with columns: ticker, date, title, source.
+Produces the "news" table (data/raw/news.*) with columns: ticker, date, title, source.
+Issuers are fetched concurrently on a bounded thread pool; NewsAPI calls share
+one pooled keep-alive session and follow pagination up to NEWS_MAX_PAGES.
 """
 import os
 import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
 from pathlib import Path
 import pandas as pd
 import yfinance as yf
 import requests
+from requests.adapters import HTTPAdapter
 
-from config import RAW_DATA_DIR, ISSUERS, NEWS_API_KEY
+from config import (RAW_DATA_DIR, ISSUERS, NEWS_API_KEY, NEWSAPI_URL, NEWS_PAGE_SIZE, NEWS_MAX_PAGES,
+                    NEWS_MAX_WORKERS, NEWS_TIMEOUT_SECONDS)
 from utils.logging_utils import setup_logger
+from utils.metrics import timed, count
+from utils.storage import get_store
 
 logger = setup_logger("news_ingestor")
 
-NEWS_OUT = RAW_DATA_DIR / "news.csv"
+def _http_session(pool_size: int = NEWS_MAX_WORKERS) -> requests.Session:
+    # One keep-alive pool shared by all workers instead of a fresh connection per issuer
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
 
-def _from_newsapi() -> pd.DataFrame:
-    headers = {"X-Api-Key": NEWS_API_KEY}
+def _newsapi_issuer(session: requests.Session, url: str, t: str, name: str, since: str) -> list:
+    rows = []
+    for page in range(1, NEWS_MAX_PAGES + 1):
+        params = {"q": f"\"{name}\"", "from": since, "language": "en", "pageSize": NEWS_PAGE_SIZE,
+                  "page": page, "sortBy": "publishedAt"}
+        resp = session.get(url, params=params, timeout=NEWS_TIMEOUT_SECONDS)
+        resp.raise_for_status()
+        payload = resp.json()
+        articles = payload.get("articles", [])
+        for a in articles:
+            rows.append({
+                "ticker": t,
+                "date": (a.get("publishedAt") or "")[:10],
+                "title": a.get("title", ""),
+                "source": (a.get("source") or {}).get("name", ""),
+            })
+        if len(articles) < NEWS_PAGE_SIZE or page * NEWS_PAGE_SIZE >= payload.get("totalResults", 0):
+            break
+    return rows
+
+def _from_newsapi(issuers=None, url: str = NEWSAPI_URL, max_workers: int = NEWS_MAX_WORKERS) -> pd.DataFrame:
+    issuers = issuers or ISSUERS
     since = (datetime.utcnow() - timedelta(days=7)).strftime("%Y-%m-%d")
     rows = []
-    for t, name in ISSUERS.items():
-        params = {"q": f"\"{name}\"", "from": since, "language": "en", "pageSize": 50, "sortBy": "publishedAt"}
-        try:
-            resp = requests.get("https://newsapi.org/v2/everything", headers=headers, params=params, timeout=15)
-            resp.raise_for_status()
-            articles = resp.json().get("articles", [])
-            for a in articles:
-                rows.append({
-                    "ticker": t,
-                    "date": a.get("publishedAt", "")[:10],
-                    "title": a.get("title", ""),
-                    "source": (a.get("source") or {}).get("name", ""),
-                })
-            logger.info(f"NewsAPI: {t} -> {len(articles)} articles")
-        except Exception as e:
-            logger.warning(f"NewsAPI failed for {t}: {e}")
+    with _http_session(max_workers) as session, ThreadPoolExecutor(max_workers=max_workers) as pool:
+        session.headers["X-Api-Key"] = NEWS_API_KEY
+        futures = {pool.submit(_newsapi_issuer, session, url, t, name, since): t for t, name in issuers.items()}
+        for fut in as_completed(futures):
+            t = futures[fut]
+            try:
+                got = fut.result()
+                rows.extend(got)
+                logger.info(f"NewsAPI: {t} -> {len(got)} articles")
+            except Exception as e:
+                logger.warning(f"NewsAPI failed for {t}: {e}")
     return pd.DataFrame(rows)
 
-def _from_yfinance_news() -> pd.DataFrame:
+def _yfinance_issuer(t: str) -> list:
+    rows = []
+    items = yf.Ticker(t).news or []
+    for a in items:
+        # yfinance news schema varies; be defensive
+        title = a.get("title") or ""
+        provider = a.get("provider") or ""
+        pub = a.get("providerPublishTime") or 0
+        date = datetime.utcfromtimestamp(pub).strftime("%Y-%m-%d") if pub else ""
+        if title:
+            rows.append({"ticker": t, "date": date, "title": title, "source": provider})
+    logger.info(f"yfinance.news: {t} -> {len(items)} items")
+    return rows
+
+def _from_yfinance_news(issuers=None, max_workers: int = NEWS_MAX_WORKERS) -> pd.DataFrame:
+    issuers = issuers or ISSUERS
     rows = []
-    for t in ISSUERS.keys():
-        try:
-            tk = yf.Ticker(t)
-            items = tk.news or []
-            for a in items:
-                # yfinance news schema varies; be defensive
-                title = a.get("title") or ""
-                provider = a.get("provider") or ""
-                pub = a.get("providerPublishTime") or 0
-                date = datetime.utcfromtimestamp(pub).strftime("%Y-%m-%d") if pub else ""
-                if title:
-                    rows.append({"ticker": t, "date": date, "title": title, "source": provider})
-            logger.info(f"yfinance.news: {t} -> {len(items)} items")
-        except Exception as e:
-            logger.warning(f"yfinance.news failed for {t}: {e}")
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(_yfinance_issuer, t): t for t in issuers.keys()}
+        for fut in as_completed(futures):
+            try:
+                rows.extend(fut.result())
+            except Exception as e:
+                logger.warning(f"yfinance.news failed for {futures[fut]}: {e}")
     return pd.DataFrame(rows)
 
-def _from_sample() -> pd.DataFrame:
+def _from_sample(issuers=None) -> pd.DataFrame:
+    issuers = issuers or ISSUERS
     sample = RAW_DATA_DIR / "sample_news.csv"
     if sample.exists():
         logger.info("Loading bundled sample_news.csv")
-        return pd.read_csv(sample)
+        df = pd.read_csv(sample)
+        return df[df["ticker"].isin(list(issuers))].reset_index(drop=True)
     logger.warning("No sample_news.csv found; creating a tiny placeholder dataset.")
     today = datetime.utcnow().strftime("%Y-%m-%d")
     rows = []
-    for t in ISSUERS.keys():
+    for t in issuers.keys():
         rows.append({"ticker": t, "date": today, "title": f"{t} announces quarterly results; outlook stable", "source": "Sample"})
     return pd.DataFrame(rows)
 
-def fetch_news():
+def fetch_news(issuers=None):
     RAW_DATA_DIR.mkdir(parents=True, exist_ok=True)
-    df = pd.DataFrame()
+    df, source = pd.DataFrame(), None
     if NEWS_API_KEY:
-        df = _from_newsapi()
+        with timed("news.fetch", source="newsapi"):
+            df, source = _from_newsapi(issuers), "newsapi"
     if df.empty:
-        df = _from_yfinance_news()
+        with timed("news.fetch", source="yfinance"):
+            df, source = _from_yfinance_news(issuers), "yfinance"
     if df.empty:
-        df = _from_sample()
+        df, source = _from_sample(issuers), "sample"
 
     # Cleanup
     df["title"] = df["title"].astype(str).str.strip()
     df["date"] = pd.to_datetime(df["date"], errors="coerce").dt.strftime("%Y-%m-%d")
     df = df.dropna(subset=["date", "title"]).drop_duplicates(subset=["ticker", "date", "title"])
-    df.to_csv(NEWS_OUT, index=False, encoding="utf-8")
-    logger.info(f"Saved news -> {NEWS_OUT} ({len(df)} rows)")
-    return NEWS_OUT
+    store = get_store()
+    store.write_table("news", df)
+    count("rows", len(df), stage="news", source=source)
+    out = store.table_path("news")
+    logger.info(f"Saved news -> {out} ({len(df)} rows)")
+    return out
 
 if __name__ == "__main__":
     fetch_news()
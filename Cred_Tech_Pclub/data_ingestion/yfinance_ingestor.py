@@ -1,36 +1,67 @@
-
-# data_ingestion/yfinance_ingestor.py
-import yfinance as yf
 import pandas as pd
-from datetime import datetime
-from pathlib import Path
-from config import RAW_DATA_DIR, DATA_START_DATE, ISSUERS, SECTOR_ETFS, MACRO_TICKERS, COMMODITY_TICKERS
+from datetime import datetime, timedelta
+from config import DATA_START_DATE, ISSUERS, SECTOR_ETFS, MACRO_TICKERS, COMMODITY_TICKERS, INCREMENTAL_INGEST
+from data_ingestion.batch_downloader import download_batches
 from utils.logging_utils import setup_logger
+from utils.metrics import count
+from utils.storage import get_store
 
 logger = setup_logger("yfinance_ingestor")
 
-def _download_one(ticker: str, start: str, end: str) -> pd.DataFrame:
-    df = yf.download(ticker, start=start, end=end, auto_adjust=False, progress=False)
-    if df is None or df.empty:
-        raise ValueError(f"No data for ticker {ticker}")
-    df = df.reset_index()
-    return df
+def _frame_bytes(df: pd.DataFrame) -> int:
+    return int(df.memory_usage(index=True, deep=True).sum()) if not df.empty else 0
 
-def fetch_yfinance_data():
-    all_tickers = list(ISSUERS.keys()) + list(SECTOR_ETFS.keys()) + list(MACRO_TICKERS.keys()) + list(COMMODITY_TICKERS.keys())
+def fetch_yfinance_data(tickers=None, incremental: bool = INCREMENTAL_INGEST, downloader=None) -> dict:
+    all_tickers = tickers or list(ISSUERS.keys()) + list(SECTOR_ETFS.keys()) + list(MACRO_TICKERS.keys()) + list(COMMODITY_TICKERS.keys())
     end = datetime.utcnow().strftime("%Y-%m-%d")
-    logger.info(f"Fetching {len(all_tickers)} tickers from {DATA_START_DATE} to {end}")
-    RAW_DATA_DIR.mkdir(parents=True, exist_ok=True)
+    mode = "incremental" if incremental else "full"
+    logger.info(f"Fetching {len(all_tickers)} tickers from {DATA_START_DATE} to {end} ({mode})")
+    store = get_store()
+
+    stored, starts = {}, {}
+    for t in all_tickers:
+        stored[t] = store.describe_series("prices", t) if incremental else {"rows": 0, "last_date": None, "bytes": 0}
+        start = DATA_START_DATE
+        if stored[t]["last_date"] is not None:
+            start = (stored[t]["last_date"] + timedelta(days=1)).strftime("%Y-%m-%d")
+        if start < end:
+            starts[t] = start
 
+    # Tickers we already hold may simply have no bars since the last run (weekend, holiday)
+    frames, report = download_batches(starts, end, downloader=downloader,
+                                      optional=[t for t in starts if stored[t]["rows"]])
+
+    stats = {}
     for t in all_tickers:
-        safe = t.replace("^", "").replace("=", "_").replace(".", "_")
-        out = RAW_DATA_DIR / f"{safe}.csv"
-        try:
-            df = _download_one(t, DATA_START_DATE, end)
-            df.to_csv(out, index=False, encoding="utf-8")
-            logger.info(f"Saved {t} -> {out.name} ({len(df)} rows)")
-        except Exception as e:
-            logger.warning(f"Failed to fetch {t}: {e}")
+        if t in report.failed and not stored[t]["rows"]:
+            continue
+        new = frames.get(t, pd.DataFrame())
+        stats[t] = {
+            "fetched_rows": len(new), "fetched_bytes": _frame_bytes(new),
+            "reused_rows": stored[t]["rows"], "reused_bytes": stored[t]["bytes"],
+        }
+        if new.empty:
+            logger.info(f"{t} up to date ({stored[t]['rows']} rows reused)")
+            continue
+
+        if incremental:
+            store.append_series("prices", t, new)
+        else:
+            store.write_series("prices", t, new)
+        logger.info(f"Saved {t} ({stored[t]['rows'] + len(new)} rows; fetched {len(new)}, reused {stored[t]['rows']})")
+
+    fetched_rows = sum(s["fetched_rows"] for s in stats.values())
+    reused_rows = sum(s["reused_rows"] for s in stats.values())
+    fetched_kb = sum(s["fetched_bytes"] for s in stats.values()) / 1024
+    reused_kb = sum(s["reused_bytes"] for s in stats.values()) / 1024
+    logger.info(f"Ingestion summary: fetched {fetched_rows} rows ({fetched_kb:.1f} KiB in memory), "
+                f"reused {reused_rows} rows ({reused_kb:.1f} KiB stored), {len(report.failed)} failed")
+    count("rows", fetched_rows, stage="prices", kind="fetched")
+    count("rows", reused_rows, stage="prices", kind="reused")
+    count("bytes", sum(s["fetched_bytes"] for s in stats.values()), stage="prices", kind="fetched")
+    count("bytes", sum(s["reused_bytes"] for s in stats.values()), stage="prices", kind="reused")
+    count("download_failures", len(report.failed), stage="prices")
+    return stats
 
 if __name__ == "__main__":
     fetch_yfinance_data()
@@ -0,0 +1,133 @@
+"""
+Panel feature engine: builds every issuer's feature matrix at once.
+
+Issuers that share the same trading calendar are stacked into wide date x ticker
+matrices, so returns, 30d volatility, momentum and the 50/200 SMAs are one rolling
+pass per indicator instead of one per issuer. Sector/macro/commodity closes and
+their returns are aligned to the calendar once and broadcast across issuers.
+
+The output per issuer is identical to structured_features._build_issuer_features:
+after ffill().bfill() a column is NaN only if it was entirely NaN, so the
+per-issuer dropna() either keeps every row or none, which the panel reproduces
+with a per-ticker mask.
+"""
+import numpy as np
+import pandas as pd
+
+from utils.storage import safe_name
+
+INDICATORS = ["returns", "volatility_30d", "momentum_5d", "momentum_20d", "sma_50", "sma_200"]
+
+
+def _price_col(ticker: str, base: pd.DataFrame) -> str:
+    safe = safe_name(ticker)
+    return f"{safe}_AdjClose" if f"{safe}_AdjClose" in base.columns else f"{safe}_Close"
+
+
+def _calendar_groups(bases: dict) -> list:
+    """Group tickers whose Date index is identical; each group is computed as one panel."""
+    groups = {}
+    for t, base in bases.items():
+        idx = base.index
+        key = (len(idx), idx[0], idx[-1])
+        for g_idx, members in groups.get(key, []):
+            if g_idx.equals(idx):
+                members.append(t)
+                break
+        else:
+            groups.setdefault(key, []).append((idx, [t]))
+    return [g for bucket in groups.values() for g in bucket]
+
+
+def _returns(s: pd.Series) -> pd.Series:
+    return s.pct_change().clip(-0.3, 0.3).fillna(0)
+
+
+def _build_group(dates: pd.DatetimeIndex, tickers: list, bases: dict, context: list, sentiment: dict) -> dict:
+    # Wide price matrix and every indicator in one vectorized pass
+    prices = pd.DataFrame({t: bases[t][_price_col(t, bases[t])] for t in tickers}, index=dates)
+    rets = prices.pct_change()
+    ind = {
+        "returns": rets,
+        "volatility_30d": rets.rolling(30).std() * np.sqrt(252),
+        "momentum_5d": prices.pct_change(5),
+        "momentum_20d": prices.pct_change(20),
+        "sma_50": prices.rolling(50).mean(),
+        "sma_200": prices.rolling(200).mean(),
+    }
+    filled = {k: v.ffill().bfill() for k, v in ind.items()}
+
+    # Raw issuer columns (Open/High/...), stacked per field so they are filled in one call too
+    raw = {}
+    for t in tickers:
+        for col in bases[t].columns:
+            raw.setdefault(col[len(safe_name(t)) + 1:], {})[t] = bases[t][col]
+    raw = {f: pd.DataFrame(cols, index=dates).ffill().bfill() for f, cols in raw.items()}
+
+    # Shared context, aligned and filled once for the whole group
+    ctx = pd.concat([df.reindex(dates) for df in context], axis=1) if context else pd.DataFrame(index=dates)
+    ctx = ctx.loc[:, ~ctx.columns.duplicated()].ffill().bfill()
+    ctx_ok = not ctx.isna().all().any()
+    zero = pd.Series(0.0, index=dates)
+    rets_by_prefix = {}
+    for prefix in ("sector_", "macro_", "comm_"):
+        cols = [c for c in ctx.columns if c.startswith(prefix) and (c.endswith("AdjClose") or c.endswith("Close"))]
+        rets_by_prefix[prefix] = ctx[cols].mean(axis=1).pipe(_returns) if cols else zero
+
+    vol = filled["volatility_30d"].clip(lower=0, upper=0.8).fillna(0)
+    mom20 = filled["momentum_20d"].clip(-0.5, 0.5).fillna(0)
+    mom5 = filled["momentum_5d"].clip(-0.5, 0.5).fillna(0)
+    score = (
+        (65 - 60 * vol + 25 * mom20 + 10 * mom5)
+        .add(10 * rets_by_prefix["sector_"], axis=0)
+        .add(5 * rets_by_prefix["macro_"], axis=0)
+        .sub(8 * rets_by_prefix["comm_"], axis=0)
+    ).clip(0, 100)
+
+    sent = pd.DataFrame({t: sentiment[t]["avg_sentiment_score"].reindex(dates) for t in tickers if t in sentiment},
+                        index=dates).fillna(0.0)
+    if not sent.empty:
+        adj = sent.columns
+        score[adj] = (score[adj] + 5 * sent).clip(0, 100)
+
+    # Mirrors dropna() on a frame with an all-NaN column: such issuers keep no rows
+    empty = pd.Series(not ctx_ok, index=tickers)
+    for m in list(filled.values()) + list(raw.values()):
+        empty |= m.isna().all().reindex(tickers, fill_value=False)
+
+    # Unpack from plain arrays; per-column pandas indexing dominates otherwise
+    pos = {t: i for i, t in enumerate(tickers)}
+    ind_np = {k: v.to_numpy() for k, v in filled.items()}
+    raw_np = {f: (m.to_numpy(), {t: i for i, t in enumerate(m.columns)}) for f, m in raw.items()}
+    ctx_np = {c: ctx[c].to_numpy() for c in ctx.columns}
+    score_np = score.to_numpy()
+    sent_np = {t: sent[t].to_numpy() for t in sent.columns}
+
+    out = {}
+    for t in tickers:
+        safe = safe_name(t)
+        j = pos[t]
+        cols = {}
+        for c in bases[t].columns:
+            arr, where = raw_np[c[len(safe) + 1:]]
+            cols[c] = arr[:, where[t]].astype(bases[t][c].dtype, copy=False)
+        cols.update({k: ind_np[k][:, j] for k in INDICATORS})
+        cols.update(ctx_np)
+        cols["credit_score"] = score_np[:, j]
+        cols["avg_sentiment_score"] = sent_np.get(t, 0.0)
+        feat = pd.DataFrame(cols, index=dates)
+        out[t] = feat.iloc[0:0] if empty[t] else feat
+    return out
+
+
+def build_panel_features(bases: dict, context: list, sentiment: dict) -> dict:
+    """
+    ``bases`` maps issuer -> prefixed price frame (as from structured_features._load_prices),
+    ``context`` is the list of prefixed context close frames and ``sentiment`` maps
+    issuer -> Date-indexed avg_sentiment_score. Returns issuer -> feature frame.
+    """
+    out = {}
+    usable = {t: b for t, b in bases.items() if not b.empty and b.index.is_monotonic_increasing and b.index.is_unique}
+    for dates, tickers in _calendar_groups(usable):
+        out.update(_build_group(dates, tickers, usable, context, sentiment))
+    return out
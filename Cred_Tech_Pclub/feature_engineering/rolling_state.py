@@ -0,0 +1,219 @@
+"""
+Incremental feature state: per-ticker running sums so a new daily bar updates
+returns, 30d volatility, 5d/20d momentum and the 50/200 SMAs in O(1).
+
+The state keeps the last 201 prices and 30 returns in ring buffers plus running
+sums (and sum of squares for volatility). Sums are re-derived from the buffers
+every RESYNC_EVERY updates so floating-point drift stays bounded. It also keeps
+the last emitted feature row, which is what forward-fill would carry over for
+missing inputs.
+
+It only moves forward: revised historical bars are picked up by a full rebuild
+(FEATURE_UPDATE_MODE = "full"). Late-arriving sentiment for already emitted
+dates only shifts avg_sentiment_score and credit_score, which the incremental
+update rewrites in place (structured_features._revise_sentiment).
+"""
+import json
+import math
+from collections import deque
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+from config import PROCESSED_DATA_DIR
+from utils.storage import safe_name
+
+STATE_DIR = PROCESSED_DATA_DIR / "feature_state"
+PRICE_WINDOW = 201          # sma_200 plus one more price for the oldest return
+RET_WINDOW = 30
+RESYNC_EVERY = 250
+_SQRT_252 = np.sqrt(252)
+_CONTEXT_PREFIXES = ("sector_", "macro_", "comm_")
+
+
+def _clip(x: float, lo: float, hi: float) -> float:
+    # NaN passes through, like pandas clip; callers apply fillna(0) explicitly
+    return x if math.isnan(x) else min(max(x, lo), hi)
+
+
+def _nz(x: float) -> float:
+    return 0.0 if math.isnan(x) else x
+
+
+class RollingFeatureState:
+    def __init__(self, ticker: str, price_col: str, columns: list, last_row: dict, last_date,
+                 prices=(), returns=(), dtypes=None):
+        self.ticker = ticker
+        self.price_col = price_col
+        self.columns = list(columns)
+        self.dtypes = dict(dtypes or {})
+        self.last_row = dict(last_row)
+        self.last_date = pd.Timestamp(last_date)
+        self.prices = deque(prices, maxlen=PRICE_WINDOW)
+        self.returns = deque(returns, maxlen=RET_WINDOW)
+        self.ctx_cols = {p: [c for c in self.columns if c.startswith(p) and (c.endswith("AdjClose") or c.endswith("Close"))]
+                         for p in _CONTEXT_PREFIXES}
+        self._resync()
+
+    @property
+    def warm(self) -> bool:
+        return len(self.prices) == PRICE_WINDOW and len(self.returns) == RET_WINDOW
+
+    def _resync(self):
+        p = list(self.prices)
+        self.sum50 = math.fsum(p[-50:])
+        self.sum200 = math.fsum(p[-200:])
+        self.ret_sum = math.fsum(self.returns)
+        self.ret_sumsq = math.fsum(r * r for r in self.returns)
+        self.updates = 0
+
+    @classmethod
+    def from_history(cls, ticker: str, feat: pd.DataFrame, prices: pd.Series) -> "RollingFeatureState":
+        """Seed from a fully built feature frame and the price series it was built from."""
+        prices = prices.dropna()
+        tail = prices.iloc[-PRICE_WINDOW:].tolist()
+        rets = prices.pct_change().iloc[-RET_WINDOW:].tolist()
+        last = {c: float(v) for c, v in feat.iloc[-1].items()}
+        dtypes = {c: str(t) for c, t in feat.dtypes.items()}
+        return cls(ticker, prices.name, feat.columns, last, feat.index[-1], tail, rets, dtypes)
+
+    def _ctx_mean(self, row: dict, prefix: str) -> float:
+        cols = self.ctx_cols[prefix]
+        vals = [row[c] for c in cols if not math.isnan(row[c])]
+        return sum(vals) / len(vals) if vals else float("nan")
+
+    def _advance(self, price: float) -> dict:
+        """Buffers' running values after appending ``price`` (nothing is changed)."""
+        p50_out = self.prices[-50] if len(self.prices) >= 50 else 0.0
+        p200_out = self.prices[-200] if len(self.prices) >= 200 else 0.0
+        ret = price / self.prices[-1] - 1
+        r_out = self.returns[0] if len(self.returns) == RET_WINDOW else 0.0
+        return {"price": price, "ret": ret,
+                "mom5": price / self.prices[-5] - 1, "mom20": price / self.prices[-20] - 1,
+                "sum50": self.sum50 + (price - p50_out), "sum200": self.sum200 + (price - p200_out),
+                "ret_sum": self.ret_sum + (ret - r_out), "ret_sumsq": self.ret_sumsq + (ret * ret - r_out * r_out)}
+
+    def _row(self, bar: dict, context: dict, sentiment: float, adv: dict = None) -> dict:
+        """Feature row for ``bar`` given the buffers' values ``adv`` (None: the bar has no price)."""
+        prev = self.last_row
+        row = {}
+        for c in self.columns:
+            v = bar.get(c, context.get(c, np.nan) if context else np.nan)
+            row[c] = prev[c] if v is None or (isinstance(v, float) and math.isnan(v)) else float(v)
+
+        # A bar without a price carries the previous indicators forward, like ffill
+        if adv is not None:
+            n = RET_WINDOW
+            var = max((adv["ret_sumsq"] - adv["ret_sum"] * adv["ret_sum"] / n) / (n - 1), 0.0)
+            row.update({
+                "returns": adv["ret"],
+                "volatility_30d": math.sqrt(var) * _SQRT_252,
+                "momentum_5d": adv["mom5"],
+                "momentum_20d": adv["mom20"],
+                "sma_50": adv["sum50"] / 50,
+                "sma_200": adv["sum200"] / 200,
+            })
+
+        def ctx_ret(prefix):
+            if not self.ctx_cols[prefix]:
+                return 0.0
+            before, now = self._ctx_mean(prev, prefix), self._ctx_mean(row, prefix)
+            return _nz(_clip(now / before - 1, -0.3, 0.3))
+
+        score = (
+            65
+            - 60 * _nz(_clip(row["volatility_30d"], 0, 0.8))
+            + 25 * _nz(_clip(row["momentum_20d"], -0.5, 0.5))
+            + 10 * _nz(_clip(row["momentum_5d"], -0.5, 0.5))
+            + 10 * ctx_ret("sector_")
+            + 5 * ctx_ret("macro_")
+            - 8 * ctx_ret("comm_")
+        )
+        sentiment = _nz(float(sentiment))
+        row["avg_sentiment_score"] = sentiment
+        row["credit_score"] = _clip(_clip(score, 0, 100) + 5 * sentiment, 0, 100)
+        return row
+
+    @staticmethod
+    def _price(bar: dict, price_col: str):
+        price = bar.get(price_col)
+        return None if price is None or math.isnan(price) else float(price)
+
+    def peek(self, bar: dict, context: dict = None, sentiment: float = 0.0) -> dict:
+        """The row ``update`` would return for ``bar``, without applying it (e.g. an intraday bar)."""
+        price = self._price(bar, self.price_col)
+        return self._row(bar, context, sentiment, None if price is None else self._advance(price))
+
+    def update(self, date, bar: dict, context: dict = None, sentiment: float = 0.0) -> dict:
+        """
+        Apply one bar and return the new feature row.
+        ``bar`` holds the issuer's raw columns (prefixed as in the feature frame) and
+        ``context`` the sector/macro/commodity closes for the same date; missing or NaN
+        entries carry the previous value forward.
+        """
+        price = self._price(bar, self.price_col)
+        adv = None
+        if price is not None:
+            adv = self._advance(price)
+            self.prices.append(price)
+            self.returns.append(adv["ret"])
+            self.sum50, self.sum200 = adv["sum50"], adv["sum200"]
+            self.ret_sum, self.ret_sumsq = adv["ret_sum"], adv["ret_sumsq"]
+            self.updates += 1
+            if self.updates >= RESYNC_EVERY:
+                self._resync()
+                adv.update(sum50=self.sum50, sum200=self.sum200, ret_sum=self.ret_sum, ret_sumsq=self.ret_sumsq)
+        row = self._row(bar, context, sentiment, adv)
+
+        self.last_row = row
+        self.last_date = pd.Timestamp(date)
+        return row
+
+    def to_dict(self) -> dict:
+        return {"ticker": self.ticker, "price_col": self.price_col, "columns": self.columns,
+                "last_row": self.last_row, "last_date": self.last_date.strftime("%Y-%m-%d"),
+                "prices": list(self.prices), "returns": list(self.returns), "dtypes": self.dtypes}
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "RollingFeatureState":
+        return cls(d["ticker"], d["price_col"], d["columns"], d["last_row"], d["last_date"],
+                   d["prices"], d["returns"], d.get("dtypes"))
+
+
+def _state_path(ticker: str, state_dir: Path = None) -> Path:
+    return Path(state_dir or STATE_DIR) / f"{safe_name(ticker)}.json"
+
+
+def load_state(ticker: str, state_dir: Path = None):
+    path = _state_path(ticker, state_dir)
+    if not path.exists():
+        return None
+    with open(path, encoding="utf-8") as f:
+        return RollingFeatureState.from_dict(json.load(f))
+
+
+def save_state(state: RollingFeatureState, state_dir: Path = None):
+    path = _state_path(state.ticker, state_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        # NaN is allowed by Python's json and round-trips through json.load
+        json.dump(state.to_dict(), f)
+
+
+def apply_new_bars(state: RollingFeatureState, bars: pd.DataFrame, context: pd.DataFrame = None,
+                   sentiment: pd.Series = None) -> pd.DataFrame:
+    """Update ``state`` with every bar after its last date and return just the new feature rows."""
+    bars = bars.loc[bars.index > state.last_date].sort_index()
+    rows = []
+    for date, bar in zip(bars.index, bars.to_dict("records")):
+        ctx = context.loc[date].to_dict() if context is not None and date in context.index else None
+        sent = sentiment.get(date, 0.0) if sentiment is not None else 0.0
+        rows.append(state.update(date, bar, ctx, sent))
+    if not rows:
+        return pd.DataFrame(columns=state.columns)
+    out = pd.DataFrame(rows, index=pd.DatetimeIndex(bars.index, name="Date"))[state.columns]
+    # Per-column casts; a dict astype rebuilds every column of the frame
+    for c, t in state.dtypes.items():
+        if c in out.columns and str(out[c].dtype) != t:
+            out[c] = out[c].astype(t)
+    return out
@@ -0,0 +1,118 @@
+"""
+Persistent headline sentiment cache.
+
+Scores live in a small SQLite file keyed by a hash of the model id
+("name@version") and the normalized headline, so a headline is scored once per
+model and later runs only send the daily delta to the model. Entries carry a
+last-used timestamp and the least recently used ones are evicted once the
+cache grows past its size limit.
+"""
+import hashlib
+import sqlite3
+import time
+import unicodedata
+from importlib import metadata
+from pathlib import Path
+
+from config import SENTIMENT_CACHE_PATH, SENTIMENT_CACHE_MAX_ENTRIES
+from utils.logging_utils import setup_logger
+from utils.metrics import count
+
+logger = setup_logger("sentiment_cache")
+
+# SQLite's default limit on bound parameters is 999 on older builds
+_CHUNK = 900
+
+
+def normalize_title(text) -> str:
+    """NFKC, collapsed whitespace, and the 512-char cut the scorers apply anyway."""
+    text = unicodedata.normalize("NFKC", "" if text is None else str(text))
+    return " ".join(text.split())[:512]
+
+
+def model_id(name: str, package: str) -> str:
+    """Model name plus the installed version of the library that runs it."""
+    try:
+        version = metadata.version(package)
+    except metadata.PackageNotFoundError:
+        version = "unknown"
+    return f"{name}@{package}-{version}"
+
+
+def _key(model: str, norm: str) -> str:
+    return hashlib.blake2b(f"{model}\x00{norm}".encode("utf-8"), digest_size=16).hexdigest()
+
+
+class SentimentCache:
+    def __init__(self, path: Path = SENTIMENT_CACHE_PATH, max_entries: int = SENTIMENT_CACHE_MAX_ENTRIES):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS scores ("
+            " key TEXT PRIMARY KEY, model TEXT NOT NULL, score REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS scores_last_used ON scores(last_used)")
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM scores").fetchone()[0]
+
+    def get_many(self, keys: list) -> dict:
+        found = {}
+        for i in range(0, len(keys), _CHUNK):
+            chunk = keys[i:i + _CHUNK]
+            marks = ",".join("?" * len(chunk))
+            found.update(self.conn.execute(f"SELECT key, score FROM scores WHERE key IN ({marks})", chunk))
+        if found:
+            now = time.time()
+            self.conn.executemany("UPDATE scores SET last_used = ? WHERE key = ?", [(now, k) for k in found])
+            self.conn.commit()
+        return found
+
+    def put_many(self, model: str, items: dict) -> int:
+        """Store ``{key: score}`` and evict beyond ``max_entries``; returns the number evicted."""
+        now = time.time()
+        self.conn.executemany("INSERT OR REPLACE INTO scores VALUES (?, ?, ?, ?)",
+                              [(k, model, float(s), now) for k, s in items.items()])
+        evicted = 0
+        excess = len(self) - self.max_entries
+        if excess > 0:
+            evicted = self.conn.execute(
+                "DELETE FROM scores WHERE key IN (SELECT key FROM scores ORDER BY last_used LIMIT ?)", (excess,)
+            ).rowcount
+        self.conn.commit()
+        return evicted
+
+    def score(self, texts: list, scorer, model: str) -> list:
+        """
+        Scores for ``texts``, sending only uncached distinct headlines to ``scorer``
+        (a callable taking a list of strings). Errors from ``scorer`` propagate and
+        nothing is cached for that call.
+        """
+        norms = [normalize_title(t) for t in texts]
+        keys = [_key(model, n) for n in norms]
+        known = self.get_many(list(dict.fromkeys(keys)))
+
+        todo = {}
+        for k, n in zip(keys, norms):
+            if k not in known:
+                todo.setdefault(k, n)
+        evicted = 0
+        if todo:
+            fresh = dict(zip(todo, scorer(list(todo.values()))))
+            evicted = self.put_many(model, fresh)
+            known.update(fresh)
+
+        hits = sum(k not in todo for k in keys)
+        count("cache_hits", hits, cache="sentiment")
+        count("cache_misses", len(keys) - hits, cache="sentiment")
+        count("cache_evictions", evicted, cache="sentiment")
+        logger.info(f"Sentiment cache [{model}]: {hits} hits, {len(keys) - hits} misses "
+                    f"({len(todo)} distinct scored), {evicted} evicted")
+        return [known[k] for k in keys]
@@ -0,0 +1,125 @@
+"""
+Long-lived transformer sentiment inference.
+
+A SentimentEngine loads its tokenizer and model once per process, on first use,
+so importing this module never imports transformers or torch. Headlines are
+tokenized once, sorted by token length and cut into dynamic batches bounded by
+SENTIMENT_BATCH_SIZE rows and SENTIMENT_MAX_BATCH_TOKENS padded tokens, which
+keeps padding (and wasted compute) small. Forward passes run under
+torch.inference_mode with an explicit intra-op thread count.
+
+The tokenizer/model pair comes from a backend factory; the default one wraps
+Hugging Face transformers, and benchmarks plug in a pure-Python stub.
+"""
+import threading
+import time
+
+from config import SENTIMENT_BATCH_SIZE, SENTIMENT_MAX_BATCH_TOKENS, SENTIMENT_NUM_THREADS
+from utils.logging_utils import setup_logger
+
+logger = setup_logger("sentiment_engine")
+
+# Signed value of each class label; the score is that value times the top-class probability
+LABEL_VALUES = {"positive": 1.0, "neutral": 0.0, "negative": -1.0}
+
+
+class TransformersBackend:
+    """Tokenizer + sequence classifier from the Hugging Face hub (or a local path)."""
+
+    def __init__(self, model_name: str, num_threads: int = SENTIMENT_NUM_THREADS):
+        import torch
+        from transformers import AutoTokenizer, AutoModelForSequenceClassification
+        torch.set_num_threads(max(1, num_threads))
+        self.torch = torch
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.model = AutoModelForSequenceClassification.from_pretrained(model_name).eval()
+        self.labels = [self.model.config.id2label[i].lower() for i in range(self.model.config.num_labels)]
+        # Models whose tokenizers share a vocabulary (FinBERT and uncased BERTs) can share token ids
+        self.vocab_key = hash(tuple(sorted(self.tokenizer.get_vocab().items())))
+
+    def tokenize(self, texts: list) -> list:
+        return self.tokenizer(texts, truncation=True, max_length=512)["input_ids"]
+
+    def predict(self, ids: list) -> list:
+        """Top (label, probability) per row of token ids."""
+        batch = self.tokenizer.pad({"input_ids": ids}, return_tensors="pt")
+        with self.torch.inference_mode():
+            probs = self.model(**batch).logits.softmax(dim=-1)
+        top = probs.max(dim=-1)
+        return [(self.labels[i], float(p)) for i, p in zip(top.indices.tolist(), top.values.tolist())]
+
+
+def length_batches(lengths: list, batch_size: int = SENTIMENT_BATCH_SIZE,
+                   max_tokens: int = SENTIMENT_MAX_BATCH_TOKENS) -> list:
+    """Positions grouped into batches of similar length; each batch is padded to its longest row."""
+    order = sorted(range(len(lengths)), key=lengths.__getitem__)
+    batches, cur = [], []
+    for i in order:
+        # Sorted ascending, so the newcomer is the longest row of the batch
+        if cur and (len(cur) >= batch_size or (len(cur) + 1) * lengths[i] > max_tokens):
+            batches.append(cur)
+            cur = []
+        cur.append(i)
+    if cur:
+        batches.append(cur)
+    return batches
+
+
+class SentimentEngine:
+    def __init__(self, model_name: str, backend_factory=TransformersBackend,
+                 batch_size: int = SENTIMENT_BATCH_SIZE, max_tokens: int = SENTIMENT_MAX_BATCH_TOKENS):
+        self.model_name = model_name
+        self.backend_factory = backend_factory
+        self.batch_size = batch_size
+        self.max_tokens = max_tokens
+        self._backend = None
+        self._lock = threading.Lock()
+        self.last_stats = {}
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            with self._lock:
+                if self._backend is None:
+                    t0 = time.perf_counter()
+                    self._backend = self.backend_factory(self.model_name)
+                    logger.info(f"Loaded {self.model_name} in {time.perf_counter() - t0:.1f}s")
+        return self._backend
+
+    def tokenize(self, texts: list) -> list:
+        return self.backend.tokenize([str(t)[:512] for t in texts])
+
+    def score(self, texts: list, ids: list = None) -> list:
+        """
+        Signed sentiment in [-1, 1] per text, in input order. ``ids`` may carry token
+        ids from another engine with the same ``vocab_key`` to skip tokenization.
+        """
+        if not texts:
+            return []
+        backend = self.backend
+        t0 = time.perf_counter()
+        if ids is None:
+            ids = self.tokenize(texts)
+        batches = length_batches([len(x) for x in ids], self.batch_size, self.max_tokens)
+        scores = [0.0] * len(texts)
+        for batch in batches:
+            for i, (label, prob) in zip(batch, backend.predict([ids[i] for i in batch])):
+                scores[i] = LABEL_VALUES.get(label, 0.0) * prob
+        elapsed = time.perf_counter() - t0
+        self.last_stats = {"headlines": len(texts), "batches": len(batches), "seconds": elapsed,
+                           "per_second": len(texts) / elapsed if elapsed else float("inf")}
+        logger.info(f"{self.model_name}: {len(texts)} headlines in {elapsed:.2f}s "
+                    f"({self.last_stats['per_second']:.0f}/s, {len(batches)} batches)")
+        return scores
+
+
+_ENGINES = {}
+_ENGINES_LOCK = threading.Lock()
+
+
+def get_engine(model_name: str, backend_factory=TransformersBackend) -> SentimentEngine:
+    """Process-wide engine per model; the model itself loads on the first ``score`` call."""
+    with _ENGINES_LOCK:
+        if model_name not in _ENGINES:
+            _ENGINES[model_name] = SentimentEngine(model_name, backend_factory)
+        return _ENGINES[model_name]
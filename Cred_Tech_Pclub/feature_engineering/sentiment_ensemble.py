@@ -0,0 +1,98 @@
+"""
+Weighted FinBERT + BERT + VADER sentiment ensemble (ENABLE_NLP_ENSEMBLE, NLP_WEIGHTS).
+
+VADER runs on a worker thread and streams its scores chunk by chunk while the
+calling thread runs the transformer engines, one batch after another, on the
+headlines of each finished chunk. Headlines where VADER is already confident
+(|compound| >= NLP_VADER_SKIP_THRESHOLD) keep VADER's score and never reach the
+transformers. When both transformers share a vocabulary the headlines are
+tokenized once and the ids reused.
+"""
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from config import NLP_WEIGHTS, NLP_VADER_SKIP_THRESHOLD
+from utils.logging_utils import setup_logger
+
+logger = setup_logger("sentiment_ensemble")
+
+CHUNK_SIZE = 512
+
+
+class EnsembleScorer:
+    def __init__(self, engines: dict, vader, weights: dict = None, skip_threshold=NLP_VADER_SKIP_THRESHOLD,
+                 chunk_size: int = CHUNK_SIZE):
+        """
+        ``engines`` maps a weight name ("finbert", "bert") to a SentimentEngine and
+        ``vader`` is a callable scoring a list of texts. Errors from any model propagate,
+        so a partial ensemble is never returned.
+        """
+        weights = NLP_WEIGHTS if weights is None else weights
+        self.engines = {k: e for k, e in engines.items() if weights.get(k, 0) > 0}
+        self.vader = vader
+        self.weights = weights
+        self.skip_threshold = skip_threshold
+        self.chunk_size = chunk_size
+        self.last_stats = {}
+
+    def _shared_vocab(self) -> bool:
+        keys = {getattr(e.backend, "vocab_key", None) for e in self.engines.values()}
+        return len(self.engines) > 1 and None not in keys and len(keys) == 1
+
+    def __call__(self, texts: list) -> list:
+        texts = list(texts)
+        latency = {"vader": 0.0, **{k: 0.0 for k in self.engines}}
+        # Unbounded so the producer never blocks if the consumer fails part way
+        chunks = queue.Queue()
+
+        def vader_chunks():
+            try:
+                for lo in range(0, len(texts), self.chunk_size):
+                    t0 = time.perf_counter()
+                    scores = self.vader(texts[lo:lo + self.chunk_size])
+                    latency["vader"] += time.perf_counter() - t0
+                    chunks.put((lo, scores))
+            finally:
+                chunks.put(None)
+
+        w_vader = self.weights.get("vader", 0.0)
+        out = [0.0] * len(texts)
+        skipped = 0
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            producer = pool.submit(vader_chunks)
+            # First use loads the models while VADER works through the first chunk
+            share = self._shared_vocab()
+            while (item := chunks.get()) is not None:
+                lo, vader = item
+                todo = [i for i, v in enumerate(vader)
+                        if self.skip_threshold is None or abs(v) < self.skip_threshold]
+                skipped += len(vader) - len(todo)
+                for i, v in enumerate(vader):
+                    out[lo + i] = v
+                if not todo or not self.engines:
+                    continue
+                sub = [texts[lo + i] for i in todo]
+                ids = None
+                if share:
+                    t0 = time.perf_counter()
+                    ids = next(iter(self.engines.values())).tokenize(sub)
+                    latency["tokenize"] = latency.get("tokenize", 0.0) + time.perf_counter() - t0
+                total = {i: w_vader * vader[i] for i in todo}
+                for name, engine in self.engines.items():
+                    t0 = time.perf_counter()
+                    scores = engine.score(sub, ids)
+                    latency[name] += time.perf_counter() - t0
+                    for i, s in zip(todo, scores):
+                        total[i] += self.weights[name] * s
+                norm = w_vader + sum(self.weights[k] for k in self.engines)
+                for i in todo:
+                    out[lo + i] = total[i] / norm
+            producer.result()
+
+        self.last_stats = {"headlines": len(texts), "skipped": skipped / len(texts) if texts else 0.0,
+                           "latency": latency}
+        timing = ", ".join(f"{k}={v:.2f}s" for k, v in latency.items())
+        logger.info(f"Ensemble: {len(texts)} headlines, {self.last_stats['skipped']:.0%} skipped the "
+                    f"transformers (VADER confident); per-model time {timing}")
+        return out
@@ -4,28 +4,22 @@ import pandas as pd
 import numpy as np
 from pathlib import Path
 from utils.logging_utils import setup_logger
-from config import RAW_DATA_DIR, PROCESSED_DATA_DIR, ISSUERS, SECTOR_ETFS, MACRO_TICKERS, COMMODITY_TICKERS
+from utils.metrics import timed, count
+from utils.storage import get_store, safe_name
+from feature_engineering.panel_features import build_panel_features, _price_col
+from feature_engineering.rolling_state import RollingFeatureState, load_state, save_state, apply_new_bars
+from config import ISSUERS, SECTOR_ETFS, MACRO_TICKERS, COMMODITY_TICKERS, FEATURE_ENGINE, FEATURE_UPDATE_MODE
 
 logger = setup_logger("structured_features")
 
-def _load_csv(ticker: str) -> pd.DataFrame:
-    safe = ticker.replace("^", "").replace("=", "_").replace(".", "_")
-    path = RAW_DATA_DIR / f"{safe}.csv"
-    if not path.exists():
-        logger.warning(f"Missing {path.name}")
+def _load_prices(ticker: str, start=None) -> pd.DataFrame:
+    safe = safe_name(ticker)
+    df = get_store().read_series("prices", ticker, start=start)
+    if df.empty:
+        if start is None:
+            logger.warning(f"Missing price data for {ticker}")
         return pd.DataFrame()
-    
-    # Load with Date parsing
-    df = pd.read_csv(path, parse_dates=["Date"])
-    
-    # Force numeric for all non-Date columns
-    for col in df.columns:
-        if col != "Date":
-            df[col] = pd.to_numeric(df[col], errors="coerce")
-    
-    # Set Date as index
-    df = df.set_index("Date")
-    
+
     # Rename columns to include ticker prefix
     df = df.rename(columns={c: f"{safe}_{c.replace(' ', '')}" for c in df.columns})
     
@@ -42,107 +36,180 @@ def _tech_indicators(df: pd.DataFrame, price_col: str) -> pd.DataFrame:
     df["sma_200"] = df[price_col].rolling(200).mean()
     return df
 
-def process_structured_and_build_features():
-    PROCESSED_DATA_DIR.mkdir(parents=True, exist_ok=True)
-
-    # Load bases
-    bases = {t: _load_csv(t) for t in list(ISSUERS.keys()) + list(SECTOR_ETFS.keys()) + list(MACRO_TICKERS.keys()) + list(COMMODITY_TICKERS.keys())}
-    # Build features per issuer
-    for t in ISSUERS.keys():
-        safe = t.replace("^", "").replace("=", "_").replace(".", "_")
-        base = bases.get(t, pd.DataFrame()).copy()
-        if base.empty:
-            logger.warning(f"No base price data for {t}; skipping feature build.")
-            continue
-
-        # issuer indicators
-        price_col = f"{safe}_AdjClose" if f"{safe}_AdjClose" in base.columns else f"{safe}_Close"
-        base = _tech_indicators(base, price_col)
-
-        # joins (outer join then forward/backward fill)
-        feat = base.copy()
-        for sec_t in SECTOR_ETFS.keys():
-            df = bases.get(sec_t, pd.DataFrame())
-            if not df.empty:
-                feat = feat.join(df[[c for c in df.columns if c.endswith("AdjClose") or c.endswith("Close")]].add_prefix("sector_"), how="left")
-        for m in MACRO_TICKERS.keys():
-            df = bases.get(m, pd.DataFrame())
-            if not df.empty:
-                feat = feat.join(df[[c for c in df.columns if c.endswith("AdjClose") or c.endswith("Close")]].add_prefix("macro_"), how="left")
-        for cm in COMMODITY_TICKERS.keys():
-            df = bases.get(cm, pd.DataFrame())
+def _context_closes(bases: dict) -> list:
+    """Close/AdjClose columns of every sector, macro and commodity series, prefixed for joining."""
+    out = []
+    for prefix, tickers in (("sector_", SECTOR_ETFS), ("macro_", MACRO_TICKERS), ("comm_", COMMODITY_TICKERS)):
+        for ct in tickers.keys():
+            df = bases.get(ct, pd.DataFrame())
             if not df.empty:
-                feat = feat.join(df[[c for c in df.columns if c.endswith("AdjClose") or c.endswith("Close")]].add_prefix("comm_"), how="left")
-
-        # Drop duplicate columns if any
-        feat = feat.loc[:, ~feat.columns.duplicated()]
-
-        # Fill and clean
-        feat = feat.sort_index().ffill().bfill()
-        feat = feat.dropna()
-
-        # Synthetic credit score (demonstration)
-        # Lower volatility, higher momentum, positive sector/macro help score; high crude hurts many sectors.
-        # Normalize some inputs for stability
-        vol = feat["volatility_30d"].clip(lower=0, upper=0.8).fillna(0)
-        mom20 = feat["momentum_20d"].clip(-0.5, 0.5).fillna(0)
-        mom5 = feat["momentum_5d"].clip(-0.5, 0.5).fillna(0)
-
-        # sector/macro/commodity returns
-        sec_cols = [c for c in feat.columns if c.startswith("sector_") and (c.endswith("AdjClose") or c.endswith("Close"))]
-        mac_cols = [c for c in feat.columns if c.startswith("macro_") and (c.endswith("AdjClose") or c.endswith("Close"))]
-        com_cols = [c for c in feat.columns if c.startswith("comm_") and (c.endswith("AdjClose") or c.endswith("Close"))]
-        def ret(s): 
-            r = s.pct_change().clip(-0.3, 0.3).fillna(0)
-            return r
-
-        sec_ret = feat[sec_cols].mean(axis=1).pipe(ret) if sec_cols else pd.Series(0.0, index=feat.index)
-        mac_ret = feat[mac_cols].mean(axis=1).pipe(ret) if mac_cols else pd.Series(0.0, index=feat.index)
-        com_ret = feat[com_cols].mean(axis=1).pipe(ret) if com_cols else pd.Series(0.0, index=feat.index)
-
-        # sentiment will be joined later
-
-
-        # Combine linear function -> [0,100]
-        score = (
-            65
-            - 60 * vol
-            + 25 * mom20
-            + 10 * mom5
-            + 10 * sec_ret
-            + 5 * mac_ret
-            - 8 * com_ret
-        )
-        score = (score.clip(0, 100)).rename("credit_score")
-        feat = feat.join(score)
-
-        # Save interim to processed (without sentiment) – will be completed after unstructured join
-        out = PROCESSED_DATA_DIR / f"features_{safe}.csv"
-        feat.to_csv(out, encoding="utf-8")
-        logger.info(f"Saved base features for {t} -> {out.name} ({len(feat)} rows)")
+                out.append(df[[c for c in df.columns if c.endswith("AdjClose") or c.endswith("Close")]].add_prefix(prefix))
+    return out
+
+def _load_sentiment(store) -> dict:
+    """Daily sentiment indexed by ticker once, instead of filtering the whole table per issuer."""
+    sent = store.read_table("daily_sentiment")
+    if sent.empty:
+        return {}
+    sent["date"] = pd.to_datetime(sent["date"])
+    return {t: g.set_index("date")[["avg_sentiment_score"]] for t, g in sent.groupby("ticker", sort=False)}
+
+def _build_issuer_features(ticker: str, base: pd.DataFrame, context: list, sentiment) -> pd.DataFrame:
+    # issuer indicators
+    feat = _tech_indicators(base, _price_col(ticker, base))
+
+    # joins (left join then forward/backward fill)
+    for df in context:
+        feat = feat.join(df, how="left")
+
+    # Drop duplicate columns if any
+    feat = feat.loc[:, ~feat.columns.duplicated()]
+
+    # Fill and clean
+    feat = feat.sort_index().ffill().bfill()
+    feat = feat.dropna()
+
+    # Synthetic credit score (demonstration)
+    # Lower volatility, higher momentum, positive sector/macro help score; high crude hurts many sectors.
+    # Normalize some inputs for stability
+    vol = feat["volatility_30d"].clip(lower=0, upper=0.8).fillna(0)
+    mom20 = feat["momentum_20d"].clip(-0.5, 0.5).fillna(0)
+    mom5 = feat["momentum_5d"].clip(-0.5, 0.5).fillna(0)
+
+    # sector/macro/commodity returns
+    sec_cols = [c for c in feat.columns if c.startswith("sector_") and (c.endswith("AdjClose") or c.endswith("Close"))]
+    mac_cols = [c for c in feat.columns if c.startswith("macro_") and (c.endswith("AdjClose") or c.endswith("Close"))]
+    com_cols = [c for c in feat.columns if c.startswith("comm_") and (c.endswith("AdjClose") or c.endswith("Close"))]
+    def ret(s):
+        r = s.pct_change().clip(-0.3, 0.3).fillna(0)
+        return r
+
+    sec_ret = feat[sec_cols].mean(axis=1).pipe(ret) if sec_cols else pd.Series(0.0, index=feat.index)
+    mac_ret = feat[mac_cols].mean(axis=1).pipe(ret) if mac_cols else pd.Series(0.0, index=feat.index)
+    com_ret = feat[com_cols].mean(axis=1).pipe(ret) if com_cols else pd.Series(0.0, index=feat.index)
+
+    # Combine linear function -> [0,100]
+    score = (
+        65
+        - 60 * vol
+        + 25 * mom20
+        + 10 * mom5
+        + 10 * sec_ret
+        + 5 * mac_ret
+        - 8 * com_ret
+    )
+    feat["credit_score"] = score.clip(0, 100)
 
     # Join in the sentiment
-    sent_path = PROCESSED_DATA_DIR / "daily_sentiment.csv"
-    sent = pd.read_csv(sent_path) if sent_path.exists() else pd.DataFrame(columns=["ticker", "date", "avg_sentiment_score"])
-    if not sent.empty:
-        sent["date"] = pd.to_datetime(sent["date"])
-    for t in ISSUERS.keys():
-        safe = t.replace("^", "").replace("=", "_").replace(".", "_")
-        fpath = PROCESSED_DATA_DIR / f"features_{safe}.csv"
-        if not fpath.exists():
+    if sentiment is not None:
+        feat = feat.join(sentiment, how="left")
+        feat["avg_sentiment_score"] = feat["avg_sentiment_score"].fillna(0.0)
+        # Give sentiment a small direct lift to the score to reflect event impact
+        feat["credit_score"] = (feat["credit_score"] + 5 * feat["avg_sentiment_score"]).clip(0, 100)
+    else:
+        feat["avg_sentiment_score"] = 0.0
+    return feat
+
+def _revise_sentiment(state, sentiment: pd.Series, store):
+    """
+    Rewrite stored rows whose daily sentiment changed since they were built, as a
+    full build would score them; returns the number of rows rewritten, or None
+    when a changed row's score was clipped at 0 or 100 (its score before
+    sentiment cannot be recovered, so the issuer needs a full build).
+    """
+    t = state.ticker
+    stored = store.read_series("features", t, columns=["credit_score", "avg_sentiment_score"],
+                               start=sentiment.index.min())
+    if stored.empty:
+        return 0
+    old = stored["avg_sentiment_score"].fillna(0.0)
+    new = sentiment.reindex(stored.index).fillna(0.0)
+    changed = (new - old).abs() > 1e-12
+    if not changed.any():
+        return 0
+    score, old, new = stored.loc[changed, "credit_score"], old[changed], new[changed]
+    if (((score <= 0) | (score >= 100)) & (old != 0)).any():
+        return None
+    # credit_score = clip(clip(base) + 5 * sentiment), and clip(base) = score - 5 * old sentiment when unclipped
+    rows = store.read_series("features", t, start=score.index.min(), end=score.index.max()).loc[score.index]
+    rows["avg_sentiment_score"] = new
+    rows["credit_score"] = (score - 5 * old + 5 * new).clip(0, 100)
+    store.append_series("features", t, rows)
+    if state.last_date in rows.index:
+        state.last_row.update(avg_sentiment_score=float(new[state.last_date]),
+                              credit_score=float(rows.at[state.last_date, "credit_score"]))
+        save_state(state)
+    return len(rows)
+
+def _update_incremental(issuers, context: list, sentiment: dict, store) -> list:
+    """
+    Apply revised sentiment to stored rows and only the bars newer than each
+    issuer's saved state; returns issuers that need a full build.
+    """
+    ctx = pd.concat(context, axis=1) if context else pd.DataFrame()
+    ctx = ctx.loc[:, ~ctx.columns.duplicated()]
+    need_full = []
+    for t in issuers:
+        state = load_state(t)
+        if state is None or not state.warm or not store.has_series("features", t) \
+                or not set(ctx.columns) <= set(state.columns):
+            need_full.append(t)
+            continue
+        s = sentiment.get(t)
+        if s is not None and not s.empty:
+            revised = _revise_sentiment(state, s["avg_sentiment_score"], store)
+            if revised is None:
+                need_full.append(t)
+                continue
+            if revised:
+                count("rows", revised, stage="features", kind="sentiment_revised")
+                logger.info(f"Revised sentiment in {revised} stored feature rows for {t}")
+        bars = _load_prices(t, start=state.last_date + pd.Timedelta(days=1))
+        if bars.empty:
+            logger.info(f"{t} features up to date ({state.last_date:%Y-%m-%d})")
+            continue
+        rows = apply_new_bars(state, bars, ctx, s["avg_sentiment_score"] if s is not None else None)
+        store.append_series("features", t, rows)
+        count("rows", len(rows), stage="features", kind="appended")
+        save_state(state)
+        logger.info(f"Appended {len(rows)} feature rows for {t}")
+    return need_full
+
+def process_structured_and_build_features(issuers=None, engine: str = FEATURE_ENGINE, mode: str = FEATURE_UPDATE_MODE):
+    issuers = issuers or ISSUERS
+    store = get_store()
+
+    # Shared inputs are loaded once
+    context = _context_closes({t: _load_prices(t) for t in list(SECTOR_ETFS.keys()) + list(MACRO_TICKERS.keys()) + list(COMMODITY_TICKERS.keys())})
+    sentiment = _load_sentiment(store)
+
+    pending = list(issuers.keys())
+    if mode == "incremental":
+        with timed("features.incremental"):
+            pending = _update_incremental(pending, context, sentiment, store)
+        if pending:
+            logger.info(f"Full feature build for {len(pending)} issuers without usable state")
+    if not pending:
+        return
+
+    bases = {t: _load_prices(t) for t in pending}
+    panel = {}
+    if engine == "panel":
+        with timed("features.panel"):
+            panel = build_panel_features(bases, context, sentiment)
+
+    # Build features per issuer in memory and write each matrix once
+    for t in pending:
+        base = bases.pop(t, pd.DataFrame())
+        if base.empty:
+            logger.warning(f"No base price data for {t}; skipping feature build.")
             continue
-        feat = pd.read_csv(fpath, parse_dates=["Date"]).set_index("Date")
-        s = sent[sent["ticker"] == t].copy()
-        if not s.empty:
-            s = s.set_index("date")[["avg_sentiment_score"]]
-            feat = feat.join(s, how="left")
-            feat["avg_sentiment_score"] = feat["avg_sentiment_score"].fillna(0.0)
-            # Give sentiment a small direct lift to the score to reflect event impact
-            feat["credit_score"] = (feat["credit_score"] + 5 * feat["avg_sentiment_score"]).clip(0, 100)
-        else:
-            feat["avg_sentiment_score"] = feat["avg_sentiment_score"].fillna(0.0)
-        feat.to_csv(fpath, encoding="utf-8")
-        logger.info(f"Updated features with sentiment for {t} -> {fpath.name}")
+        feat = panel.pop(t) if t in panel else _build_issuer_features(t, base, context, sentiment.get(t))
+        store.write_series("features", t, feat)
+        count("rows", len(feat), stage="features", kind="full")
+        if not feat.empty:
+            save_state(RollingFeatureState.from_history(t, feat, base[_price_col(t, base)]))
+        logger.info(f"Saved features for {t} ({len(feat)} rows)")
 
 if __name__ == "__main__":
     process_structured_and_build_features()
@@ -3,60 +3,82 @@
 import pandas as pd
 from pathlib import Path
 from utils.logging_utils import setup_logger
-from config import RAW_DATA_DIR, PROCESSED_DATA_DIR, USE_LIGHT_NLP, FINBERT_MODEL_NAME
+from utils.metrics import timed, count
+from utils.storage import get_store
+from feature_engineering.sentiment_cache import SentimentCache, model_id
+from feature_engineering.sentiment_engine import get_engine
+from feature_engineering.sentiment_ensemble import EnsembleScorer
+from config import (USE_LIGHT_NLP, FINBERT_MODEL_NAME, BERT_MODEL_NAME, ENABLE_NLP_ENSEMBLE, NLP_WEIGHTS,
+                    NLP_VADER_SKIP_THRESHOLD, SENTIMENT_CACHE_ENABLED)
 
 logger = setup_logger("unstructured_features")
 
 def _vader_sentiment(texts):
+    import nltk
+    from nltk.sentiment import SentimentIntensityAnalyzer
     try:
-        import nltk
-        from nltk.sentiment import SentimentIntensityAnalyzer
-        try:
-            nltk.data.find('sentiment/vader_lexicon.zip')
-        except LookupError:
-            nltk.download('vader_lexicon')
-        sia = SentimentIntensityAnalyzer()
-        scores = []
-        for t in texts:
-            s = sia.polarity_scores(str(t)[:512])  # truncate long
-            # map compound [-1,1] to [-1,1] (unchanged), keep for weighting
-            scores.append(s["compound"])
-        return scores
-    except Exception as e:
-        logger.warning(f"VADER failed: {e}")
-        return [0.0] * len(texts)
+        nltk.data.find('sentiment/vader_lexicon.zip')
+    except LookupError:
+        nltk.download('vader_lexicon')
+    sia = SentimentIntensityAnalyzer()
+    scores = []
+    for t in texts:
+        s = sia.polarity_scores(str(t)[:512])  # truncate long
+        # map compound [-1,1] to [-1,1] (unchanged), keep for weighting
+        scores.append(s["compound"])
+    return scores
 
 def _finbert_sentiment(texts):
-    try:
-        from transformers import AutoTokenizer, AutoModelForSequenceClassification, pipeline
-        tok = AutoTokenizer.from_pretrained(FINBERT_MODEL_NAME)
-        mdl = AutoModelForSequenceClassification.from_pretrained(FINBERT_MODEL_NAME)
-        nlp = pipeline("sentiment-analysis", model=mdl, tokenizer=tok, truncation=True)
-        out = nlp(list(map(lambda s: str(s)[:512], texts)))
-        # labels are POSITIVE/NEGATIVE/NEUTRAL
-        mapping = {"positive": 1.0, "neutral": 0.0, "negative": -1.0,
-                   "POSITIVE": 1.0, "NEUTRAL": 0.0, "NEGATIVE": -1.0}
-        return [mapping.get(o["label"], 0.0) * float(o.get("score", 1.0)) for o in out]
-    except Exception as e:
-        logger.warning(f"FinBERT failed, falling back to VADER: {e}")
-        return _vader_sentiment(texts)
+    # Loaded once per process; later calls reuse the model
+    return get_engine(FINBERT_MODEL_NAME).score(texts)
+
+def _ensemble_sentiment(texts):
+    engines = {"finbert": get_engine(FINBERT_MODEL_NAME), "bert": get_engine(BERT_MODEL_NAME)}
+    return EnsembleScorer(engines, _vader_sentiment)(texts)
 
-def analyze_sentiment() -> Path:
-    news_csv = RAW_DATA_DIR / "news.csv"
-    if not news_csv.exists():
-        logger.warning("news.csv not found; skipping unstructured features.")
-        return PROCESSED_DATA_DIR / "daily_sentiment.csv"
+def _score_texts(texts, cache=None):
+    """
+    Preferred model first, then FinBERT alone, then VADER. Through the cache, only
+    headlines not scored by that model before reach it; the all-zero last resort is
+    never cached.
+    """
+    chain = [("VADER", _vader_sentiment, model_id("vader", "nltk"))]
+    if not USE_LIGHT_NLP:
+        chain.insert(0, ("FinBERT", _finbert_sentiment, model_id(FINBERT_MODEL_NAME, "transformers")))
+        if ENABLE_NLP_ENSEMBLE:
+            # Weights and skip threshold change the scores, so they are part of the cache key
+            name = f"ensemble:{FINBERT_MODEL_NAME}+{BERT_MODEL_NAME}+vader:{sorted(NLP_WEIGHTS.items())}:{NLP_VADER_SKIP_THRESHOLD}"
+            chain.insert(0, ("Ensemble", _ensemble_sentiment, model_id(name, "transformers")))
+    for name, scorer, model in chain:
+        try:
+            with timed("sentiment.score", model=name):
+                return cache.score(texts, scorer, model) if cache is not None else scorer(texts)
+        except Exception as e:
+            logger.warning(f"{name} failed: {e}")
+    return [0.0] * len(texts)
+
+def analyze_sentiment(cache: SentimentCache = None) -> Path:
+    store = get_store()
+    daily_path = store.table_path("daily_sentiment")
+    if not store.has_table("news"):
+        logger.warning("news table not found; skipping unstructured features.")
+        return daily_path
 
-    df = pd.read_csv(news_csv)
+    df = store.read_table("news")
     if df.empty:
-        logger.warning("news.csv empty; skipping.")
-        return PROCESSED_DATA_DIR / "daily_sentiment.csv"
+        logger.warning("news table empty; skipping.")
+        return daily_path
 
     texts = df["title"].fillna("").astype(str).tolist()
-    if USE_LIGHT_NLP:
-        df["sentiment_score"] = _vader_sentiment(texts)
-    else:
-        df["sentiment_score"] = _finbert_sentiment(texts)
+    count("rows", len(texts), stage="sentiment")
+    own_cache = cache is None and SENTIMENT_CACHE_ENABLED
+    if own_cache:
+        cache = SentimentCache()
+    try:
+        df["sentiment_score"] = _score_texts(texts, cache)
+    finally:
+        if own_cache:
+            cache.close()
 
     df["date"] = pd.to_datetime(df["date"], errors="coerce").dt.strftime("%Y-%m-%d")
     df = df.dropna(subset=["date"])
@@ -69,10 +91,8 @@ def analyze_sentiment() -> Path:
         .rename(columns={"sentiment_score": "avg_sentiment_score"})
     )
 
-    PROCESSED_DATA_DIR.mkdir(parents=True, exist_ok=True)
-    df.to_csv(PROCESSED_DATA_DIR / "news_with_sentiment.csv", index=False, encoding="utf-8")
-    daily_path = PROCESSED_DATA_DIR / "daily_sentiment.csv"
-    daily.to_csv(daily_path, index=False, encoding="utf-8")
+    store.write_table("news_with_sentiment", df)
+    store.write_table("daily_sentiment", daily)
     logger.info(f"Saved {daily_path} ({len(daily)} rows)")
     return daily_path
 
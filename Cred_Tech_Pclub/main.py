@@ -1,39 +1,119 @@
-
 # main.py
+"""
+End-to-end pipeline as a DAG of stages (see utils/dag.py).
+
+    python main.py                     # every stage; unchanged ones are skipped
+    python main.py --only features,train
+    python main.py --from train        # train and everything downstream of it
+    python main.py --force             # ignore the recorded fingerprints
+    python main.py --profile           # also dump cProfile stats per stage to data/profiles/
+
+prices, news and mock_ratings have no upstream stage and start together;
+sentiment starts as soon as news is done, while prices may still be downloading.
+"""
+import argparse
+import sys
+import time
 from data_ingestion.yfinance_ingestor import fetch_yfinance_data
 from data_ingestion.news_ingestor import fetch_news
 from feature_engineering.unstructured_features import analyze_sentiment
 from feature_engineering.structured_features import process_structured_and_build_features
 from modeling.train import train_models
 from modeling.explain import generate_shap_values
+from modeling.summary import build_issuer_summary, SUMMARY_TABLE
+from analytics.correlation import update_correlations, STATE_FILE
+from analytics.alerts import evaluate_alerts, default_rules, STATE_FILE as ALERT_STATE_FILE
 from utils.mock_data_generator import create_mock_agency_ratings
+from utils.dag import Stage, DagRunner, format_summary
 from utils.logging_utils import setup_logger
+from utils.metrics import write_prometheus
+from utils.storage import get_store
+from config import (ISSUERS, SECTOR_ETFS, MACRO_TICKERS, COMMODITY_TICKERS, MODELS_DIR, MOCK_AGENCY_RATINGS_PATH,
+                    USE_LIGHT_NLP, FINBERT_MODEL_NAME, BERT_MODEL_NAME, FEATURE_ENGINE, TRAINING_MODE, TARGET_VARIABLE,
+                    LGBM_PARAMS, USE_TUNED_PARAMS, PIPELINE_STATE_PATH, PIPELINE_MAX_WORKERS, METRICS_PROMETHEUS_PATH,
+                    PROFILE_DIR, CORR_DIR, CORR_MODE, CORR_HALFLIFE_DAYS, CORR_WINDOW_DAYS, CORR_MIN_PERIODS,
+                    ALERT_DIR, ALERT_DEBOUNCE_MINUTES)
 
 logger = setup_logger("main")
 
-def run_pipeline():
-    logger.info("=== Ingesting market data ===")
-    fetch_yfinance_data()
-
-    logger.info("=== Ingesting news ===")
-    fetch_news()
 
-    logger.info("=== NLP sentiment ===")
-    analyze_sentiment()
+def pipeline_stages() -> list:
+    store = get_store()
+    all_tickers = list(ISSUERS) + list(SECTOR_ETFS) + list(MACRO_TICKERS) + list(COMMODITY_TICKERS)
+    prices = [store.series_path("prices", t) for t in all_tickers]
+    features = [store.series_path("features", t) for t in ISSUERS]
+    registry = MODELS_DIR / "registry.json"
+    return [
+        Stage("prices", fetch_yfinance_data, outputs=prices),
+        Stage("news", fetch_news, outputs=[store.table_path("news")]),
+        Stage("sentiment", analyze_sentiment,
+              inputs=[store.table_path("news")],
+              outputs=[store.table_path("news_with_sentiment"), store.table_path("daily_sentiment")],
+              params={"light": USE_LIGHT_NLP, "models": [FINBERT_MODEL_NAME, BERT_MODEL_NAME]}),
+        Stage("features", process_structured_and_build_features,
+              inputs=prices + [store.table_path("daily_sentiment")],
+              outputs=features,
+              params={"universe": all_tickers, "engine": FEATURE_ENGINE}),
+        Stage("train", train_models,
+              inputs=features + [MODELS_DIR / "tuned_params.json"],
+              outputs=[registry],
+              params={"mode": TRAINING_MODE, "target": TARGET_VARIABLE, "lgbm": LGBM_PARAMS,
+                      "tuned": USE_TUNED_PARAMS}),
+        Stage("explain", generate_shap_values,
+              inputs=features + [registry],
+              outputs=[MODELS_DIR / "shap"],
+              params={"mode": TRAINING_MODE}),
+        Stage("summary", build_issuer_summary,
+              inputs=features + [registry],
+              outputs=[store.table_path(SUMMARY_TABLE)],
+              params={"issuers": ISSUERS}),
+        Stage("alerts", evaluate_alerts,
+              inputs=[store.table_path(SUMMARY_TABLE)],
+              outputs=[ALERT_DIR / ALERT_STATE_FILE],
+              params={"rules": default_rules(), "debounce": ALERT_DEBOUNCE_MINUTES}),
+        Stage("correlation", update_correlations,
+              inputs=features,
+              outputs=[CORR_DIR / STATE_FILE],
+              params={"issuers": list(ISSUERS), "mode": CORR_MODE, "halflife": CORR_HALFLIFE_DAYS,
+                      "window": CORR_WINDOW_DAYS, "min_periods": CORR_MIN_PERIODS}),
+        Stage("mock_ratings", create_mock_agency_ratings,
+              outputs=[MOCK_AGENCY_RATINGS_PATH],
+              params={"issuers": list(ISSUERS)}),
+    ]
 
-    logger.info("=== Feature engineering ===")
-    process_structured_and_build_features()
 
-    logger.info("=== Model training ===")
-    train_models()
+def run_pipeline(only=None, start=None, force: bool = False, max_workers: int = PIPELINE_MAX_WORKERS,
+                 profile: bool = False, prometheus_path=METRICS_PROMETHEUS_PATH) -> dict:
+    t0 = time.perf_counter()
+    # Profiled stages run one at a time so each stage's stats hold only its own work
+    runner = DagRunner(pipeline_stages(), PIPELINE_STATE_PATH, 1 if profile else max_workers,
+                       profile_dir=PROFILE_DIR if profile else None)
+    results = runner.run(only, start, force)
+    logger.info(f"=== Pipeline complete in {time.perf_counter() - t0:.2f}s ===\n{format_summary(results)}")
+    if prometheus_path:
+        logger.info(f"Metrics -> {write_prometheus(prometheus_path)}")
+    return results
 
-    logger.info("=== SHAP explanations ===")
-    generate_shap_values()
 
-    logger.info("=== Mock ratings ===")
-    create_mock_agency_ratings()
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run the CredTech pipeline.")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--only", type=lambda s: [x.strip() for x in s.split(",") if x.strip()],
+                       help="comma-separated stages to run (upstream outputs are used as stored)")
+    group.add_argument("--from", dest="start", help="run this stage and everything downstream of it")
+    parser.add_argument("--force", action="store_true", help="run the selected stages even if their inputs are unchanged")
+    parser.add_argument("--workers", type=int, default=PIPELINE_MAX_WORKERS, help="stages run concurrently")
+    parser.add_argument("--profile", action="store_true",
+                        help=f"dump cProfile stats per stage to {PROFILE_DIR} (stages then run one at a time)")
+    parser.add_argument("--prometheus", default=METRICS_PROMETHEUS_PATH, metavar="PATH",
+                        help="write run metrics as a Prometheus text file")
+    return parser.parse_args(argv)
 
-    logger.info("=== Pipeline complete ===")
 
 if __name__ == "__main__":
-    run_pipeline()
+    args = _parse_args()
+    try:
+        results = run_pipeline(args.only, args.start, args.force, args.workers, args.profile, args.prometheus)
+    except ValueError as e:
+        sys.exit(str(e))
+    sys.exit(1 if any(r["status"] in ("failed", "blocked") for r in results.values()) else 0)
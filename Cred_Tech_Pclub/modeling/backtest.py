@@ -0,0 +1,148 @@
+"""
+Walk-forward evaluation of the scoring model.
+
+Each issuer's features are loaded once into float32 arrays. Its history is cut
+into folds at every BACKTEST_RETRAIN_EVERY rows after the first
+BACKTEST_TRAIN_ROWS: a fold trains on everything before the cut ("expanding")
+or on the last BACKTEST_TRAIN_ROWS rows ("rolling") and tests on the rows up to
+the next retrain.
+
+With BACKTEST_POLICY = "incremental" the retrain schedule of train_models is
+replayed instead: a fold warm-starts from the previous fold's booster for
+WARM_START_ROUNDS, and every MODEL_MAX_INCREMENTS + 1 folds the model is
+retrained from scratch. That is cheaper per fold and evaluates what production
+actually serves.
+
+Work units (a single fold, or a block of folds that starts with a full retrain)
+of all issuers run on one thread pool. LightGBM releases the GIL while it
+trains, so the threads work in parallel, and every fold reads row slices
+(views) of the shared arrays instead of its own copy of the frame. Each fold
+trains single-threaded, so the number of concurrent units equals the core budget.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+
+from config import (ISSUERS, TARGET_VARIABLE, LGBM_PARAMS, BACKTEST_WINDOW, BACKTEST_TRAIN_ROWS,
+                    BACKTEST_RETRAIN_EVERY, BACKTEST_POLICY, BACKTEST_MAX_WORKERS, BACKTEST_LGBM_OVERRIDES,
+                    MODEL_MAX_INCREMENTS, WARM_START_ROUNDS)
+from modeling.train import _available_cores
+from utils.logging_utils import setup_logger
+from utils.storage import get_store
+
+logger = setup_logger("backtest")
+
+
+def walk_forward_folds(n_rows: int, train_rows: int = BACKTEST_TRAIN_ROWS,
+                       retrain_every: int = BACKTEST_RETRAIN_EVERY, window: str = BACKTEST_WINDOW) -> list:
+    """(train_start, cut, test_end) row positions of each fold."""
+    if window not in ("expanding", "rolling"):
+        raise ValueError(f"Unknown backtest window {window!r}")
+    folds = []
+    for cut in range(train_rows, n_rows, retrain_every):
+        start = cut - train_rows if window == "rolling" else 0
+        folds.append((start, cut, min(cut + retrain_every, n_rows)))
+    return folds
+
+
+def _load_arrays(ticker: str, store) -> tuple:
+    df = store.read_series("features", ticker)
+    if df.empty or TARGET_VARIABLE not in df.columns:
+        raise ValueError("no features/target")
+    X = df.drop(columns=[TARGET_VARIABLE]).apply(pd.to_numeric, errors="coerce").fillna(0.0)
+    # C-ordered float32: row slices stay contiguous views that LightGBM reads without copying
+    return (np.ascontiguousarray(X.to_numpy(dtype=np.float32)), df[TARGET_VARIABLE].to_numpy(dtype=np.float64),
+            df.index)
+
+
+def _train_params() -> tuple:
+    params = {**LGBM_PARAMS, **BACKTEST_LGBM_OVERRIDES}
+    rounds = params.pop("n_estimators", 100)
+    params.pop("n_jobs", None)
+    params["num_threads"] = 1
+    return params, rounds
+
+
+def _run_block(ticker: str, block: list, X: np.ndarray, y: np.ndarray, dates, params: dict, rounds: int) -> list:
+    """Folds ``[(k, (start, cut, end)), ...]``; the first trains from scratch, later ones warm-start."""
+    rows, booster = [], None
+    for k, (start, cut, end) in block:
+        t0 = time.perf_counter()
+        train = lgb.Dataset(X[start:cut], y[start:cut], free_raw_data=True)
+        if booster is None:
+            booster = lgb.train(params, train, num_boost_round=rounds)
+        else:
+            booster = lgb.train(params, train, num_boost_round=WARM_START_ROUNDS, init_model=booster)
+        pred = booster.predict(X[cut:end], num_threads=1)
+        err = pred - y[cut:end]
+        rows.append({
+            "ticker": ticker, "fold": k, "mode": "full" if len(rows) == 0 else "warm",
+            "train_start": dates[start], "train_end": dates[cut - 1], "test_start": dates[cut],
+            "test_end": dates[end - 1], "train_rows": cut - start, "test_rows": end - cut,
+            "rmse": float(np.sqrt(np.mean(err ** 2))), "mae": float(np.mean(np.abs(err))),
+            "bias": float(np.mean(err)), "fit_seconds": time.perf_counter() - t0,
+        })
+    return rows
+
+
+def run_backtest(issuers=None, window: str = BACKTEST_WINDOW, train_rows: int = BACKTEST_TRAIN_ROWS,
+                 retrain_every: int = BACKTEST_RETRAIN_EVERY, policy: str = BACKTEST_POLICY,
+                 max_workers: int = BACKTEST_MAX_WORKERS, save: bool = True) -> pd.DataFrame:
+    """
+    Walk-forward metrics, one row per issuer and fold (RMSE, MAE, bias, window
+    dates, fit time). Saved as the "backtest_metrics" table unless ``save`` is False.
+    """
+    store = get_store()
+    tickers = list(issuers or ISSUERS.keys())
+    params, rounds = _train_params()
+    workers = max_workers or _available_cores()
+
+    t0 = time.perf_counter()
+    data, plans = {}, []
+    for t in tickers:
+        try:
+            data[t] = _load_arrays(t, store)
+        except Exception as e:
+            logger.warning(f"Skipping {t}: {e}")
+            continue
+        folds = list(enumerate(walk_forward_folds(len(data[t][1]), train_rows, retrain_every, window)))
+        size = MODEL_MAX_INCREMENTS + 1 if policy == "incremental" else 1
+        plans.extend((t, folds[i:i + size]) for i in range(0, len(folds), size))
+    load_s = time.perf_counter() - t0
+    logger.info(f"Backtest: {sum(len(b) for _, b in plans)} folds over {len(data)} issuers ({window}, {policy}, "
+                f"train {train_rows} rows, retrain every {retrain_every}) on {workers} thread(s); "
+                f"data loaded in {load_s:.1f}s")
+
+    rows = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(_run_block, t, block, *data[t], params, rounds): (t, block[0][0])
+                   for t, block in plans}
+        for fut in as_completed(futures):
+            t, k = futures[fut]
+            try:
+                rows.extend(fut.result())
+            except Exception as e:
+                logger.warning(f"Folds from {k} of {t} failed: {e}")
+
+    metrics = pd.DataFrame(rows)
+    if not metrics.empty:
+        metrics = metrics.sort_values(["ticker", "fold"]).reset_index(drop=True)
+    elapsed = time.perf_counter() - t0
+    fold_s = metrics["fit_seconds"].mean() if not metrics.empty else 0.0
+    logger.info(f"Backtest done in {elapsed:.1f}s: {len(metrics)} folds, {fold_s * 1000:.0f} ms per fold")
+    if save and not metrics.empty:
+        store.write_table("backtest_metrics", metrics)
+    return metrics
+
+
+def summarize(metrics: pd.DataFrame) -> pd.DataFrame:
+    """Per-issuer aggregate of the fold metrics."""
+    return metrics.groupby("ticker").agg(folds=("fold", "count"), rmse_mean=("rmse", "mean"),
+                                         rmse_worst=("rmse", "max"), mae_mean=("mae", "mean"),
+                                         bias_mean=("bias", "mean"))
+
+
+if __name__ == "__main__":
+    print(summarize(run_backtest()).to_string())
@@ -1,39 +1,123 @@
-
 # modeling/explain.py
+"""
+SHAP values per issuer, stored as float32 arrays in models/shap/ (see ShapStore).
+
+With SHAP_UPDATE_MODE = "incremental" only rows the current model has not
+explained yet are computed and appended; the stored rows are recomputed when
+the model version changes or the already explained inputs no longer match.
+TreeExplainers are cached per (model, version) for the life of the process.
+"""
+import time
 import pandas as pd
 import numpy as np
 import shap
-import joblib
-from pathlib import Path
 from utils.logging_utils import setup_logger
-from config import PROCESSED_DATA_DIR, MODELS_DIR, ISSUERS, TARGET_VARIABLE
+from utils.metrics import count, event
+from utils.storage import get_store
+from modeling.registry import ModelRegistry, POOLED_KEY, frame_hash
+from modeling.pooled import pooled_inputs
+from modeling.shap_store import ShapStore
+from config import ISSUERS, TARGET_VARIABLE, TRAINING_MODE, SHAP_UPDATE_MODE
 
 logger = setup_logger("explain")
 
-def generate_shap_values():
-    MODELS_DIR.mkdir(parents=True, exist_ok=True)
-    for t in ISSUERS.keys():
-        safe_model = t.replace(".", "_").replace("^","")
-        model_path = MODELS_DIR / f"model_{safe_model}.joblib"
-        feat_path = PROCESSED_DATA_DIR / f"features_{t.replace('.', '_').replace('^','')}.csv"
-        if not (model_path.exists() and feat_path.exists()):
+_EXPLAINERS = {}
+
+
+def get_explainer(key: str, version, model) -> shap.TreeExplainer:
+    """Process-wide TreeExplainer for one model version; older versions of the same model are dropped."""
+    cached = _EXPLAINERS.get(key)
+    if cached is None or cached[0] != version or version is None:
+        cached = (version, shap.TreeExplainer(model))
+        _EXPLAINERS[key] = cached
+    return cached[1]
+
+
+def model_inputs(df: pd.DataFrame, ticker: str, model, pooled: bool = TRAINING_MODE == "pooled") -> pd.DataFrame:
+    """The feature matrix the model scores for ``ticker`` (target dropped)."""
+    if pooled:
+        return pooled_inputs(df, ticker, model)
+    X = df.drop(columns=[TARGET_VARIABLE], errors="ignore")
+    # Only non-numeric columns need coercing; cheap for the single-row frames the dashboard and scorer use
+    other = [c for c, dt in X.dtypes.items() if not pd.api.types.is_numeric_dtype(dt)]
+    if other:
+        X[other] = X[other].apply(pd.to_numeric, errors="coerce")
+    return X.fillna(0.0)
+
+
+def plain_language_from_shap(shap_row: shap._explanation.Explanation, feature_names: list, k: int = 5):
+    vals = np.abs(shap_row.values)
+    order = np.argsort(vals)[::-1][:k]
+    bullets = []
+    for idx in order:
+        fname = feature_names[idx]
+        contrib = shap_row.values[idx]
+        direction = "increased" if contrib > 0 else "decreased"
+        reason = fname
+        if "volatility_30d" in fname: reason = "higher 30-day volatility"
+        elif "momentum_20d" in fname: reason = "20-day momentum"
+        elif "momentum_5d" in fname: reason = "5-day momentum"
+        elif "sector_" in fname: reason = "sector trend"
+        elif "macro_" in fname: reason = "macro market trend"
+        elif "comm_" in fname: reason = "commodity trend (e.g., crude)"
+        elif "avg_sentiment_score" in fname: reason = "recent news sentiment"
+        bullets.append(f"• {reason} {direction} the score by ~{abs(contrib):.2f} points")
+    return bullets
+
+
+def explain_issuer(ticker: str, model, version, df: pd.DataFrame, shap_store: ShapStore,
+                   mode: str = SHAP_UPDATE_MODE, pooled: bool = TRAINING_MODE == "pooled") -> dict:
+    """Bring one issuer's stored SHAP values up to date; returns what was done and how long it took."""
+    t0 = time.perf_counter()
+    key = POOLED_KEY if pooled else ticker
+    X = model_inputs(df, ticker, model, pooled)
+    columns = X.columns.tolist()
+    meta = shap_store.meta(ticker) if mode == "incremental" else None
+    start = 0
+    if (meta and version is not None and meta["model"] == [key, version] and meta["columns"] == columns
+            and meta["rows"] <= len(X) and meta["input_hash"] == frame_hash(X.iloc[:meta["rows"]])):
+        start = meta["rows"]
+    if start == len(X):
+        return {"ticker": ticker, "mode": "skip", "rows": 0, "seconds": time.perf_counter() - t0}
+
+    explainer = get_explainer(key, version, model)
+    values = np.asarray(explainer.shap_values(X.iloc[start:]), dtype=np.float32)
+    new_meta = {"model": [key, version], "columns": columns,
+                "base_value": float(np.ravel(explainer.expected_value)[0]), "input_hash": frame_hash(X)}
+    if start:
+        shap_store.append(ticker, values, X.index[start:], new_meta)
+    else:
+        shap_store.write(ticker, values, X.index, new_meta)
+    return {"ticker": ticker, "mode": "append" if start else "full", "rows": len(values),
+            "seconds": time.perf_counter() - t0}
+
+
+def generate_shap_values(issuers=None, mode: str = SHAP_UPDATE_MODE) -> dict:
+    store = get_store()
+    registry = ModelRegistry()
+    shap_store = ShapStore()
+    results = {}
+    for t in list(issuers or ISSUERS.keys()):
+        model = registry.load_model(t)
+        if model is None or not store.has_series("features", t):
             logger.warning(f"Missing artifacts for {t}; skipping SHAP.")
             continue
 
-        model = joblib.load(model_path)
-        df = pd.read_csv(feat_path, parse_dates=["Date"]).set_index("Date")
+        df = store.read_series("features", t)
         if TARGET_VARIABLE not in df.columns:
             logger.warning(f"No target in features for {t}; skipping.")
             continue
-        X = df.drop(columns=[TARGET_VARIABLE])
-        X = X.apply(pd.to_numeric, errors="coerce").fillna(0.0)
-
-        explainer = shap.TreeExplainer(model)
-        shap_values = explainer(X)
-
-        # Save explanations (use joblib to keep objects)
-        joblib.dump({"columns": X.columns.tolist(), "index": X.index, "values": shap_values}, MODELS_DIR / f"shap_{safe_model}.joblib")
-        logger.info(f"Saved SHAP for {t}")
+        try:
+            res = explain_issuer(t, model, registry.version(t), df, shap_store, mode)
+        except Exception as e:
+            logger.warning(f"SHAP failed for {t}: {e}")
+            continue
+        results[t] = res
+        count("rows", res["rows"], stage="explain")
+        count("shap_updates", mode=res["mode"], stage="explain")
+        event("explain.issuer", **res)
+        logger.info(f"SHAP for {t}: {res['mode']}, {res['rows']} rows explained ({res['seconds']:.2f}s)")
+    return results
 
 if __name__ == "__main__":
     generate_shap_values()
@@ -0,0 +1,131 @@
+"""
+Pooled cross-issuer model (TRAINING_MODE = "pooled").
+
+Every issuer's feature matrix is brought to one schema (the issuer prefix is
+dropped from its own price columns), tagged with ``ticker`` and ``sector``
+categoricals and stacked into a single float32 panel. One LightGBM is trained
+on it, so there is a single artifact, a single explainer and a single model load
+regardless of the size of the universe. Each issuer keeps its own time-ordered
+train/test split, so per-issuer RMSE is comparable with the per-issuer models.
+"""
+import time
+import joblib
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import train_test_split
+from sklearn.metrics import root_mean_squared_error
+
+from config import ISSUERS, ISSUER_SECTORS, TARGET_VARIABLE, TEST_SIZE, RANDOM_STATE
+from modeling.registry import ModelRegistry, POOLED_KEY, plan, params_for
+from utils.logging_utils import setup_logger
+from utils.storage import get_store, safe_name
+
+logger = setup_logger("pooled")
+
+
+def pooled_frame(df: pd.DataFrame, ticker: str, tickers: list = None) -> pd.DataFrame:
+    """One issuer's features in the pooled schema: unprefixed own columns, float32, ticker/sector categoricals."""
+    prefix = f"{safe_name(ticker)}_"
+    out = df.rename(columns={c: c[len(prefix):] for c in df.columns if c.startswith(prefix)})
+    other = [c for c, dt in out.dtypes.items() if not pd.api.types.is_numeric_dtype(dt)]
+    if other:
+        out[other] = out[other].apply(pd.to_numeric, errors="coerce")
+    out = out.astype(np.float32)
+    sectors = sorted(set(ISSUER_SECTORS.values()) | {"unknown"})
+    out["ticker"] = pd.Categorical([ticker] * len(out), categories=sorted(tickers or ISSUERS))
+    out["sector"] = pd.Categorical([ISSUER_SECTORS.get(ticker, "unknown")] * len(out), categories=sectors)
+    return out
+
+
+def stack_panel(tickers: list, store=None):
+    """(train frame, test frame) stacked over issuers, split per issuer in time order."""
+    store = store or get_store()
+    train, test = [], []
+    for t in tickers:
+        if not store.has_series("features", t):
+            logger.warning(f"Skipping {t}: no features")
+            continue
+        df = pooled_frame(store.read_series("features", t), t, tickers)
+        if TARGET_VARIABLE not in df.columns or df.empty:
+            logger.warning(f"Skipping {t}: no {TARGET_VARIABLE}")
+            continue
+        tr, te = train_test_split(df, test_size=TEST_SIZE, shuffle=False, random_state=RANDOM_STATE)
+        train.append(tr)
+        test.append(te)
+    if not train:
+        return pd.DataFrame(), pd.DataFrame()
+    # Columns differ only when an issuer lacks some raw field; missing ones become NaN
+    return pd.concat(train, copy=False), pd.concat(test, copy=False)
+
+
+def _xy(df: pd.DataFrame):
+    X = df.drop(columns=[TARGET_VARIABLE])
+    num = X.columns.difference(["ticker", "sector"])
+    X[num] = X[num].fillna(0.0)
+    return X, df[TARGET_VARIABLE].astype(float)
+
+
+def train_pooled(issuers=None, force: bool = False, n_jobs: int = -1) -> dict:
+    """Train (or skip, if the stacked data is unchanged) the pooled model and register it."""
+    t0 = time.perf_counter()
+    tickers = list(issuers or ISSUERS.keys())
+    train, test = stack_panel(tickers)
+    if train.empty:
+        raise ValueError("No issuer features to train the pooled model on")
+
+    registry = ModelRegistry()
+    prev = registry.entry(POOLED_KEY)
+    params = params_for(POOLED_KEY, registry.models_dir)
+    # Any change to the stacked data means a full retrain; there is no warm start for the pooled model
+    mode, fp = plan(prev, pd.concat([train, test]).sort_index(kind="stable"), params)
+    if mode == "skip" and not force:
+        logger.info(f"Pooled model unchanged, keeping v{prev['version']}")
+        return {**prev, "ticker": POOLED_KEY, "mode": "skip", "seconds": time.perf_counter() - t0}
+
+    X_train, y_train = _xy(train)
+    X_test, y_test = _xy(test)
+    model = lgb.LGBMRegressor(**{**params, "n_jobs": n_jobs})
+    model.fit(X_train, y_train,
+              eval_set=[(X_test, y_test)],
+              eval_metric="rmse",
+              categorical_feature=["ticker", "sector"],
+              callbacks=[lgb.early_stopping(stopping_rounds=100, verbose=False)])
+
+    pred = model.predict(X_test)
+    by_issuer = {}
+    for t in X_test["ticker"].unique():
+        mask = (X_test["ticker"] == t).to_numpy()
+        by_issuer[t] = float(root_mean_squared_error(y_test.to_numpy()[mask], pred[mask]))
+    version = prev["version"] + 1 if prev else 1
+    out = registry.artifact_path(POOLED_KEY, version)
+    joblib.dump(model, out)
+    res = {"ticker": POOLED_KEY, "mode": "full", "version": version, "path": str(out), "fingerprint": fp,
+           "increments": 0, "rmse": float(root_mean_squared_error(y_test, pred)),
+           "train_rows": len(X_train), "test_rows": len(X_test), "issuer_rmse": by_issuer,
+           "seconds": time.perf_counter() - t0}
+    registry.register(POOLED_KEY, res)
+    logger.info(f"Pooled model v{version}: {len(by_issuer)} issuers, {len(X_train)} train rows, "
+                f"RMSE={res['rmse']:.4f} ({res['seconds']:.1f}s)")
+    return res
+
+
+def pooled_inputs(features: pd.DataFrame, ticker: str, model) -> pd.DataFrame:
+    """
+    Model inputs for one issuer: pooled schema in the model's column order, with the
+    categoricals carrying the model's training categories (an unseen ticker becomes missing).
+    """
+    frame = pooled_frame(features, ticker, [ticker])
+    # pandas_categorical follows the order of the categorical columns in the training frame
+    cat_cols = [c for c in model.feature_name_ if c in ("ticker", "sector")]
+    # Fill the float block before the categoricals join it; fillna on the mixed frame is far slower
+    X = frame.reindex(columns=[c for c in model.feature_name_ if c not in cat_cols]).fillna(0.0)
+    for col, categories in zip(cat_cols, model.booster_.pandas_categorical or []):
+        X[col] = frame[col].cat.set_categories(categories)
+    return X[model.feature_name_]
+
+
+def predict_pooled(ticker: str, features: pd.DataFrame, model=None) -> np.ndarray:
+    """Credit score predictions for any issuer's feature frame from the pooled model."""
+    model = model or ModelRegistry().load_model(POOLED_KEY)
+    return model.predict(pooled_inputs(features, ticker, model))
@@ -0,0 +1,185 @@
+"""
+Model registry: which model version is current for each issuer, and what it was trained on.
+
+Each entry keeps a fingerprint of the training data (row count, last date and a
+content hash), the hyperparameters and the library versions. From it the
+trainer decides per issuer whether to
+- skip: same data, params and libraries as the current model,
+- warm-start: only new rows were appended since, so boosting continues from the
+  current booster (up to MODEL_MAX_INCREMENTS times in a row),
+- retrain from scratch: anything else.
+
+Artifacts are versioned (model_INFY_NS_v3.joblib); the registry file
+(models/registry.json) points at the current one and the previous version is
+kept next to it.
+
+Hyperparameters found by modeling/tune.py live next to it in
+models/tuned_params.json and are overlaid on LGBM_PARAMS by ``params_for``.
+Since the params are part of the fingerprint, newly tuned params trigger a full
+retrain on the next run.
+"""
+import hashlib
+import json
+import os
+from datetime import datetime
+from importlib import metadata
+from pathlib import Path
+import joblib
+import pandas as pd
+
+from config import MODELS_DIR, MODEL_MAX_INCREMENTS, TRAINING_MODE, LGBM_PARAMS, USE_TUNED_PARAMS
+from utils.logging_utils import setup_logger
+
+logger = setup_logger("registry")
+
+_LIBRARIES = ("lightgbm", "scikit-learn", "numpy", "pandas")
+POOLED_KEY = "__pooled__"   # registry entry of the cross-issuer model
+TUNED_PARAMS_FILE = "tuned_params.json"
+
+
+def library_versions() -> dict:
+    out = {}
+    for lib in _LIBRARIES:
+        try:
+            out[lib] = metadata.version(lib)
+        except metadata.PackageNotFoundError:
+            out[lib] = None
+    return out
+
+
+def params_hash(params: dict) -> str:
+    return hashlib.sha1(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def frame_hash(df: pd.DataFrame) -> str:
+    """Content hash over index, column names and values."""
+    h = hashlib.sha1(",".join(map(str, df.columns)).encode())
+    h.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def fingerprint(df: pd.DataFrame, params: dict) -> dict:
+    return {"rows": len(df), "last_date": str(df.index[-1]) if len(df) else None, "data": frame_hash(df),
+            "params": params_hash(params), "libraries": library_versions()}
+
+
+def plan(prev: dict, df: pd.DataFrame, params: dict, max_increments: int = MODEL_MAX_INCREMENTS):
+    """("skip" | "warm" | "full", fingerprint of ``df``) given the current registry entry."""
+    fp = fingerprint(df, params)
+    if not prev or not Path(prev["path"]).exists():
+        return "full", fp
+    old = prev["fingerprint"]
+    if old["params"] != fp["params"] or old["libraries"] != fp["libraries"]:
+        return "full", fp
+    if old["rows"] == fp["rows"] and old["data"] == fp["data"]:
+        return "skip", fp
+    appended = fp["rows"] > old["rows"] and frame_hash(df.iloc[:old["rows"]]) == old["data"]
+    if appended and prev.get("increments", 0) < max_increments:
+        return "warm", fp
+    return "full", fp
+
+
+def load_tuned_params(models_dir: Path = MODELS_DIR) -> dict:
+    """ticker (or POOLED_KEY) -> tuning result with the winning ``params``."""
+    path = Path(models_dir) / TUNED_PARAMS_FILE
+    if not path.exists():
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_tuned_params(results: dict, models_dir: Path = MODELS_DIR):
+    """Merge tuning results into models/tuned_params.json (atomic write)."""
+    path = Path(models_dir) / TUNED_PARAMS_FILE
+    merged = {**load_tuned_params(models_dir), **results}
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".json.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(merged, f, indent=1)
+    os.replace(tmp, path)
+
+
+def params_for(ticker: str, models_dir: Path = MODELS_DIR, use_tuned: bool = USE_TUNED_PARAMS) -> dict:
+    """LGBM_PARAMS with the tuned values for ``ticker`` (or POOLED_KEY) on top, if any."""
+    tuned = load_tuned_params(models_dir).get(ticker) if use_tuned else None
+    return {**LGBM_PARAMS, **(tuned["params"] if tuned else {})}
+
+
+def _safe(ticker: str) -> str:
+    return ticker.replace(".", "_").replace("^", "")
+
+
+class ModelRegistry:
+    def __init__(self, models_dir: Path = MODELS_DIR):
+        self.models_dir = Path(models_dir)
+        self.path = self.models_dir / "registry.json"
+        self._entries = None
+
+    @property
+    def entries(self) -> dict:
+        if self._entries is None:
+            self._entries = {}
+            if self.path.exists():
+                with open(self.path, encoding="utf-8") as f:
+                    self._entries = json.load(f)
+        return self._entries
+
+    def reload(self):
+        self._entries = None
+
+    def entry(self, ticker: str):
+        return self.entries.get(ticker)
+
+    def version(self, ticker: str, mode: str = TRAINING_MODE):
+        e = self.entry(POOLED_KEY if mode == "pooled" else ticker)
+        return e["version"] if e else None
+
+    def artifact_path(self, ticker: str, version: int) -> Path:
+        return self.models_dir / f"model_{_safe(ticker)}_v{version}.joblib"
+
+    def load_model(self, ticker: str, mode: str = TRAINING_MODE):
+        """
+        Current model for ``ticker`` (the pooled model in pooled mode), or None.
+        Falls back to an unversioned pre-registry artifact.
+        """
+        if mode == "pooled":
+            ticker = POOLED_KEY
+        e = self.entry(ticker)
+        path = Path(e["path"]) if e else self.models_dir / f"model_{_safe(ticker)}.joblib"
+        return joblib.load(path) if path.exists() else None
+
+    def register(self, ticker: str, result: dict):
+        """Record a trained model as current; keeps the previous artifact, removes older ones."""
+        prev = self.entry(ticker)
+        entry = {
+            "version": result["version"], "path": result["path"], "mode": result["mode"],
+            "increments": result["increments"], "fingerprint": result["fingerprint"],
+            "rmse": result["rmse"], "train_rows": result["train_rows"], "test_rows": result["test_rows"],
+            "trained_at": datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"),
+        }
+        self.entries[ticker] = entry
+        self._save()
+        if prev:
+            for p in self.models_dir.glob(f"model_{_safe(ticker)}_v*.joblib"):
+                if int(p.stem.rsplit("_v", 1)[1]) < entry["version"] - 1:
+                    p.unlink(missing_ok=True)
+
+    def _save(self):
+        self.models_dir.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".json.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, indent=1)
+        os.replace(tmp, self.path)
+
+    def list_models(self) -> pd.DataFrame:
+        """One row per issuer with the current version, how it was trained and on what."""
+        rows = [{"ticker": t, "version": e["version"], "mode": e["mode"], "increments": e["increments"],
+                 "rows": e["fingerprint"]["rows"], "last_date": e["fingerprint"]["last_date"],
+                 "rmse": e["rmse"], "trained_at": e["trained_at"]}
+                for t, e in sorted(self.entries.items())]
+        return pd.DataFrame(rows, columns=["ticker", "version", "mode", "increments", "rows", "last_date",
+                                           "rmse", "trained_at"])
+
+
+if __name__ == "__main__":
+    print(ModelRegistry().list_models().to_string(index=False))
@@ -0,0 +1,278 @@
+"""
+Online scoring: the current credit score of an issuer plus its top SHAP drivers,
+without running the batch pipeline.
+
+``Scorer`` keeps models warm in an LRU cache keyed by (model, registry version)
+and re-reads models/registry.json only when it changes on disk, so a newly
+trained model is served on the next request. The score and the SHAP values come
+from one call into the booster (LightGBM's built-in TreeSHAP, pred_contrib), so
+the warm model is also the explainer. The latest stored feature row of each
+issuer is cached for SCORER_FEATURE_TTL_SECONDS, already converted to model
+inputs, and so is its result while model and row are unchanged. Callers may pass
+feature overrides (fresh market or news inputs, e.g.
+{"avg_sentiment_score": -0.4}) on top of that row.
+
+``submit`` micro-batches concurrent requests: the first request of a batch
+waits up to SCORER_BATCH_WINDOW_MS for others, and the batch is then scored
+with one booster call per model (a single call for all tickers with the pooled
+model).
+"""
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+import numpy as np
+import pandas as pd
+
+from config import (TRAINING_MODE, TARGET_VARIABLE, SCORER_CACHE_SIZE, SCORER_TOP_K, SCORER_BATCH_WINDOW_MS,
+                    SCORER_MAX_BATCH, SCORER_FEATURE_TTL_SECONDS)
+from modeling.explain import model_inputs, plain_language_from_shap
+from modeling.registry import ModelRegistry, POOLED_KEY
+from modeling.shap_store import explanation
+from utils.logging_utils import setup_logger
+from utils.storage import get_store
+
+logger = setup_logger("scorer")
+
+
+def _matrix(X: pd.DataFrame) -> np.ndarray:
+    """
+    Float matrix of model inputs, categoricals as their codes (missing -> NaN) as
+    LightGBM encodes them; skips the booster's slower pandas conversion.
+    """
+    cats = [c for c, dt in X.dtypes.items() if isinstance(dt, pd.CategoricalDtype)]
+    if not cats:
+        return X.to_numpy(dtype=np.float64)
+    X = X.copy()
+    for c in cats:
+        X[c] = X[c].cat.codes.replace(-1, np.nan).astype(np.float64)
+    return X.to_numpy(dtype=np.float64)
+
+
+def _error(ticker: str, e: Exception) -> dict:
+    """
+    Result of a failed request, with an HTTP-style status: 400 for bad overrides,
+    404 for a missing model or feature row, 500 for anything else.
+    """
+    status = 400 if isinstance(e, (ValueError, TypeError)) else 404 if isinstance(e, LookupError) else 500
+    return {"ticker": ticker, "error": str(e), "status": status}
+
+
+class Scorer:
+    def __init__(self, cache_size: int = SCORER_CACHE_SIZE, top_k: int = SCORER_TOP_K,
+                 batch_window_ms: float = SCORER_BATCH_WINDOW_MS, max_batch: int = SCORER_MAX_BATCH,
+                 feature_ttl: float = SCORER_FEATURE_TTL_SECONDS, mode: str = TRAINING_MODE,
+                 registry: ModelRegistry = None, store=None):
+        self.cache_size = cache_size
+        self.top_k = top_k
+        self.batch_window = batch_window_ms / 1000
+        self.max_batch = max_batch
+        self.feature_ttl = feature_ttl
+        self.pooled = mode == "pooled"
+        self.registry = registry or ModelRegistry()
+        self.store = store or get_store()
+        self._models = OrderedDict()     # (key, version) -> model
+        self._rows = {}                  # ticker -> (loaded at, latest feature row, {(key, version): [inputs, result]})
+        self._registry_mtime = None
+        self._lock = threading.Lock()
+        self._queue = None
+        self._worker = None
+        self.stats = {"requests": 0, "batches": 0, "model_loads": 0}
+
+    # --- cached state ---
+
+    def _model_key(self, ticker: str) -> str:
+        return POOLED_KEY if self.pooled else ticker
+
+    def _refresh_registry(self):
+        try:
+            mtime = os.stat(self.registry.path).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if mtime != self._registry_mtime:
+            self.registry.reload()
+            self._registry_mtime = mtime
+
+    def _model(self, key: str):
+        """(cache key, cache entry) for the current version of ``key``, loading it on a miss."""
+        version = self.registry.version(key, mode="per_issuer")
+        ck = (key, version)
+        with self._lock:
+            if ck in self._models:
+                self._models.move_to_end(ck)
+                return ck, self._models[ck]
+        model = self.registry.load_model(key, mode="per_issuer")
+        if model is None:
+            raise LookupError(f"No model for {key}")
+        with self._lock:
+            model = self._models.setdefault(ck, model)
+            self._models.move_to_end(ck)
+            while len(self._models) > self.cache_size:
+                self._models.popitem(last=False)
+            self.stats["model_loads"] += 1
+        return ck, model
+
+    def _latest_row(self, ticker: str) -> tuple:
+        """(latest feature row, per-model cache of its inputs and result)."""
+        cached = self._rows.get(ticker)
+        if cached is not None and time.monotonic() - cached[0] < self.feature_ttl:
+            return cached[1], cached[2]
+        df = self.store.read_series("features", ticker)
+        if df.empty:
+            raise LookupError(f"No features for {ticker}")
+        row = df.iloc[[-1]].drop(columns=[TARGET_VARIABLE], errors="ignore")
+        self._rows[ticker] = (time.monotonic(), row, {})
+        return row, self._rows[ticker][2]
+
+    def invalidate(self):
+        """Drop cached feature rows (e.g. after the pipeline wrote new features)."""
+        self._rows.clear()
+
+    # --- scoring ---
+
+    def score_batch(self, requests: list) -> list:
+        """
+        Score ``[(ticker, overrides or None), ...]``; one result dict per request, in order.
+        A request that fails gets ``{"ticker": ..., "error": ..., "status": ...}`` (see ``_error``)
+        without affecting the others.
+        """
+        self._refresh_registry()
+        out = [None] * len(requests)
+        groups = {}
+        for i, (ticker, overrides) in enumerate(requests):
+            groups.setdefault(self._model_key(ticker), []).append(i)
+        for key, positions in groups.items():
+            try:
+                ck, model = self._model(key)
+            except Exception as e:
+                for i in positions:
+                    out[i] = _error(requests[i][0], e)
+                continue
+            rows, todo, caches = [], [], []
+            for i in positions:
+                ticker, overrides = requests[i]
+                try:
+                    row, prepared = self._latest_row(ticker)
+                    if overrides:
+                        if not isinstance(overrides, dict):
+                            raise TypeError("features must be an object of {feature: value}")
+                        unknown = set(overrides) - set(row.columns)
+                        if unknown:
+                            raise ValueError(f"Unknown features: {sorted(unknown)}")
+                        X = model_inputs(row.assign(**{k: float(v) for k, v in overrides.items()}), ticker,
+                                         model, self.pooled)
+                    else:
+                        if ck not in prepared:
+                            prepared[ck] = [model_inputs(row, ticker, model, self.pooled), None]
+                        X, result = prepared[ck]
+                        if result is not None:
+                            out[i] = result
+                            continue
+                    rows.append(X)
+                    todo.append(i)
+                    caches.append(None if overrides else prepared[ck])
+                except Exception as e:
+                    out[i] = _error(ticker, e)
+            if todo:
+                results = self._score_rows(ck, model, rows, [requests[i][0] for i in todo])
+                for i, res, cache in zip(todo, results, caches):
+                    out[i] = res
+                    if cache is not None:
+                        cache[1] = res
+        self.stats["requests"] += len(requests)
+        self.stats["batches"] += 1
+        return out
+
+    def _score_rows(self, ck: tuple, model, rows: list, tickers: list) -> list:
+        X = pd.concat(rows) if len(rows) > 1 else rows[0]
+        contrib = model.booster_.predict(_matrix(X), pred_contrib=True)
+        values, bias = contrib[:, :-1], contrib[:, -1]
+        columns = X.columns.tolist()
+        out = []
+        for j, ticker in enumerate(tickers):
+            top = np.argsort(np.abs(values[j]))[::-1][:self.top_k]
+            row = explanation(values[j], {"columns": columns, "base_value": float(bias[j])})
+            res = {"ticker": ticker, "date": str(X.index[j].date()), "score": float(values[j].sum() + bias[j]),
+                   "model_version": ck[1], "drivers": plain_language_from_shap(row, columns, k=self.top_k),
+                   "contributions": {columns[c]: float(values[j][c]) for c in top}}
+            out.append(res)
+        return out
+
+    def predict_rows(self, rows: dict) -> dict:
+        """
+        Scores without SHAP drivers for feature rows the caller built itself
+        (``{ticker: (date, {column: value})}``), one booster call per model.
+        Returns ``{ticker: result}``; a failed ticker gets ``_error``'s result.
+        """
+        self._refresh_registry()
+        out, groups = {}, {}
+        for t in rows:
+            groups.setdefault(self._model_key(t), []).append(t)
+        for key, tickers in groups.items():
+            try:
+                ck, model = self._model(key)
+                if self.pooled:
+                    frames = [model_inputs(pd.DataFrame([rows[t][1]], index=pd.DatetimeIndex([rows[t][0]])), t,
+                                           model, True) for t in tickers]
+                    X = _matrix(pd.concat(frames) if len(frames) > 1 else frames[0])
+                else:
+                    # What model_inputs gives for a per-issuer model (training columns, gaps as 0), without pandas
+                    X = np.array([[rows[t][1].get(c, np.nan) for c in model.feature_name_] for t in tickers],
+                                 dtype=np.float64)
+                    X[np.isnan(X)] = 0.0
+                preds = model.booster_.predict(X)
+            except Exception as e:
+                out.update({t: _error(t, e) for t in tickers})
+                continue
+            for t, p in zip(tickers, preds):
+                out[t] = {"ticker": t, "date": str(pd.Timestamp(rows[t][0]).date()), "score": float(p),
+                          "model_version": ck[1]}
+        self.stats["requests"] += len(rows)
+        self.stats["batches"] += 1
+        return out
+
+    def score(self, ticker: str, overrides: dict = None) -> dict:
+        return self.score_batch([(ticker, overrides)])[0]
+
+    # --- micro-batching ---
+
+    def submit(self, ticker: str, overrides: dict = None) -> Future:
+        """Queue a request for the next micro-batch; the future resolves to its result dict."""
+        if self._worker is None:
+            with self._lock:
+                if self._worker is None:
+                    self._queue = queue.Queue()
+                    self._worker = threading.Thread(target=self._batch_loop, name="scorer-batcher", daemon=True)
+                    self._worker.start()
+        fut = Future()
+        self._queue.put((ticker, overrides, fut))
+        return fut
+
+    def _batch_loop(self):
+        while (item := self._queue.get()) is not None:
+            batch = [item]
+            deadline = time.perf_counter() + self.batch_window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                try:
+                    nxt = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if nxt is None:
+                    self._queue.put(None)
+                    break
+                batch.append(nxt)
+            try:
+                results = self.score_batch([(t, o) for t, o, _ in batch])
+            except Exception as e:
+                results = [_error(t, e) for t, _, _ in batch]
+            for (_, _, fut), res in zip(batch, results):
+                fut.set_result(res)
+
+    def close(self):
+        if self._worker is not None:
+            self._queue.put(None)
+            self._worker.join()
+            self._worker = None
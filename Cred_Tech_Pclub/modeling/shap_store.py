@@ -0,0 +1,134 @@
+"""
+On-disk SHAP values, one directory per issuer under models/shap/:
+
+    values.npy   float32 (rows x features) SHAP matrix
+    index.npy    datetime64[ns] date of each row
+    meta.json    feature names, base value, the model (key, version) the values
+                 belong to and a hash of the explained inputs
+
+Plain .npy files, so readers can memory-map them and page in only the rows
+they touch; ``explanation`` wraps a slice in a shap.Explanation on demand. New
+rows are written after the stored ones and the .npy headers patched in place;
+the whole matrix is rewritten only when the model changes.
+"""
+import io
+import json
+import os
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import shap
+
+from config import MODELS_DIR
+from utils.storage import safe_name
+
+
+class ShapStore:
+    def __init__(self, root: Path = None):
+        self.root = Path(root) if root is not None else MODELS_DIR / "shap"
+
+    def path(self, ticker: str) -> Path:
+        return self.root / safe_name(ticker)
+
+    def meta(self, ticker: str):
+        p = self.path(ticker) / "meta.json"
+        if not p.exists():
+            return None
+        with open(p, encoding="utf-8") as f:
+            return json.load(f)
+
+    def read(self, ticker: str, mmap: bool = True):
+        """(values, index, meta) or None; ``values`` is memory-mapped unless ``mmap`` is False."""
+        meta = self.meta(ticker)
+        if meta is None:
+            return None
+        d = self.path(ticker)
+        values = np.load(d / "values.npy", mmap_mode="r" if mmap else None)
+        index = pd.DatetimeIndex(np.load(d / "index.npy"))
+        return values[:meta["rows"]], index[:meta["rows"]], meta
+
+    def write(self, ticker: str, values: np.ndarray, index: pd.Index, meta: dict):
+        """Replace the issuer's SHAP values. meta.json goes last, so readers never see more rows than exist."""
+        d = self.path(ticker)
+        d.mkdir(parents=True, exist_ok=True)
+        self._save(d / "values.npy", np.ascontiguousarray(values, dtype=np.float32))
+        self._save(d / "index.npy", pd.DatetimeIndex(index).to_numpy(dtype="datetime64[ns]"))
+        self._save_meta(d, {**meta, "rows": len(values)})
+
+    def append(self, ticker: str, values: np.ndarray, index: pd.Index, meta: dict):
+        """
+        Add rows after the stored ones (same model and columns), growing both
+        files in place; meta.json still goes last.
+        """
+        old = self.meta(ticker)
+        if old is None:
+            return self.write(ticker, values, index, meta)
+        d, rows = self.path(ticker), old["rows"]
+        values = np.ascontiguousarray(values, dtype=np.float32)
+        dates = pd.DatetimeIndex(index).to_numpy(dtype="datetime64[ns]")
+        if not (self._extend(d / "values.npy", rows, values) and self._extend(d / "index.npy", rows, dates)):
+            # A file that cannot grow in place is rewritten whole
+            old_values, old_index, _ = self.read(ticker, mmap=False)
+            return self.write(ticker, np.concatenate([old_values, values]),
+                              old_index.append(pd.DatetimeIndex(index)), meta)
+        self._save_meta(d, {**meta, "rows": rows + len(values)})
+
+    @staticmethod
+    def _save(path: Path, arr: np.ndarray):
+        tmp = path.with_suffix(".tmp.npy")
+        np.save(tmp, arr)
+        os.replace(tmp, path)
+
+    @staticmethod
+    def _save_meta(d: Path, meta: dict):
+        tmp = d / "meta.json.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=1)
+        os.replace(tmp, d / "meta.json")
+
+    @staticmethod
+    def _extend(path: Path, rows: int, arr: np.ndarray) -> bool:
+        """
+        Write ``arr`` after the first ``rows`` rows of the .npy at ``path`` and
+        patch the row count in its header. numpy pads the header so the shape can
+        grow without moving the data; False (nothing written) when the layout or
+        the header length does not allow it.
+        """
+        fmt = np.lib.format
+        with open(path, "r+b") as f:
+            version = fmt.read_magic(f)
+            if version not in ((1, 0), (2, 0)):
+                return False
+            read_header, write_header = ((fmt.read_array_header_1_0, fmt.write_array_header_1_0) if version == (1, 0)
+                                         else (fmt.read_array_header_2_0, fmt.write_array_header_2_0))
+            shape, fortran_order, dtype = read_header(f)
+            start = f.tell()
+            if fortran_order or dtype != arr.dtype or shape[1:] != arr.shape[1:] or shape[0] < rows:
+                return False
+            header = io.BytesIO()
+            write_header(header, {"descr": fmt.dtype_to_descr(dtype), "fortran_order": False,
+                                  "shape": (rows + len(arr),) + shape[1:]})
+            if header.tell() != start:
+                return False
+            # Rows past ``rows`` are left over from an append that never reached meta.json
+            f.seek(start + rows * dtype.itemsize * int(np.prod(shape[1:], dtype=np.int64)))
+            f.write(arr.tobytes())
+            f.truncate()
+            f.seek(0)
+            f.write(header.getvalue())
+        return True
+
+
+def explanation(values: np.ndarray, meta: dict, data: pd.DataFrame = None) -> shap.Explanation:
+    """
+    shap.Explanation over a row (1-D) or rows (2-D) of stored values, with the
+    matching model inputs as ``data`` (non-numeric columns become NaN).
+    """
+    values = np.asarray(values, dtype=np.float32)
+    base = meta["base_value"] if values.ndim == 1 else np.full(len(values), meta["base_value"])
+    if data is not None:
+        data = data.copy()
+        data[data.select_dtypes("category").columns] = np.nan
+        data = data.to_numpy(dtype=np.float64)
+        data = data[0] if values.ndim == 1 else data
+    return shap.Explanation(values, base_values=base, data=data, feature_names=meta["columns"])
@@ -0,0 +1,304 @@
+# modeling/streaming.py
+"""
+Intraday scoring from an event stream of price bars and headlines (see
+data_ingestion/event_stream.py for the format).
+
+Each issuer starts from its rolling feature state at the last batch close
+(feature_engineering/rolling_state.py). An event only records what changed
+(the issuer's bar for the day so far, a context series' price, a headline);
+every STREAM_BATCH_MS the issuers touched since the last round are rescored:
+headlines are scored in one call through the sentiment cache, each issuer's
+provisional feature row is the state's ``peek`` at its latest bar, and the
+rows go to the warm models of a ``Scorer`` in one booster call per model. A
+burst of bars for one issuer therefore costs one rescoring, not one per bar.
+
+When an issuer's first event of a new day arrives, the previous day's last
+bar, context and mean headline sentiment are applied to its state, as the
+daily batch would (headlines of that day still waiting for a round are scored
+first), and the score of that close becomes the reference. After
+each round the rescored issuers go through the alert rules of
+analytics/alerts.py as a small summary panel (score, change from the
+reference, and the daily score-change spread from the issuer summary), so the
+stream raises the same alerts as the pipeline, written to the same sink; the
+engine's deduplication keeps a move that lasts all day to one alert per rule
+and direction.
+
+Nothing is written back to the feature store; the nightly pipeline rebuilds
+from the downloaded bars and news.
+
+Latency is measured per rescored issuer, from the arrival of the oldest event
+not yet reflected in its score to the publication of the new score.
+"""
+import queue
+import threading
+import time
+from collections import deque
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+from config import ISSUERS, SECTOR_ETFS, MACRO_TICKERS, COMMODITY_TICKERS, STREAM_BATCH_MS, SENTIMENT_CACHE_ENABLED
+from analytics.alerts import AlertEngine
+from data_ingestion.event_stream import BAR_FIELDS
+from feature_engineering.rolling_state import load_state
+from feature_engineering.sentiment_cache import SentimentCache
+from feature_engineering.unstructured_features import _score_texts
+from modeling.scorer import Scorer
+from modeling.summary import load_issuer_summary
+from utils.logging_utils import setup_logger
+from utils.metrics import count, observe
+from utils.storage import safe_name
+
+logger = setup_logger("streaming")
+
+_CONTEXT = (("sector_", SECTOR_ETFS), ("macro_", MACRO_TICKERS), ("comm_", COMMODITY_TICKERS))
+
+
+class StreamScorer:
+    def __init__(self, issuers=None, scorer: Scorer = None, score_texts=None, batch_ms: float = STREAM_BATCH_MS,
+                 alerts: AlertEngine = None, on_score=None, on_alert=None, state_dir: Path = None):
+        self.scorer = scorer or Scorer()
+        self.batch = batch_ms / 1000
+        self.alerts = alerts or AlertEngine()
+        self.on_score, self.on_alert = on_score, on_alert
+        self._cache = None
+        if score_texts is None:
+            self._cache = SentimentCache() if SENTIMENT_CACHE_ENABLED else None
+            score_texts = lambda texts: _score_texts(texts, self._cache)
+        self.score_texts = score_texts
+
+        self.states, self.bar_cols = {}, {}
+        for t in list(issuers or ISSUERS):
+            state = load_state(t, state_dir)
+            if state is None or not state.warm:
+                logger.warning(f"No warm feature state for {t}; run the pipeline first. Not streaming it.")
+                continue
+            self.states[t] = state
+            safe = safe_name(t)
+            self.bar_cols[t] = [(f, f"{safe}_{f.replace(' ', '')}") for f in BAR_FIELDS]
+        # Context series: event field -> feature column, and the issuers whose rows use them
+        self.ctx_cols, self.ctx_users = {}, {}
+        for prefix, tickers in _CONTEXT:
+            for ct in tickers:
+                safe = safe_name(ct)
+                cols = [(f, f"{prefix}{safe}_{f.replace(' ', '')}") for f in ("Close", "Adj Close")]
+                self.ctx_cols[ct] = cols
+                self.ctx_users[ct] = [t for t, s in self.states.items() if any(c in s.columns for _, c in cols)]
+
+        self.day = {}          # issuer -> date (YYYY-MM-DD) of the bar being built
+        self.bars = {}         # issuer -> feature columns of its bar so far today
+        self.sentiment = {}    # issuer -> [sum, count] of today's headline scores
+        self.ctx = {}          # date -> {context column: last value}
+        self.news = []         # (issuer, date, title, arrival, ts) waiting for the next round
+        self.dirty = {}        # issuer -> arrival of the oldest event not yet in its score
+        self.last_ts = {}      # issuer -> timestamp of its newest event
+        self.reference = {}    # issuer -> score at the last close
+        self.scores = {}       # issuer -> latest published result
+        summary = load_issuer_summary()
+        self.change_std = summary["score_change_std"].to_dict() if "score_change_std" in summary.columns else {}
+        self._rebase = set(self.states)
+        self.latencies = deque(maxlen=1_000_000)
+        self.stats = {"events": 0, "bars": 0, "news": 0, "ignored": 0, "rounds": 0, "scores": 0, "alerts": 0,
+                      "days_closed": 0, "errors": 0}
+        # References of the last batch close; this also loads every model before the first event
+        self._score_closes()
+
+    # --- events -----------------------------------------------------------------
+    def _roll(self, t: str, date: str) -> bool:
+        """Move issuer ``t`` to ``date``, closing the day it was on; False for an event older than its day."""
+        day = self.day.get(t)
+        if day is None:
+            if date <= f"{self.states[t].last_date:%Y-%m-%d}":
+                return False            # already in the batch features
+        elif date < day:
+            return False
+        elif date > day:
+            # Headlines still waiting for a round may belong to the day being closed
+            if any(item[0] == t for item in self.news):
+                self._score_news()
+                if self.day[t] >= date:
+                    # A pending headline of ``date`` or later already rolled the issuer forward
+                    return self.day[t] == date
+            s, n = self.sentiment.get(t, (0.0, 0))
+            self.states[t].update(pd.Timestamp(day), self.bars.get(t, {}), self.ctx.get(day), s / n if n else 0.0)
+            self.stats["days_closed"] += 1
+            self._rebase.add(t)
+        else:
+            return True
+        self.day[t], self.bars[t], self.sentiment[t] = date, {}, [0.0, 0]
+        oldest = min(self.day.values())
+        for d in [d for d in self.ctx if d < oldest]:
+            del self.ctx[d]
+        return True
+
+    def process(self, ev: dict, arrival: float = None):
+        """Record one event; rescoring happens in ``flush``."""
+        arrival = time.perf_counter() if arrival is None else arrival
+        self.stats["events"] += 1
+        t, ts = ev.get("ticker"), str(ev.get("ts", ""))
+        date = ts[:10]
+        kind = ev.get("type")
+        if kind == "bar" and t in self.states:
+            if not self._roll(t, date):
+                self.stats["ignored"] += 1
+                return
+            bar = self.bars[t]
+            for f, col in self.bar_cols[t]:
+                v = ev.get(f)
+                if v is not None:
+                    bar[col] = float(v)
+            self.stats["bars"] += 1
+            self.dirty.setdefault(t, arrival)
+            self.last_ts[t] = ts
+        elif kind == "bar" and t in self.ctx_cols:
+            vals = self.ctx.setdefault(date, {})
+            for f, col in self.ctx_cols[t]:
+                v = ev.get(f)
+                if v is not None:
+                    vals[col] = float(v)
+            self.stats["bars"] += 1
+            for u in self.ctx_users[t]:
+                if self.day.get(u) == date:
+                    self.dirty.setdefault(u, arrival)
+        elif kind == "news" and t in self.states:
+            self.news.append((t, date, str(ev.get("title", "")), arrival, ts))
+            self.stats["news"] += 1
+        else:
+            self.stats["ignored"] += 1
+
+    # --- rescoring ----------------------------------------------------------------
+    def _score_news(self):
+        batch, self.news = self.news, []
+        try:
+            scores = self.score_texts([title for _, _, title, _, _ in batch])
+        except Exception as e:
+            logger.warning(f"Headline scoring failed: {e}")
+            scores = [0.0] * len(batch)
+        for (t, date, _, arrival, ts), s in zip(batch, scores):
+            if not self._roll(t, date):
+                self.stats["ignored"] += 1
+                continue
+            acc = self.sentiment[t]
+            acc[0] += float(s)
+            acc[1] += 1
+            self.dirty.setdefault(t, arrival)
+            self.last_ts[t] = max(self.last_ts.get(t, ts), ts)
+
+    def _score_closes(self):
+        rebase = {t: (self.states[t].last_date, self.states[t].last_row) for t in self._rebase}
+        self._rebase = set()
+        if not rebase:
+            return
+        for t, res in self.scorer.predict_rows(rebase).items():
+            if "error" in res:
+                self.stats["errors"] += 1
+                logger.warning(f"Could not score the close of {t}: {res['error']}")
+            else:
+                self.reference[t] = res["score"]
+
+    def flush(self) -> list:
+        """Rescore every issuer touched since the last round; returns the published results."""
+        if self.news:
+            self._score_news()
+        if not self.dirty and not self._rebase:
+            return []
+        self.stats["rounds"] += 1
+        # Closing rows first: their scores become the references the new rows are compared with
+        self._score_closes()
+        rows = {}
+        dirty, self.dirty = self.dirty, {}
+        for t in dirty:
+            s, n = self.sentiment.get(t, (0.0, 0))
+            rows[t] = (pd.Timestamp(self.day[t]), self.states[t].peek(self.bars[t], self.ctx.get(self.day[t]),
+                                                                      s / n if n else 0.0))
+        results = self.scorer.predict_rows(rows) if rows else {}
+        now = time.perf_counter()
+        published = []
+        for t, res in results.items():
+            if "error" in res:
+                self.stats["errors"] += 1
+                continue
+            lat = now - dirty[t]
+            self.latencies.append(lat)
+            observe("stream.latency", lat)
+            ref = self.reference.get(t)
+            res.update(ts=self.last_ts.get(t), reference=ref,
+                       change=None if ref is None else res["score"] - ref, latency_ms=lat * 1000)
+            self.scores[t] = res
+            published.append(res)
+            if self.on_score:
+                self.on_score(res)
+        self.stats["scores"] += len(published)
+        count("rows", len(published), stage="stream")
+        self._check_alerts(published)
+        return published
+
+    def _check_alerts(self, published: list):
+        panel = [res for res in published if res["change"] is not None]
+        if not panel:
+            return
+        panel = {
+            "ticker": [r["ticker"] for r in panel], "date": [r["date"] for r in panel],
+            "credit_score": [r["score"] for r in panel], "delta": [r["change"] for r in panel],
+            "score_change_std": [self.change_std.get(r["ticker"], np.nan) for r in panel],
+            "model_version": [r["model_version"] for r in panel], "ts": [r["ts"] for r in panel]}
+        alerts = self.alerts.process(panel, source="stream")
+        self.stats["alerts"] += len(alerts)
+        if self.on_alert:
+            for a in alerts:
+                self.on_alert(a)
+
+    # --- driving loop -----------------------------------------------------------------
+    def run(self, events) -> dict:
+        """
+        Consume ``events`` (read_events, socket_events, or any iterable of event
+        dicts) until it ends, rescoring every STREAM_BATCH_MS; returns ``summary()``.
+        Events are read on a separate thread and stamped on arrival.
+        """
+        q = queue.Queue(maxsize=100_000)
+
+        def reader():
+            try:
+                for ev in events:
+                    q.put((ev, time.perf_counter()))
+            except Exception as e:
+                logger.warning(f"Event source failed: {e}")
+            finally:
+                q.put(None)
+
+        threading.Thread(target=reader, name="stream-reader", daemon=True).start()
+        t0 = time.perf_counter()
+        next_round = t0 + self.batch
+        done = False
+        while not done:
+            try:
+                item = q.get(timeout=max(next_round - time.perf_counter(), 0))
+                # Drain what has already arrived before looking at the clock again
+                while item is not None:
+                    self.process(*item)
+                    if time.perf_counter() >= next_round:
+                        break
+                    item = q.get_nowait()
+                done = item is None
+            except queue.Empty:
+                pass
+            if done or time.perf_counter() >= next_round:
+                self.flush()
+                next_round = time.perf_counter() + self.batch
+        self.stats["seconds"] = time.perf_counter() - t0
+        return self.summary()
+
+    def summary(self) -> dict:
+        out = dict(self.stats)
+        if self.latencies:
+            lat = np.asarray(self.latencies) * 1000
+            out.update({f"latency_p{p}_ms": float(np.percentile(lat, p)) for p in (50, 95, 99)})
+            out["latency_max_ms"] = float(lat.max())
+        if out.get("seconds"):
+            out["events_per_second"] = out["events"] / out["seconds"]
+        return out
+
+    def close(self):
+        if self._cache is not None:
+            self._cache.close()
+            self._cache = None
@@ -0,0 +1,85 @@
+# modeling/summary.py
+"""
+Per-issuer summary table ("issuer_summary"): one row per issuer with the latest
+credit score, its day-over-day change, the standard deviation of its daily
+score changes before that (ALERT_ZSCORE_WINDOW of them), 30-day volatility,
+news sentiment, the current model version and when the row was computed.
+
+The alert rules (analytics/alerts.py), the dashboard's headline metrics and
+comparison snapshot read this table instead of every issuer's full feature
+history. Building it only reads the last ALERT_ZSCORE_WINDOW + 2 rows of each
+issuer's features (the newest yearly partition or two with the Parquet store).
+"""
+from datetime import datetime, timezone
+import pandas as pd
+
+from config import ISSUERS, ALERT_ZSCORE_WINDOW
+from modeling.registry import ModelRegistry
+from utils.logging_utils import setup_logger
+from utils.metrics import count
+from utils.storage import get_store
+
+logger = setup_logger("summary")
+
+SUMMARY_TABLE = "issuer_summary"
+SUMMARY_COLUMNS = ["ticker", "name", "date", "credit_score", "delta", "score_change_std", "volatility_30d",
+                   "avg_sentiment_score", "model_version", "updated_at"]
+
+
+def summarize_issuer(ticker: str, df: pd.DataFrame, version=None, updated_at: str = None) -> dict:
+    """Summary row for one issuer from (the tail of) its feature frame."""
+    vol_col = [c for c in df.columns if c.endswith("volatility_30d")]
+    score = df["credit_score"]
+    # Spread of the daily moves before the latest one, so a shock does not widen its own yardstick
+    prior = score.diff().iloc[1:-1].dropna().tail(ALERT_ZSCORE_WINDOW)
+    return {
+        "ticker": ticker, "name": ISSUERS.get(ticker, ticker), "date": df.index[-1],
+        "credit_score": float(score.iloc[-1]),
+        "delta": float(score.iloc[-1] - score.iloc[-2]) if len(df) >= 2 else 0.0,
+        "score_change_std": float(prior.std()) if len(prior) >= max(ALERT_ZSCORE_WINDOW // 2, 2) else float("nan"),
+        "volatility_30d": float(df[vol_col[0]].iloc[-1]) if vol_col else 0.0,
+        "avg_sentiment_score": float(df["avg_sentiment_score"].iloc[-1]) if "avg_sentiment_score" in df.columns else 0.0,
+        "model_version": version,
+        "updated_at": updated_at or datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+
+
+def issuer_summary(issuers=None, store=None, registry: ModelRegistry = None) -> pd.DataFrame:
+    store = store or get_store()
+    registry = registry or ModelRegistry()
+    now = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    rows = []
+    for t in list(issuers or ISSUERS.keys()):
+        try:
+            df = store.tail_series("features", t, ALERT_ZSCORE_WINDOW + 2)
+            if df.empty or "credit_score" not in df.columns:
+                continue
+            rows.append(summarize_issuer(t, df, registry.version(t), now))
+        except Exception as e:
+            logger.warning(f"Summary failed for {t}: {e}")
+    out = pd.DataFrame(rows, columns=SUMMARY_COLUMNS)
+    out["model_version"] = out["model_version"].astype("Int64")
+    return out
+
+
+def build_issuer_summary(issuers=None):
+    store = get_store()
+    df = issuer_summary(issuers, store)
+    store.write_table(SUMMARY_TABLE, df)
+    count("rows", len(df), stage="summary")
+    out = store.table_path(SUMMARY_TABLE)
+    logger.info(f"Saved issuer summary -> {out} ({len(df)} issuers)")
+    return out
+
+
+def load_issuer_summary(store=None) -> pd.DataFrame:
+    """The stored summary indexed by ticker (empty if the pipeline has not written it yet)."""
+    df = (store or get_store()).read_table(SUMMARY_TABLE)
+    if df.empty:
+        return pd.DataFrame(columns=SUMMARY_COLUMNS).set_index("ticker")
+    df["date"] = pd.to_datetime(df["date"])
+    return df.set_index("ticker")
+
+
+if __name__ == "__main__":
+    build_issuer_summary()
@@ -1,59 +1,163 @@
-
 # modeling/train.py
+import os
+import time
+import multiprocessing as mp
 import pandas as pd
 import lightgbm as lgb
 import joblib
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 from sklearn.model_selection import train_test_split
-from sklearn.metrics import mean_squared_error
+from sklearn.metrics import root_mean_squared_error
 from utils.logging_utils import setup_logger
-from config import PROCESSED_DATA_DIR, MODELS_DIR, ISSUERS, TARGET_VARIABLE, TEST_SIZE, RANDOM_STATE, LGBM_PARAMS
+from utils.metrics import count, event
+from utils.storage import get_store
+from modeling.registry import ModelRegistry, plan, params_for
+from modeling.pooled import train_pooled
+from config import (MODELS_DIR, ISSUERS, TARGET_VARIABLE, TEST_SIZE, RANDOM_STATE,
+                    TRAIN_MAX_WORKERS, WARM_START_ROUNDS, TRAINING_MODE)
 
 logger = setup_logger("train")
 
 def _load_features(ticker: str) -> pd.DataFrame:
-    safe = ticker.replace("^", "").replace("=", "_").replace(".", "_")
-    f = PROCESSED_DATA_DIR / f"features_{safe}.csv"
-    if not f.exists():
-        raise FileNotFoundError(f"Missing features for {ticker}: {f}")
-    return pd.read_csv(f, parse_dates=["Date"]).set_index("Date")
+    store = get_store()
+    if not store.has_series("features", ticker):
+        raise FileNotFoundError(f"Missing features for {ticker}: {store.series_path('features', ticker)}")
+    return store.read_series("features", ticker)
 
-def train_models():
-    MODELS_DIR.mkdir(parents=True, exist_ok=True)
-    for t in ISSUERS.keys():
-        try:
-            df = _load_features(t)
-        except Exception as e:
-            logger.warning(f"Skipping {t}: {e}")
-            continue
+def _available_cores() -> int:
+    # Respects CPU affinity / container limits where the platform exposes them
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0)) or 1
+    return os.cpu_count() or 1
+
+def _thread_budget(n_tasks: int, max_workers: int = TRAIN_MAX_WORKERS, cores: int = None):
+    """(worker processes, LightGBM threads per worker) with workers x threads <= cores."""
+    cores = cores or _available_cores()
+    workers = max(1, min(n_tasks, max_workers or cores, cores))
+    return workers, max(1, cores // workers)
+
+def _train_one(ticker: str, n_jobs: int, prev: dict = None, force: bool = False,
+               models_dir: Path = MODELS_DIR) -> dict:
+    """
+    Skip, warm-start or fully train one issuer's model against its registry entry
+    ``prev`` and save the artifact. Uses the issuer's tuned params when there are any.
+    Runs in a worker process; the caller registers it.
+    """
+    t0 = time.perf_counter()
+    df = _load_features(ticker)
+    if TARGET_VARIABLE not in df.columns:
+        raise KeyError(f"Target {TARGET_VARIABLE} missing")
+
+    base = params_for(ticker, models_dir)
+    mode, fp = plan(prev, df, base)
+    if force:
+        mode = "full"
+    if mode == "skip":
+        return {**prev, "ticker": ticker, "mode": "skip", "seconds": time.perf_counter() - t0}
 
-        if TARGET_VARIABLE not in df.columns:
-            logger.warning(f"Target {TARGET_VARIABLE} missing for {t}, skipping.")
-            continue
+    y = df[TARGET_VARIABLE].astype(float)
+    X = df.drop(columns=[TARGET_VARIABLE])
+    # keep only numeric
+    X = X.apply(pd.to_numeric, errors="coerce").fillna(0.0)
 
-        y = df[TARGET_VARIABLE].astype(float)
-        X = df.drop(columns=[TARGET_VARIABLE])
-        # keep only numeric
-        X = X.apply(pd.to_numeric, errors="coerce").fillna(0.0)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=TEST_SIZE, shuffle=False, random_state=RANDOM_STATE)
 
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=TEST_SIZE, shuffle=False, random_state=RANDOM_STATE)
+    params = {**base, "n_jobs": n_jobs}
+    init_model = None
+    if mode == "warm":
+        # Continue boosting from the current trees on the extended data
+        init_model = joblib.load(prev["path"]).booster_
+        params["n_estimators"] = WARM_START_ROUNDS
+    model = lgb.LGBMRegressor(**params)
+    model.fit(X_train, y_train,
+              eval_set=[(X_test, y_test)],
+              eval_metric="rmse",
+              init_model=init_model,
+              callbacks=[lgb.early_stopping(stopping_rounds=100, verbose=False)])
 
-        model = lgb.LGBMRegressor(**LGBM_PARAMS)
-        model.fit(X_train, y_train,
-                  eval_set=[(X_test, y_test)],
-                  eval_metric="rmse",
-                  callbacks=[lgb.early_stopping(stopping_rounds=100, verbose=False)])
+    rmse = root_mean_squared_error(y_test, model.predict(X_test))
+    version = prev["version"] + 1 if prev else 1
+    out = ModelRegistry(models_dir).artifact_path(ticker, version)
+    joblib.dump(model, out)
+    return {"ticker": ticker, "mode": mode, "version": version, "path": str(out), "fingerprint": fp,
+            "increments": prev.get("increments", 0) + 1 if mode == "warm" else 0,
+            "rmse": float(rmse), "train_rows": len(X_train), "test_rows": len(X_test),
+            "seconds": time.perf_counter() - t0}
+
+def _log_result(res: dict):
+    if res["mode"] == "skip":
+        logger.info(f"{res['ticker']}: unchanged, keeping v{res['version']}")
+        return
+    logger.info(f"{res['ticker']}: {res['mode']} -> v{res['version']}, RMSE={res['rmse']:.4f}, "
+                f"train_rows={res['train_rows']}, test_rows={res['test_rows']} ({res['seconds']:.1f}s)")
+
+def _record(results: dict):
+    """Per-model JSON events (the training itself may have run in worker processes) and counts by outcome."""
+    for t, res in results.items():
+        mode = res.get("mode", "failed")
+        count("models", mode=mode, stage="train")
+        if mode not in ("skip", "failed"):
+            count("rows", res["train_rows"], stage="train")
+        event("train.model", ticker=t, mode=mode, seconds=res.get("seconds"), rows=res.get("train_rows"),
+              rmse=res.get("rmse"), error=res.get("error"))
+
+def train_models(issuers=None, max_workers: int = TRAIN_MAX_WORKERS, force: bool = False,
+                 mode: str = TRAINING_MODE) -> dict:
+    """
+    Train one model per issuer, or the single pooled model when ``mode`` is "pooled".
+    Issuers are spread over worker processes, each with its own LightGBM thread
+    budget so workers x threads stays within the available cores. Through the
+    model registry, unchanged issuers are skipped and appended data warm-starts
+    the current model (``force`` retrains everything).
+    A failing issuer is logged and reported without stopping the others.
+    Returns ticker -> result, or {"error": ...} for failures.
+    """
+    MODELS_DIR.mkdir(parents=True, exist_ok=True)
+    if mode == "pooled":
+        res = train_pooled(issuers, force, n_jobs=_available_cores())
+        _record({res["ticker"]: res})
+        return {res["ticker"]: res}
 
-        pred = model.predict(X_test)
-        from sklearn.metrics import root_mean_squared_error
+    registry = ModelRegistry()
+    tickers = list(issuers or ISSUERS.keys())
+    workers, threads = _thread_budget(len(tickers), max_workers)
+    logger.info(f"Training {len(tickers)} models on {workers} worker(s) x {threads} LightGBM thread(s)")
 
-        rmse = root_mean_squared_error(y_test, pred)
+    results = {}
+    t0 = time.perf_counter()
+    if workers == 1:
+        for t in tickers:
+            try:
+                results[t] = _train_one(t, threads, registry.entry(t), force)
+                _log_result(results[t])
+            except Exception as e:
+                logger.warning(f"Skipping {t}: {e}")
+                results[t] = {"ticker": t, "error": str(e)}
+    else:
+        # spawn, not fork: forking after LightGBM's OpenMP pool has started can deadlock the children
+        with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn")) as pool:
+            futures = {pool.submit(_train_one, t, threads, registry.entry(t), force): t for t in tickers}
+            for fut in as_completed(futures):
+                t = futures[fut]
+                try:
+                    results[t] = fut.result()
+                    _log_result(results[t])
+                except Exception as e:
+                    # Includes a crashed worker (BrokenProcessPool), which fails the issuers still queued
+                    logger.warning(f"Skipping {t}: {e}")
+                    results[t] = {"ticker": t, "error": str(e)}
 
-        logger.info(f"{t}: RMSE={rmse:.4f}, train_rows={len(X_train)}, test_rows={len(X_test)}")
+    # Only the parent writes the registry
+    for t, res in results.items():
+        if "error" not in res and res["mode"] != "skip":
+            registry.register(t, res)
 
-        out = MODELS_DIR / f"model_{t.replace('.', '_').replace('^','')}.joblib"
-        joblib.dump(model, out)
-        logger.info(f"Saved model -> {out.name}")
+    _record(results)
+    modes = [r.get("mode", "failed") for r in results.values()]
+    logger.info(f"Models ready in {time.perf_counter() - t0:.1f}s: {modes.count('full')} full, "
+                f"{modes.count('warm')} warm-started, {modes.count('skip')} unchanged, {modes.count('failed')} failed")
+    return results
 
 if __name__ == "__main__":
     train_models()
@@ -0,0 +1,198 @@
+"""
+Hyperparameter search over LGBM_PARAMS, per issuer or for the pooled panel.
+
+TUNING_TRIALS configurations are sampled from TUNING_SEARCH_SPACE (LGBM_PARAMS
+itself is always trial 0) and compared by successive halving: every trial gets
+TUNING_MIN_ROUNDS boosting rounds, only the best 1/TUNING_ETA go on to
+TUNING_ETA times as many rounds, and so on up to LGBM_PARAMS["n_estimators"].
+Surviving trials keep their booster and continue boosting, so promoting a trial
+costs only the extra rounds.
+
+Trials are scored on a time-ordered validation split carved out of the training
+rows (the last TEST_SIZE of them), so the test rows that train_models reports
+RMSE on are never used to pick the params. The trials of a rung run on a thread
+pool with one LightGBM thread each, so the number of concurrent trials is the
+core budget. A search stops at its time budget and keeps the best trial so far.
+
+The winner (params plus the best number of rounds) is saved to
+models/tuned_params.json, where train_models picks it up via ``params_for``.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import train_test_split
+
+from config import (ISSUERS, TEST_SIZE, RANDOM_STATE, LGBM_PARAMS, TRAINING_MODE,
+                    TUNING_TRIALS, TUNING_ETA, TUNING_MIN_ROUNDS, TUNING_TIME_BUDGET_SECONDS, TUNING_SEARCH_SPACE)
+from modeling.backtest import _load_arrays
+from modeling.pooled import stack_panel, _xy
+from modeling.registry import POOLED_KEY, save_tuned_params
+from modeling.train import _available_cores
+from utils.logging_utils import setup_logger
+from utils.storage import get_store
+
+logger = setup_logger("tune")
+
+
+def sample_configs(n_trials: int = TUNING_TRIALS, space: dict = None, seed: int = RANDOM_STATE) -> list:
+    """``n_trials`` distinct configurations: the LGBM_PARAMS values first, then random draws from ``space``."""
+    space = TUNING_SEARCH_SPACE if space is None else space
+    rng = np.random.default_rng(seed)
+    configs = [{k: LGBM_PARAMS[k] for k in space if k in LGBM_PARAMS}]
+    seen = {tuple(sorted(configs[0].items()))}
+    n_distinct = int(np.prod([len(v) for v in space.values()]))
+    while len(configs) < min(n_trials, n_distinct):
+        cfg = {k: v[rng.integers(len(v))] for k, v in space.items()}
+        cfg = {k: v.item() if isinstance(v, np.generic) else v for k, v in cfg.items()}
+        key = tuple(sorted(cfg.items()))
+        if key not in seen:
+            seen.add(key)
+            configs.append(cfg)
+    return configs
+
+
+def rung_rounds(min_rounds: int = TUNING_MIN_ROUNDS, eta: int = TUNING_ETA,
+                max_rounds: int = LGBM_PARAMS.get("n_estimators", 100)) -> list:
+    """Boosting rounds at each rung: min_rounds, min_rounds * eta, ... capped at max_rounds."""
+    rungs, r = [], min_rounds
+    while r < max_rounds:
+        rungs.append(r)
+        r *= eta
+    return rungs + [max_rounds]
+
+
+def _booster_params(cfg: dict) -> dict:
+    params = {**LGBM_PARAMS, **cfg, "num_threads": 1, "feature_pre_filter": False}
+    for k in ("n_estimators", "n_jobs"):
+        params.pop(k, None)
+    return params
+
+
+class _Trial:
+    """One configuration; keeps its booster so a promoted trial continues boosting."""
+
+    def __init__(self, k: int, cfg: dict):
+        self.k, self.cfg = k, cfg
+        self.booster = None
+        self.rounds = 0
+        self.best = (np.inf, 0)    # (validation RMSE, rounds)
+        self.seconds = 0.0
+
+    def advance(self, rounds: int, data: dict, deadline: float):
+        """Boost up to ``rounds`` (or until the deadline) and score on the validation rows."""
+        t0 = time.perf_counter()
+        if self.booster is None:
+            train = lgb.Dataset(data["X_train"], data["y_train"], categorical_feature=data["categorical"],
+                                free_raw_data=False)
+            self.booster = lgb.Booster(_booster_params(self.cfg), train)
+        while self.rounds < rounds and time.perf_counter() < deadline:
+            self.booster.update()
+            self.rounds += 1
+        if self.rounds:
+            err = self.booster.predict(data["X_val"], num_threads=1) - data["y_val"]
+            rmse = float(np.sqrt(np.mean(err ** 2)))
+            if rmse < self.best[0]:
+                self.best = (rmse, self.rounds)
+        self.seconds += time.perf_counter() - t0
+
+
+def successive_halving(data: dict, configs: list, time_budget: float = TUNING_TIME_BUDGET_SECONDS,
+                       max_workers: int = 0, eta: int = TUNING_ETA, min_rounds: int = TUNING_MIN_ROUNDS,
+                       max_rounds: int = LGBM_PARAMS.get("n_estimators", 100)) -> dict:
+    """
+    Run the search on prepared ``data`` (X_train, y_train, X_val, y_val, categorical)
+    and return the winning config with its validation RMSE, rounds and search stats.
+    """
+    t0 = time.perf_counter()
+    deadline = t0 + time_budget if time_budget else np.inf
+    workers = max_workers or _available_cores()
+    trials = [_Trial(k, cfg) for k, cfg in enumerate(configs)]
+    alive, rungs_done, total_rounds = trials, 0, 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for i, rounds in enumerate(rung_rounds(min_rounds, eta, max_rounds)):
+            if time.perf_counter() >= deadline:
+                break
+            before = sum(t.rounds for t in alive)
+            list(pool.map(lambda t: t.advance(rounds, data, deadline), alive))
+            total_rounds += sum(t.rounds for t in alive) - before
+            rungs_done = i + 1
+            alive = sorted((t for t in alive if t.rounds), key=lambda t: t.best[0])
+            logger.info(f"Rung {i}: {len(alive)} trial(s) at {rounds} rounds, best RMSE {alive[0].best[0]:.4f}"
+                        if alive else f"Rung {i}: no trial finished within the time budget")
+            alive = alive[:max(1, len(alive) // eta)]
+    scored = [t for t in trials if t.rounds]
+    if not scored:
+        raise TimeoutError("No trial finished its first rung within the time budget")
+    best = min(scored, key=lambda t: t.best[0])
+    baseline = trials[0]
+    return {"params": {**best.cfg, "n_estimators": best.best[1]}, "rmse": best.best[0],
+            "baseline_rmse": baseline.best[0] if baseline.rounds else None, "baseline_rounds": baseline.best[1],
+            "trials": len(trials), "rungs": rungs_done, "boosting_rounds": total_rounds,
+            "timed_out": time.perf_counter() >= deadline, "seconds": time.perf_counter() - t0}
+
+
+def issuer_data(ticker: str, store=None) -> dict:
+    """Validation split of one issuer: the last TEST_SIZE of its training rows, in time order."""
+    X, y, _ = _load_arrays(ticker, store or get_store())
+    n_train = len(y) - int(np.ceil(len(y) * TEST_SIZE))     # rows train_models trains on
+    n_fit = n_train - int(np.ceil(n_train * TEST_SIZE))
+    return {"X_train": X[:n_fit], "y_train": y[:n_fit], "X_val": X[n_fit:n_train], "y_val": y[n_fit:n_train],
+            "categorical": "auto"}
+
+
+def pooled_data(tickers: list, store=None) -> dict:
+    """The same split for the pooled panel, taken per issuer from its training rows."""
+    train, _ = stack_panel(tickers, store)
+    if train.empty:
+        raise ValueError("No issuer features to tune the pooled model on")
+    fit, val = [], []
+    for _, part in train.groupby("ticker", observed=True, sort=False):
+        a, b = train_test_split(part, test_size=TEST_SIZE, shuffle=False, random_state=RANDOM_STATE)
+        fit.append(a)
+        val.append(b)
+    X_train, y_train = _xy(pd.concat(fit, copy=False))
+    X_val, y_val = _xy(pd.concat(val, copy=False))
+    return {"X_train": X_train, "y_train": y_train.to_numpy(), "X_val": X_val, "y_val": y_val.to_numpy(),
+            "categorical": ["ticker", "sector"]}
+
+
+def tune(issuers=None, mode: str = TRAINING_MODE, time_budget: float = TUNING_TIME_BUDGET_SECONDS,
+         n_trials: int = TUNING_TRIALS, max_workers: int = 0, save: bool = True) -> dict:
+    """
+    Search hyperparameters for each issuer, or once for the pooled panel when ``mode``
+    is "pooled". ``time_budget`` (seconds, 0 for none) applies to each search.
+    Returns key -> result and, unless ``save`` is False, persists the winners.
+    """
+    store = get_store()
+    tickers = list(issuers or ISSUERS.keys())
+    configs = sample_configs(n_trials)
+    searches = [(POOLED_KEY, lambda: pooled_data(tickers, store))] if mode == "pooled" else \
+        [(t, lambda t=t: issuer_data(t, store)) for t in tickers]
+    results = {}
+    for key, load in searches:
+        try:
+            res = successive_halving(load(), configs, time_budget, max_workers)
+        except Exception as e:
+            logger.warning(f"Skipping {key}: {e}")
+            continue
+        res["tuned_at"] = datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")
+        results[key] = res
+        baseline = (f"{res['baseline_rmse']:.4f} at {res['baseline_rounds']} rounds"
+                    if res["baseline_rmse"] is not None else "n/a")
+        logger.info(f"{key}: best validation RMSE {res['rmse']:.4f} (LGBM_PARAMS {baseline}) with "
+                    f"{res['params']} after {res['trials']} trials / {res['boosting_rounds']} rounds "
+                    f"in {res['seconds']:.1f}s{' (time budget hit)' if res['timed_out'] else ''}")
+    if save and results:
+        save_tuned_params(results)
+    return results
+
+
+if __name__ == "__main__":
+    import sys
+    budget = float(sys.argv[1]) if len(sys.argv) > 1 else TUNING_TIME_BUDGET_SECONDS
+    out = tune(time_budget=budget)
+    print(pd.DataFrame([{"key": k, "rmse": r["rmse"], "baseline_rmse": r["baseline_rmse"], **r["params"]}
+                        for k, r in out.items()]).to_string(index=False))
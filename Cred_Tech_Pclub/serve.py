@@ -0,0 +1,95 @@
+# serve.py
+"""
+Local HTTP scoring service.
+
+    python serve.py [port]
+
+    GET  /score?ticker=INFY.NS                   -> score, model version, top SHAP drivers
+    POST /score  {"ticker": "INFY.NS", "features": {"avg_sentiment_score": -0.4}}
+    POST /score  {"requests": [{"ticker": ...}, ...]}   -> list of results
+    GET  /health
+
+A single request that fails answers 400 for bad feature overrides (unknown
+name, non-numeric value) and 404 for a ticker without a model or features; in
+a batch, each failed result carries that ``status``.
+
+Every request goes through one shared Scorer, so concurrent requests are
+micro-batched and models stay warm between requests.
+"""
+import json
+import sys
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from config import SCORER_HOST, SCORER_PORT
+from modeling.scorer import Scorer
+from utils.logging_utils import setup_logger
+
+logger = setup_logger("serve")
+
+
+def make_handler(scorer: Scorer):
+    class ScoreHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body go out as separate writes; with Nagle on, keep-alive clients wait on delayed ACKs
+        disable_nagle_algorithm = True
+
+        def _send(self, status: int, body):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _score(self, requests: list):
+            futures = [scorer.submit(r["ticker"], r.get("features")) for r in requests]
+            return [f.result() for f in futures]
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == "/health":
+                return self._send(200, {"status": "ok", **scorer.stats})
+            if url.path != "/score":
+                return self._send(404, {"error": "not found"})
+            ticker = parse_qs(url.query).get("ticker", [None])[0]
+            if not ticker:
+                return self._send(400, {"error": "ticker is required"})
+            res = self._score([{"ticker": ticker}])[0]
+            self._send(res.get("status", 200), res)
+
+        def do_POST(self):
+            if urlparse(self.path).path != "/score":
+                return self._send(404, {"error": "not found"})
+            try:
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                requests = body["requests"] if "requests" in body else [body]
+                if not all(isinstance(r, dict) and r.get("ticker") for r in requests):
+                    raise ValueError("every request needs a ticker")
+            except (ValueError, KeyError, TypeError) as e:
+                return self._send(400, {"error": str(e)})
+            results = self._score(requests)
+            if "requests" in body:
+                return self._send(200, results)
+            self._send(results[0].get("status", 200), results[0])
+
+        def log_message(self, fmt, *args):
+            pass
+
+    return ScoreHandler
+
+
+def make_server(host: str = SCORER_HOST, port: int = SCORER_PORT, scorer: Scorer = None) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer((host, port), make_handler(scorer or Scorer()))
+    server.daemon_threads = True
+    return server
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else SCORER_PORT
+    server = make_server(port=port)
+    logger.info(f"Scoring service on http://{SCORER_HOST}:{port}/score?ticker=...")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
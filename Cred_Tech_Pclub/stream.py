@@ -0,0 +1,55 @@
+# stream.py
+"""
+Intraday scoring from an event stream (see modeling/streaming.py).
+
+    python stream.py events.jsonl [--rate 10000]     # replay a file
+    python stream.py --socket 127.0.0.1:8766         # read JSON lines from a socket
+    python stream.py events.jsonl --print-scores     # also print every published score
+
+Alerts (the rules of analytics/alerts.py) are logged and appended to
+data/alerts/alerts.jsonl; a summary (events, rescorings, alerts,
+event-to-score latency) is printed at the end.
+"""
+import argparse
+import json
+import sys
+
+from config import STREAM_HOST, STREAM_PORT, STREAM_BATCH_MS
+from data_ingestion.event_stream import read_events, socket_events, paced
+from modeling.streaming import StreamScorer
+from utils.logging_utils import setup_logger
+
+logger = setup_logger("stream")
+
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Score issuers from an intraday event stream.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("path", nargs="?", help="JSON-lines event file to replay")
+    source.add_argument("--socket", metavar="HOST:PORT", nargs="?", const=f"{STREAM_HOST}:{STREAM_PORT}",
+                        help="read events from a socket")
+    parser.add_argument("--rate", type=float, help="replay the file at this many events per second")
+    parser.add_argument("--batch-ms", type=float, default=STREAM_BATCH_MS, help="rescoring interval")
+    parser.add_argument("--print-scores", action="store_true", help="print every published score as a JSON line")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = _parse_args()
+    if args.socket:
+        host, _, port = args.socket.rpartition(":")
+        events = socket_events(host or STREAM_HOST, int(port))
+    else:
+        events = paced(read_events(args.path), args.rate)
+    on_score = (lambda res: print(json.dumps(res), flush=True)) if args.print_scores else None
+    streamer = StreamScorer(batch_ms=args.batch_ms, on_score=on_score)
+    if not streamer.states:
+        sys.exit("No issuer has a feature state; run the pipeline first: python main.py")
+    try:
+        summary = streamer.run(events)
+    except KeyboardInterrupt:
+        summary = streamer.summary()
+    finally:
+        streamer.close()
+    logger.info("Stream summary: " + ", ".join(f"{k}={v:.1f}" if isinstance(v, float) else f"{k}={v}"
+                                               for k, v in summary.items()))
@@ -0,0 +1,226 @@
+"""
+A small DAG executor for the pipeline.
+
+Each ``Stage`` declares the paths it reads and writes; a stage depends on every
+stage that writes one of its inputs (or a directory containing it), and stages
+whose dependencies are done run concurrently on a thread pool.
+
+Before running a stage its inputs are fingerprinted (content digests of every
+file under the input paths plus the stage's config params). A stage whose
+fingerprint matches the one recorded after its last successful run, and whose
+outputs still exist, is skipped. File digests are remembered per
+(size, mtime), so unchanged files are not re-read on the next run. Stages
+without declared inputs (the ingestion stages, which read external sources)
+always run.
+
+Every stage run is a memory-sampled ``stage`` span in utils.metrics. With a
+``profile_dir`` each stage that runs is also profiled with cProfile
+(<stage>.prof plus a <stage>.txt of the top functions by cumulative time).
+"""
+import cProfile
+import hashlib
+import io
+import json
+import os
+import pstats
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from pathlib import Path
+
+from utils.logging_utils import setup_logger
+from utils.metrics import timed, count
+
+logger = setup_logger("dag")
+
+
+class Stage:
+    def __init__(self, name: str, fn, inputs=(), outputs=(), params: dict = None):
+        self.name = name
+        self.fn = fn
+        self.inputs = [Path(p) for p in inputs]
+        self.outputs = [Path(p) for p in outputs]
+        self.params = params or {}
+
+    @property
+    def cacheable(self) -> bool:
+        return bool(self.inputs or self.params)
+
+
+def _contains(outer: Path, inner: Path) -> bool:
+    return inner == outer or outer in inner.parents
+
+
+def dependencies(stages: list) -> dict:
+    """name -> names of the stages that write one of its inputs."""
+    deps = {}
+    for s in stages:
+        deps[s.name] = [o.name for o in stages if o is not s and any(
+            _contains(out, inp) or _contains(inp, out) for out in o.outputs for inp in s.inputs)]
+    return deps
+
+
+def _files(path: Path) -> list:
+    if path.is_dir():
+        return sorted(p for p in path.rglob("*") if p.is_file())
+    return [path] if path.exists() else []
+
+
+class DagRunner:
+    def __init__(self, stages: list, state_path: Path, max_workers: int = 4, profile_dir: Path = None):
+        self.stages = {s.name: s for s in stages}
+        self.deps = dependencies(stages)
+        self.state_path = Path(state_path)
+        self.max_workers = max_workers
+        self.profile_dir = Path(profile_dir) if profile_dir else None
+        self._lock = threading.Lock()
+        self.state = {"stages": {}, "files": {}}
+        if self.state_path.exists():
+            try:
+                self.state = json.loads(self.state_path.read_text())
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable pipeline state {self.state_path}: {e}")
+
+    # --- selection ---
+
+    def dependents(self, name: str) -> set:
+        """``name`` and every stage downstream of it."""
+        out, todo = set(), [name]
+        while todo:
+            n = todo.pop()
+            if n not in out:
+                out.add(n)
+                todo.extend(s for s, d in self.deps.items() if n in d)
+        return out
+
+    def select(self, only=None, start=None) -> list:
+        for name in list(only or []) + ([start] if start else []):
+            if name not in self.stages:
+                raise ValueError(f"Unknown stage {name!r}; stages are {', '.join(self.stages)}")
+        if only:
+            return [n for n in self.stages if n in set(only)]
+        if start:
+            return [n for n in self.stages if n in self.dependents(start)]
+        return list(self.stages)
+
+    # --- fingerprints ---
+
+    def _digest(self, path: Path) -> str:
+        st = path.stat()
+        key = str(path)
+        with self._lock:
+            known = self.state["files"].get(key)
+        if known and known[0] == st.st_size and known[1] == st.st_mtime_ns:
+            return known[2]
+        h = hashlib.blake2b(digest_size=16)
+        with open(path, "rb") as f:
+            while chunk := f.read(1 << 20):
+                h.update(chunk)
+        digest = h.hexdigest()
+        with self._lock:
+            self.state["files"][key] = [st.st_size, st.st_mtime_ns, digest]
+        return digest
+
+    def fingerprint(self, stage: Stage) -> str:
+        h = hashlib.blake2b(digest_size=16)
+        h.update(json.dumps(stage.params, sort_keys=True, default=str).encode())
+        for inp in stage.inputs:
+            files = _files(inp)
+            h.update(f"{inp}:{len(files)}".encode())
+            for p in files:
+                h.update(f"{p.relative_to(inp) if p != inp else ''}={self._digest(p)}".encode())
+        return h.hexdigest()
+
+    def _save_state(self):
+        with self._lock:
+            tmp = self.state_path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(self.state))
+            os.replace(tmp, self.state_path)
+
+    # --- execution ---
+
+    def _run_stage(self, stage: Stage, force: bool) -> dict:
+        t0 = time.perf_counter()
+        fp = self.fingerprint(stage) if stage.cacheable else None
+        if (fp is not None and not force and self.state["stages"].get(stage.name) == fp
+                and all(p.exists() for p in stage.outputs)):
+            logger.info(f"=== {stage.name}: inputs unchanged, skipped ===")
+            count("stage_cache", result="hit", stage=stage.name)
+            return {"status": "skipped", "cache": "hit", "seconds": time.perf_counter() - t0}
+        if fp is not None:
+            count("stage_cache", result="miss", stage=stage.name)
+        logger.info(f"=== {stage.name} ===")
+        with timed("stage", memory=True, stage=stage.name) as span:
+            if self.profile_dir is None:
+                stage.fn()
+            else:
+                self._profile(stage)
+        if fp is not None:
+            with self._lock:
+                self.state["stages"][stage.name] = fp
+            self._save_state()
+        return {"status": "ran", "cache": "miss" if fp is not None else "-", "seconds": time.perf_counter() - t0,
+                "peak_rss_mib": span.peak_rss / 2**20}
+
+    def _profile(self, stage: Stage):
+        prof = cProfile.Profile()
+        try:
+            prof.runcall(stage.fn)
+        finally:
+            self.profile_dir.mkdir(parents=True, exist_ok=True)
+            prof.dump_stats(self.profile_dir / f"{stage.name}.prof")
+            out = io.StringIO()
+            pstats.Stats(prof, stream=out).sort_stats("cumulative").print_stats(30)
+            (self.profile_dir / f"{stage.name}.txt").write_text(out.getvalue())
+            logger.info(f"Profile of {stage.name} -> {self.profile_dir / (stage.name + '.prof')}")
+
+    def run(self, only=None, start=None, force: bool = False) -> dict:
+        """
+        Run the selected stages (all by default; ``only`` a list of names, or
+        ``start`` and everything downstream of it). Stages outside the selection
+        are not run and their stored outputs are used as they are. A failing
+        stage blocks its dependents without stopping independent stages.
+        Returns name -> {"status", "cache", "seconds"} in declaration order.
+        """
+        selected = self.select(only, start)
+        results = {n: {"status": "pending" if n in selected else "not selected", "cache": "-", "seconds": 0.0}
+                   for n in self.stages}
+        pending = list(selected)
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while pending or running:
+                for name in list(pending):
+                    upstream = [results[d]["status"] for d in self.deps[name] if d in selected]
+                    if any(s in ("failed", "blocked") for s in upstream):
+                        results[name] = {"status": "blocked", "cache": "-", "seconds": 0.0}
+                        pending.remove(name)
+                    elif all(s in ("ran", "skipped") for s in upstream):
+                        running[pool.submit(self._run_stage, self.stages[name], force)] = (name, time.perf_counter())
+                        pending.remove(name)
+                if not running:
+                    raise RuntimeError(f"Stages {pending} wait on each other (cyclic inputs/outputs)")
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    name, t0 = running.pop(fut)
+                    try:
+                        results[name] = fut.result()
+                    except Exception as e:
+                        logger.warning(f"Stage {name} failed: {e}")
+                        results[name] = {"status": "failed", "cache": "-", "seconds": time.perf_counter() - t0,
+                                         "error": str(e)}
+        # Forget digests of files that no longer exist
+        with self._lock:
+            self.state["files"] = {k: v for k, v in self.state["files"].items() if os.path.exists(k)}
+        self._save_state()
+        return results
+
+
+def format_summary(results: dict) -> str:
+    lines = [f"{'stage':14s} {'status':13s} {'cache':6s} {'seconds':>8s} {'peak RSS':>9s}"]
+    for name, r in results.items():
+        rss = f"{r['peak_rss_mib']:6.0f} MiB" if "peak_rss_mib" in r else ""
+        lines.append(f"{name:14s} {r['status']:13s} {r['cache']:6s} {r['seconds']:8.2f} {rss:>9s}")
+    hits = sum(r["cache"] == "hit" for r in results.values())
+    cacheable = sum(r["cache"] in ("hit", "miss") for r in results.values())
+    lines.append(f"cache hits: {hits}/{cacheable}, stage time: {sum(r['seconds'] for r in results.values()):.2f}s")
+    return "\n".join(lines)
@@ -0,0 +1,225 @@
+"""
+Lightweight run instrumentation.
+
+    with timed("features.build", stage="features"):
+        ...
+
+    @timed("dashboard.load_features")
+    def load_features(ticker): ...
+
+    count("rows", len(df), stage="prices")
+
+Timings (count / sum / max seconds), counters and peak-memory gauges accumulate
+in a process-wide registry keyed by name and labels. Every finished span and
+every ``event`` is also written as one JSON line to METRICS_LOG_PATH, so a run
+can be broken down by stage or ticker afterwards; ``write_prometheus`` dumps
+the registry in the Prometheus text format (e.g. for node_exporter's textfile
+collector). A span opened with ``memory=True`` samples the process RSS every
+METRICS_MEMORY_INTERVAL seconds on a background thread and records its peak.
+
+Keep labels low-cardinality (stage, kind, mode); per-ticker detail belongs in
+``event`` lines, which are not aggregated.
+"""
+import functools
+import json
+import logging
+import os
+import re
+import threading
+import time
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+
+from config import METRICS_LOG_PATH, METRICS_MEMORY_INTERVAL
+
+_lock = threading.Lock()
+_timings = {}     # (name, labels) -> [count, total seconds, max seconds]
+_counters = {}    # (name, labels) -> value
+_gauges = {}      # (name, labels) -> highest value seen
+_json_logger = None
+
+
+def _key(name: str, labels: dict) -> tuple:
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def rss_bytes() -> int:
+    """Current resident set size of this process (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if os.uname().sysname == "Darwin" else peak * 1024
+    except (ImportError, AttributeError):
+        return 0
+
+
+def _log_json(record: dict):
+    global _json_logger
+    if METRICS_LOG_PATH is None:
+        return
+    if _json_logger is None:
+        with _lock:
+            if _json_logger is None:
+                log = logging.getLogger("credtech.metrics")
+                if not log.handlers:
+                    Path(METRICS_LOG_PATH).parent.mkdir(parents=True, exist_ok=True)
+                    handler = RotatingFileHandler(METRICS_LOG_PATH, maxBytes=10 * 2**20, backupCount=3)
+                    handler.setFormatter(logging.Formatter("%(message)s"))
+                    log.addHandler(handler)
+                log.setLevel(logging.INFO)
+                log.propagate = False
+                _json_logger = log
+    _json_logger.info(json.dumps({"ts": round(time.time(), 3), "pid": os.getpid(), **record}, default=str))
+
+
+def count(name: str, value: float = 1, **labels):
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def gauge_max(name: str, value: float, **labels):
+    key = _key(name, labels)
+    with _lock:
+        _gauges[key] = max(_gauges.get(key, value), value)
+
+
+def observe(name: str, seconds: float, **labels):
+    key = _key(name, labels)
+    with _lock:
+        t = _timings.setdefault(key, [0, 0.0, 0.0])
+        t[0] += 1
+        t[1] += seconds
+        t[2] = max(t[2], seconds)
+
+
+def event(name: str, **fields):
+    """One JSON log line, not aggregated (per-ticker results and the like)."""
+    _log_json({"event": name, **fields})
+
+
+class _MemorySampler(threading.Thread):
+    def __init__(self, interval: float):
+        super().__init__(name="rss-sampler", daemon=True)
+        self.interval = interval
+        self.peak = rss_bytes()
+        self._done = threading.Event()
+
+    def run(self):
+        while not self._done.wait(self.interval):
+            self.peak = max(self.peak, rss_bytes())
+
+    def stop(self) -> int:
+        self._done.set()
+        self.join()
+        return max(self.peak, rss_bytes())
+
+
+class timed:
+    """
+    Context manager and decorator timing a block. The duration goes to the
+    registry under ``name`` and ``labels`` and to the JSON log; ``seconds`` (and
+    ``peak_rss`` with ``memory=True``) are readable on the instance afterwards.
+    """
+
+    def __init__(self, name: str, memory: bool = False, **labels):
+        self.name = name
+        self.memory = memory
+        self.labels = labels
+        self.seconds = None
+        self.peak_rss = None
+
+    def __enter__(self):
+        self._sampler = None
+        if self.memory:
+            self._rss0 = rss_bytes()
+            self._sampler = _MemorySampler(METRICS_MEMORY_INTERVAL)
+            self._sampler.start()
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.seconds = time.perf_counter() - self._t0
+        observe(self.name, self.seconds, **self.labels)
+        record = {"event": "span", "name": self.name, **self.labels, "seconds": round(self.seconds, 6),
+                  "ok": exc_type is None}
+        if self._sampler is not None:
+            self.peak_rss = self._sampler.stop()
+            gauge_max(f"{self.name}.peak_rss_bytes", self.peak_rss, **self.labels)
+            record.update(peak_rss_mib=round(self.peak_rss / 2**20, 1),
+                          rss_growth_mib=round((self.peak_rss - self._rss0) / 2**20, 1))
+        _log_json(record)
+        return False
+
+    def __call__(self, fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with timed(self.name, self.memory, **self.labels):
+                return fn(*args, **kwargs)
+        return wrapper
+
+
+def snapshot() -> dict:
+    """Copy of the registry: {"timings": {...}, "counters": {...}, "gauges": {...}} keyed by (name, labels)."""
+    with _lock:
+        return {"timings": {k: list(v) for k, v in _timings.items()}, "counters": dict(_counters),
+                "gauges": dict(_gauges)}
+
+
+def reset():
+    with _lock:
+        _timings.clear()
+        _counters.clear()
+        _gauges.clear()
+
+
+def _metric(name: str, suffix: str = "") -> str:
+    return "credtech_" + re.sub(r"[^a-zA-Z0-9_]", "_", name) + suffix
+
+
+def _series(metric: str, labels: tuple, value) -> str:
+    if labels:
+        body = ",".join(f'{k}="{v.replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+                        for k, v in labels)
+        return f"{metric}{{{body}}} {value}"
+    return f"{metric} {value}"
+
+
+def prometheus_text() -> str:
+    snap = snapshot()
+    lines, typed = [], set()
+
+    def add(metric: str, kind: str, labels: tuple, value):
+        if metric not in typed:
+            lines.append(f"# TYPE {metric} {kind}")
+            typed.add(metric)
+        lines.append(_series(metric, labels, value))
+
+    for (name, labels), (n, total, peak) in sorted(snap["timings"].items()):
+        metric = _metric(name, "_seconds")
+        if metric not in typed:
+            lines.append(f"# TYPE {metric} summary")
+            typed.add(metric)
+        lines.append(_series(metric + "_count", labels, n))
+        lines.append(_series(metric + "_sum", labels, f"{total:.6f}"))
+        add(_metric(name, "_seconds_max"), "gauge", labels, f"{peak:.6f}")
+    for (name, labels), value in sorted(snap["counters"].items()):
+        add(_metric(name, "_total"), "counter", labels, value)
+    for (name, labels), value in sorted(snap["gauges"].items()):
+        add(_metric(name), "gauge", labels, value)
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(path) -> Path:
+    """Write the registry as a Prometheus text file (atomically, so a scraper never reads half a file)."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(prometheus_text())
+    os.replace(tmp, path)
+    return path
@@ -0,0 +1,244 @@
+"""
+Pluggable storage for the pipeline's data sets.
+
+Two kinds of data go through here:
+- series: one Date-indexed frame per ticker ("prices" in data/raw, "features" in data/processed)
+- tables: flat frames addressed by name ("news", "news_with_sentiment", "daily_sentiment", ...)
+
+CsvStore keeps the original file layout (data/raw/INFY_NS.csv, data/processed/features_INFY_NS.csv).
+ParquetStore keeps typed columns and partitions each ticker's series by year
+(data/raw/prices/INFY_NS/year=2024.parquet), so appends rewrite one partition and
+date-range reads only open the years they need. With EXPORT_CSV the Parquet store
+also mirrors every write to the CSV layout.
+"""
+from pathlib import Path
+import pandas as pd
+
+from config import RAW_DATA_DIR, PROCESSED_DATA_DIR, STORAGE_BACKEND, EXPORT_CSV
+from utils.logging_utils import setup_logger
+
+logger = setup_logger("storage")
+
+# Tables that live next to the raw downloads; everything else is processed output
+_RAW_TABLES = {"news"}
+
+
+def safe_name(ticker: str) -> str:
+    return ticker.replace("^", "").replace("=", "_").replace(".", "_")
+
+
+def _merge(old: pd.DataFrame, new: pd.DataFrame) -> pd.DataFrame:
+    if old.empty:
+        return new.sort_index()
+    merged = pd.concat([old, new])
+    # A re-delivered row replaces the stored one
+    return merged[~merged.index.duplicated(keep="last")].sort_index()
+
+
+def _clip(df: pd.DataFrame, start=None, end=None) -> pd.DataFrame:
+    if start is not None:
+        df = df.loc[df.index >= pd.Timestamp(start)]
+    if end is not None:
+        df = df.loc[df.index <= pd.Timestamp(end)]
+    return df
+
+
+class CsvStore:
+    name = "csv"
+
+    def __init__(self, raw_dir: Path = RAW_DATA_DIR, processed_dir: Path = PROCESSED_DATA_DIR):
+        self.raw_dir = Path(raw_dir)
+        self.processed_dir = Path(processed_dir)
+
+    def series_path(self, kind: str, ticker: str) -> Path:
+        if kind == "prices":
+            return self.raw_dir / f"{safe_name(ticker)}.csv"
+        return self.processed_dir / f"{kind}_{safe_name(ticker)}.csv"
+
+    def table_path(self, name: str) -> Path:
+        base = self.raw_dir if name in _RAW_TABLES else self.processed_dir
+        return base / f"{name}.csv"
+
+    def has_series(self, kind: str, ticker: str) -> bool:
+        return self.series_path(kind, ticker).exists()
+
+    def read_series(self, kind: str, ticker: str, columns=None, start=None, end=None) -> pd.DataFrame:
+        path = self.series_path(kind, ticker)
+        if not path.exists():
+            return pd.DataFrame()
+        wanted = None if columns is None else {"Date", *columns}
+        usecols = None if wanted is None else (lambda c: c in wanted)
+        df = pd.read_csv(path, parse_dates=["Date"], usecols=usecols)
+        # CSV loses dtypes; force numeric for all non-Date columns
+        for col in df.columns:
+            if col != "Date":
+                df[col] = pd.to_numeric(df[col], errors="coerce")
+        df = df.dropna(subset=["Date"]).set_index("Date")
+        return _clip(df, start, end)
+
+    def tail_series(self, kind: str, ticker: str, n: int, columns=None) -> pd.DataFrame:
+        return self.read_series(kind, ticker, columns).iloc[-n:]
+
+    def write_series(self, kind: str, ticker: str, df: pd.DataFrame):
+        path = self.series_path(kind, ticker)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        out = df.copy()
+        out.index.name = "Date"
+        out.to_csv(path, encoding="utf-8")
+
+    def append_series(self, kind: str, ticker: str, new: pd.DataFrame):
+        self.write_series(kind, ticker, _merge(self.read_series(kind, ticker), new))
+
+    def describe_series(self, kind: str, ticker: str) -> dict:
+        path = self.series_path(kind, ticker)
+        if not path.exists():
+            return {"rows": 0, "last_date": None, "bytes": 0}
+        dates = pd.read_csv(path, usecols=["Date"], parse_dates=["Date"])["Date"].dropna()
+        return {"rows": len(dates), "last_date": dates.max() if len(dates) else None,
+                "bytes": path.stat().st_size}
+
+    def has_table(self, name: str) -> bool:
+        return self.table_path(name).exists()
+
+    def read_table(self, name: str) -> pd.DataFrame:
+        path = self.table_path(name)
+        if not path.exists():
+            return pd.DataFrame()
+        return pd.read_csv(path, encoding="utf-8")
+
+    def write_table(self, name: str, df: pd.DataFrame):
+        path = self.table_path(name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        df.to_csv(path, index=False, encoding="utf-8")
+
+
+class ParquetStore:
+    name = "parquet"
+
+    def __init__(self, raw_dir: Path = RAW_DATA_DIR, processed_dir: Path = PROCESSED_DATA_DIR,
+                 export_csv: bool = EXPORT_CSV):
+        self.raw_dir = Path(raw_dir)
+        self.processed_dir = Path(processed_dir)
+        self.csv = CsvStore(raw_dir, processed_dir) if export_csv else None
+
+    def series_path(self, kind: str, ticker: str) -> Path:
+        base = self.raw_dir if kind == "prices" else self.processed_dir
+        return base / kind / safe_name(ticker)
+
+    def table_path(self, name: str) -> Path:
+        base = self.raw_dir if name in _RAW_TABLES else self.processed_dir
+        return base / f"{name}.parquet"
+
+    def _partitions(self, kind: str, ticker: str, start=None, end=None) -> list:
+        root = self.series_path(kind, ticker)
+        if not root.exists():
+            return []
+        parts = sorted(root.glob("year=*.parquet"))
+        lo = pd.Timestamp(start).year if start is not None else None
+        hi = pd.Timestamp(end).year if end is not None else None
+        return [p for p in parts
+                if (lo is None or int(p.stem[5:]) >= lo) and (hi is None or int(p.stem[5:]) <= hi)]
+
+    def has_series(self, kind: str, ticker: str) -> bool:
+        return bool(self._partitions(kind, ticker))
+
+    def read_series(self, kind: str, ticker: str, columns=None, start=None, end=None) -> pd.DataFrame:
+        parts = self._partitions(kind, ticker, start, end)
+        if not parts:
+            return pd.DataFrame()
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        cols = list(columns) if columns is not None else None
+        # One dataset scan over the selected partitions; pandas metadata restores the Date index. The
+        # dataset would take its schema from the first partition, so columns that only newer years have
+        # (e.g. a context series added since) are read with a schema unified over all of them (NaN before).
+        schema = pa.unify_schemas([pq.read_schema(p) for p in parts], promote_options="permissive")
+        df = pq.ParquetDataset(parts, schema=schema).read_pandas(columns=cols).to_pandas()
+        return _clip(df, start, end)
+
+    def tail_series(self, kind: str, ticker: str, n: int, columns=None) -> pd.DataFrame:
+        """Last ``n`` rows, reading partitions newest first only until there are enough."""
+        import pyarrow.parquet as pq
+        cols = list(columns) if columns is not None else None
+        frames, rows = [], 0
+        for part in reversed(self._partitions(kind, ticker)):
+            frames.append(pq.read_pandas(part, columns=cols).to_pandas())
+            rows += len(frames[-1])
+            if rows >= n:
+                break
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames[::-1]).sort_index().iloc[-n:]
+
+    def _write_partitions(self, kind: str, ticker: str, df: pd.DataFrame, years):
+        root = self.series_path(kind, ticker)
+        root.mkdir(parents=True, exist_ok=True)
+        df = df.copy()
+        df.index = pd.DatetimeIndex(df.index, name="Date")
+        for year in years:
+            part = df.loc[df.index.year == year]
+            path = root / f"year={year}.parquet"
+            if part.empty:
+                path.unlink(missing_ok=True)
+            else:
+                part.to_parquet(path, engine="pyarrow")
+
+    def write_series(self, kind: str, ticker: str, df: pd.DataFrame):
+        stale = {int(p.stem[5:]) for p in self._partitions(kind, ticker)}
+        self._write_partitions(kind, ticker, df, stale | set(pd.DatetimeIndex(df.index).year))
+        if self.csv:
+            self.csv.write_series(kind, ticker, df)
+
+    def append_series(self, kind: str, ticker: str, new: pd.DataFrame):
+        if new.empty:
+            return
+        new_index = pd.DatetimeIndex(new.index)
+        # Only the partitions that receive rows are read back and rewritten
+        old = self.read_series(kind, ticker, start=f"{new_index.year.min()}-01-01")
+        merged = _merge(old, new.set_axis(new_index))
+        self._write_partitions(kind, ticker, merged, set(merged.index.year))
+        if self.csv:
+            self.csv.write_series(kind, ticker, self.read_series(kind, ticker))
+
+    def describe_series(self, kind: str, ticker: str) -> dict:
+        import pyarrow.parquet as pq
+        parts = self._partitions(kind, ticker)
+        if not parts:
+            return {"rows": 0, "last_date": None, "bytes": 0}
+        rows = sum(pq.ParquetFile(p).metadata.num_rows for p in parts)
+        last = pd.read_parquet(parts[-1], columns=[]).index.max()
+        return {"rows": rows, "last_date": last, "bytes": sum(p.stat().st_size for p in parts)}
+
+    def has_table(self, name: str) -> bool:
+        return self.table_path(name).exists()
+
+    def read_table(self, name: str) -> pd.DataFrame:
+        path = self.table_path(name)
+        if not path.exists():
+            return pd.DataFrame()
+        return pd.read_parquet(path)
+
+    def write_table(self, name: str, df: pd.DataFrame):
+        path = self.table_path(name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        df.to_parquet(path, engine="pyarrow", index=False)
+        if self.csv:
+            self.csv.write_table(name, df)
+
+
+_STORES = {}
+
+
+def get_store(backend: str = None):
+    """Process-wide store for the configured backend (falls back to CSV without pyarrow)."""
+    backend = backend or STORAGE_BACKEND
+    if backend not in _STORES:
+        store = CsvStore()
+        if backend == "parquet":
+            try:
+                import pyarrow  # noqa: F401
+                store = ParquetStore()
+            except ImportError as e:
+                logger.warning(f"Parquet storage unavailable, falling back to CSV: {e}")
+        _STORES[backend] = store
+    return _STORES[backend]